@@ -1,22 +1,48 @@
 import math
 import random
 
+import numpy as np
 
-def bernoulli_rvs(p):
+from utils.RandomPool import RandomPool, probability_thresholds
+
+_default_pool = None
+
+
+def _pool(pool):
+    # Shared block pool used when the caller does not pass its own
+    global _default_pool
+    if pool is not None:
+        return pool
+    if _default_pool is None:
+        _default_pool = RandomPool()
+    return _default_pool
+
+
+def bernoulli_rvs(p, size=None, pool=None):
     # Return a sample from a Bernoulli-distributed random source
     # We convert from a Uniform(0, 1)
-    r = random.random()
-    if r >= p:
-        return 1
-    return 0
+    if size is None:
+        r = random.random()
+        if r >= p:
+            return 1
+        return 0
+
+    # Vectorized: r >= p on uniform uint32 draws against the precomputed threshold of p
+    thresholds = np.broadcast_to(probability_thresholds(p), size)
+    return (~_pool(pool).bernoulli(thresholds)).astype(np.uint8)
+
 
+def poisson_rvs(mu, size=None, pool=None):
+    if size is not None:
+        return _pool(pool).poisson(mu, size)
 
-def poisson_rvs(mu):
-    p0 = math.exp(-mu)
-    F = p0
+    # Inversion with the probability mass updated incrementally: p(i) = p(i - 1) * mu / i
+    term = math.exp(-mu)
+    F = term
     i = 0
     sample = random.random()
     while sample >= F:
         i += 1
-        F += p0 * (mu ** i) / math.factorial(i)
-    return i
\ No newline at end of file
+        term *= mu / i
+        F += term
+    return i
@@ -0,0 +1,176 @@
+import numpy as np
+
+from enums.State import State
+from models.Population import AGE_GROUPS, EDUCATION_GROUPS, SEX_GROUPS, SOCIAL_PLATFORMS, Population
+
+STATES = list(State)
+
+# Number of agents processed at a time by chunked passes over the columns
+CHUNK_SIZE = 1 << 22
+
+
+class AgentView:
+    __slots__ = ('store', 'unique_id')
+
+    def __init__(self, store, unique_id):
+        """
+        Initializes a view of one agent of an AgentStore. Enum values are only materialized
+        when an attribute is read, so views are cheap to create and hold no agent data.
+
+        Args:
+            store (AgentStore): The store holding the agent.
+            unique_id (int): Index of the agent in the store.
+        """
+        self.store = store
+        self.unique_id = unique_id
+
+    @property
+    def age_group(self):
+        return AGE_GROUPS[self.store.population.age_codes[self.unique_id]]
+
+    @property
+    def sex_group(self):
+        return SEX_GROUPS[self.store.population.sex_codes[self.unique_id]]
+
+    @property
+    def education_group(self):
+        return EDUCATION_GROUPS[self.store.population.education_codes[self.unique_id]]
+
+    @property
+    def social_platform(self):
+        return SOCIAL_PLATFORMS[self.store.population.platform_codes[self.unique_id]]
+
+    @property
+    def state(self):
+        return STATES[self.store.states[self.unique_id]]
+
+    @state.setter
+    def state(self, state):
+        self.store.states[self.unique_id] = state.value
+
+    def __repr__(self):
+        return (f"UserAgent(id={self.unique_id}, age_group={self.age_group.name}, "
+                f"sex_group={self.sex_group.name}, education_group={self.education_group.name}, "
+                f"social_platform={self.social_platform.name}, state={self.state.name})")
+
+    def to_dict(self):
+        """
+        Returns a dictionary representation of the agent, in the same format as UserAgent.to_dict.
+        """
+        return {
+            "ID": self.unique_id,
+            "Age Group": self.age_group.name,
+            "Sex Group": self.sex_group.name,
+            "Education Group": self.education_group.name,
+            "Social Platform": self.social_platform.name,
+            "State": self.state.name
+        }
+
+    def to_string(self):
+        """
+        Returns a detailed string representation of the agent.
+        """
+        return (f"UserAgent [ID: {self.unique_id}, Age Group: {self.age_group.name}, "
+                f"Sex Group: {self.sex_group.name}, Education Group: {self.education_group.name}, "
+                f"Social Platform: {self.social_platform.name}, State: {self.state.name}]")
+
+
+class AgentStore:
+    def __init__(self, population, states=None):
+        """
+        Initializes the AgentStore, a compact column store of agents: the population's four uint8
+        demographic columns, their packed cohort code and a uint8 state column, six bytes per agent.
+
+        The store is a sequence of AgentView objects, so code written against a list of UserAgent
+        objects (iteration, indexing, to_dict) keeps working.
+
+        Args:
+            population (Population): Demographic columns of the agents.
+            states (np.ndarray): Optional initial State values; every agent is SUSCEPTIBLE when omitted.
+        """
+        self.population = population
+        self.chunk_size = CHUNK_SIZE
+        if states is None:
+            states = np.full(population.num_agents, State.SUSCEPTIBLE.value, dtype=np.uint8)
+        self.states = np.asarray(states, dtype=np.uint8)
+        if len(self.states) != population.num_agents:
+            raise ValueError("states must have one entry per agent.")
+
+    @classmethod
+    def synthesize(cls, num_agents, selected_social_platforms=None, initial_believing_agents=0, rng=None):
+        """
+        Samples a population and exposes a random subset of it.
+
+        Args:
+            num_agents (int): Number of agents.
+            selected_social_platforms (list of SocialPlatform): Platforms to assign to agents (default: all).
+            initial_believing_agents (int): Number of agents initially believing in disinformation.
+            rng (np.random.Generator): Random number generator.
+
+        Returns:
+            AgentStore: The new store.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        store = cls(Population.synthesize(num_agents, selected_social_platforms, rng))
+        store.expose(min(initial_believing_agents, num_agents), rng)
+        return store
+
+    def expose(self, count, rng):
+        """
+        Moves count randomly chosen agents to EXPOSED.
+
+        Args:
+            count (int): Number of agents.
+            rng (np.random.Generator): Random number generator.
+        """
+        self.states[rng.choice(len(self.states), size=count, replace=False)] = State.EXPOSED.value
+
+    @property
+    def nbytes(self):
+        """
+        int: Memory used by the agent columns.
+        """
+        population = self.population
+        return sum(column.nbytes for column in (population.age_codes, population.sex_codes,
+                                                population.education_codes, population.platform_codes,
+                                                population.cohort_codes, self.states))
+
+    def chunks(self, start=0, stop=None, chunk_size=None):
+        """
+        Yields slices of at most chunk_size agents, and at most self.chunk_size agents, covering
+        range(start, stop), in order.
+
+        Args:
+            start (int): First agent.
+            stop (int): End of the range (default: all agents).
+            chunk_size (int): Optional maximum number of agents per slice.
+        """
+        stop = len(self) if stop is None else stop
+        chunk_size = self.chunk_size if chunk_size is None else min(chunk_size, self.chunk_size)
+        for chunk_start in range(start, stop, chunk_size):
+            yield slice(chunk_start, min(chunk_start + chunk_size, stop))
+
+    def count_states(self):
+        """
+        Counts the agents in each state.
+
+        Returns:
+            dict: Keys are states, values are the number of agents in each state.
+        """
+        counts = np.bincount(self.states, minlength=len(State))
+        return {state: int(counts[state.value]) for state in State}
+
+    def __len__(self):
+        return len(self.states)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [AgentView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("agent index out of range")
+        return AgentView(self, index)
+
+    def __iter__(self):
+        return (AgentView(self, i) for i in range(len(self)))
@@ -0,0 +1,66 @@
+from enums.State import State
+
+
+class CohortProfile:
+    __slots__ = ('cohort_code', 'alpha', 'beta', 'gamma', 'delta', 'theta', 'doubtful_threshold')
+
+    def __init__(self, cohort_code, alpha, beta, gamma, delta, theta, doubtful_threshold):
+        """
+        Initializes a CohortProfile, the transition probabilities shared by every agent of one
+        age x sex x education cohort. Profiles are read-only for agents; only the model refreshes
+        them when a base parameter changes.
+
+        Args:
+            cohort_code (int): Packed cohort code, see pack_cohort_codes.
+            alpha (float): Effective probability of SUSCEPTIBLE -> EXPOSED.
+            beta (float): Effective probability of EXPOSED -> INFECTED.
+            gamma (float): Effective gamma probability, base gamma x modifier x scale.
+            delta (float): Effective probability of INFECTED -> RECOVERED.
+            theta (float): Effective probability of DOUBTFUL -> EXPOSED.
+            doubtful_threshold (float): An EXPOSED agent whose draw is at least beta and below this
+                value becomes DOUBTFUL; the modifier noise of beta and gamma is integrated into it.
+        """
+        for name, value in zip(self.__slots__, (cohort_code, alpha, beta, gamma, delta, theta, doubtful_threshold)):
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def build_all(cls, probabilities, first, second):
+        """
+        Builds the profiles of every cohort.
+
+        Args:
+            probabilities (np.ndarray): Mean transition probabilities of shape (len(PARAMETER_NAMES), C).
+            first (np.ndarray): First-outcome probabilities of shape (len(State), C), see transition_probabilities.
+            second (np.ndarray): First-or-second-outcome probabilities of the same shape.
+
+        Returns:
+            list of CohortProfile: Profiles indexed by cohort code.
+        """
+        gamma = probabilities[2]
+        return [
+            cls(code,
+                float(first[State.SUSCEPTIBLE.value, code]),
+                float(first[State.EXPOSED.value, code]),
+                float(gamma[code]),
+                float(first[State.INFECTED.value, code]),
+                float(first[State.DOUBTFUL.value, code]),
+                float(second[State.EXPOSED.value, code]))
+            for code in range(probabilities.shape[-1])
+        ]
+
+    def refresh(self, profile):
+        """
+        Copies the probabilities of another profile of the same cohort into this one.
+
+        Args:
+            profile (CohortProfile): Profile with the new probabilities.
+        """
+        for name in self.__slots__:
+            object.__setattr__(self, name, getattr(profile, name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CohortProfile is immutable.")
+
+    def __repr__(self):
+        return (f"CohortProfile(cohort={self.cohort_code}, alpha={self.alpha:.6g}, beta={self.beta:.6g}, "
+                f"gamma={self.gamma:.6g}, delta={self.delta:.6g}, theta={self.theta:.6g})")
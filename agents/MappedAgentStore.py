@@ -0,0 +1,189 @@
+import mmap
+import os
+
+import numpy as np
+
+from agents.AgentStore import AgentStore
+from enums.State import State
+from models.Population import SYNTHESIS_CHUNK_SIZE, Population
+from utils.PopulationCache import COLUMNS
+
+# The population file has the layout of a PopulationCache file, so either can be loaded as the other
+POPULATION_FILE = 'population.npy'
+STATES_FILE = 'states.npy'
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Bytes held per agent of a chunk being stepped: its state and cohort code, the prefetched next chunk,
+# the uint32 draw, the temporaries of the NumPy kernel and the packed codes of the cohort counts
+BYTES_PER_CHUNK_AGENT = 32
+
+# Page advice is only available on platforms with madvise
+CAN_ADVISE = hasattr(mmap, 'MADV_DONTNEED')
+
+
+def chunk_size_for_budget(memory_budget, workers=1):
+    """
+    Gets the number of agents stepped at a time so that the chunks in flight fit a memory budget.
+
+    Args:
+        memory_budget (int): Bytes available for the chunks.
+        workers (int): Number of chunks in flight at the same time, one per thread.
+
+    Returns:
+        int: Chunk size, a positive multiple of the page size.
+    """
+    chunk_size = memory_budget // (BYTES_PER_CHUNK_AGENT * workers)
+    return max(mmap.PAGESIZE, chunk_size - chunk_size % mmap.PAGESIZE)
+
+
+def _map_array(path, writable):
+    """
+    Maps a whole .npy file and views its data as an array.
+
+    Returns:
+        tuple: The array, the mmap object and the offset of the data in the file.
+    """
+    with open(path, 'r+b' if writable else 'rb') as file:
+        version = np.lib.format.read_magic(file)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+        if fortran_order or dtype != np.uint8:
+            raise ValueError(f"{path} is not a C-ordered uint8 array.")
+        offset = file.tell()
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+    if CAN_ADVISE:
+        # Aggressive read-ahead; pages behind the current position may be dropped early
+        mapping.madvise(mmap.MADV_SEQUENTIAL)
+    return np.ndarray(shape, dtype=np.uint8, buffer=mapping, offset=offset), mapping, offset
+
+
+class MappedAgentStore(AgentStore):
+    def __init__(self, directory, memory_budget=DEFAULT_MEMORY_BUDGET, workers=1):
+        """
+        Opens an out-of-core AgentStore whose population and state columns are memory-mapped .npy
+        files in a directory, for populations larger than RAM.
+
+        Agents are processed in chunks sized to the memory budget: chunks() asks the OS to read the
+        next chunk ahead while the current one is used and releases the pages of every finished chunk,
+        so the resident set stays bounded while the files are read and written sequentially.
+
+        Args:
+            directory (str): Directory holding POPULATION_FILE and STATES_FILE, see create().
+            memory_budget (int): Bytes available for the chunks in flight.
+            workers (int): Number of chunks processed at the same time, one per thread.
+        """
+        self.directory = directory
+        columns, population_mapping, population_offset = _map_array(os.path.join(directory, POPULATION_FILE),
+                                                                    writable=False)
+        states, states_mapping, states_offset = _map_array(os.path.join(directory, STATES_FILE), writable=True)
+        if columns.shape[0] != len(COLUMNS):
+            raise ValueError(f"{directory} does not hold a mapped agent store.")
+
+        # Byte offset of every mapped column, used to advise the pages of a range of agents
+        num_agents = columns.shape[1]
+        self._mapped_columns = [(population_mapping, population_offset + row * num_agents)
+                                for row in range(len(COLUMNS))]
+        self._mapped_columns.append((states_mapping, states_offset))
+        super().__init__(Population(*columns), states)
+        self.chunk_size = chunk_size_for_budget(memory_budget, workers)
+
+    @classmethod
+    def create(cls, directory, num_agents, selected_social_platforms=None, initial_believing_agents=0, rng=None,
+               population=None, memory_budget=DEFAULT_MEMORY_BUDGET, workers=1):
+        """
+        Writes a new store into a directory, replacing any store in it, and exposes a random subset of
+        the agents. The population is sampled SYNTHESIS_CHUNK_SIZE agents at a time, so a given rng
+        gives the same agents as AgentStore.synthesize, or copied from a prebuilt population.
+
+        Args:
+            directory (str): Directory of the store; created when missing.
+            num_agents (int): Number of agents.
+            selected_social_platforms (list of SocialPlatform): Platforms to assign to agents (default: all).
+            initial_believing_agents (int): Number of agents initially believing in disinformation.
+            rng (np.random.Generator): Random number generator.
+            population (Population): Optional population to copy, e.g. a memory-mapped cached one.
+            memory_budget (int): Bytes available for the chunks in flight.
+            workers (int): Number of chunks processed at the same time, one per thread.
+
+        Returns:
+            MappedAgentStore: The new store.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        os.makedirs(directory, exist_ok=True)
+        population_path = os.path.join(directory, POPULATION_FILE)
+        states_path = os.path.join(directory, STATES_FILE)
+        # The files are created sparse and then written sequentially through plain file writes
+        population_offset = np.lib.format.open_memmap(population_path, mode='w+', dtype=np.uint8,
+                                                      shape=(len(COLUMNS), num_agents)).offset
+        states_offset = np.lib.format.open_memmap(states_path, mode='w+', dtype=np.uint8, shape=(num_agents,)).offset
+
+        with open(population_path, 'r+b') as population_file, open(states_path, 'r+b') as states_file:
+            for start in range(0, num_agents, SYNTHESIS_CHUNK_SIZE):
+                stop = min(start + SYNTHESIS_CHUNK_SIZE, num_agents)
+                if population is None:
+                    chunk = Population.synthesize(stop - start, selected_social_platforms, rng)
+                    columns = [getattr(chunk, column) for column in COLUMNS]
+                else:
+                    columns = [getattr(population, column)[start:stop] for column in COLUMNS]
+                for row, values in enumerate(columns):
+                    population_file.seek(population_offset + row * num_agents + start)
+                    population_file.write(np.ascontiguousarray(values, dtype=np.uint8).tobytes())
+                states_file.seek(states_offset + start)
+                states_file.write(np.full(stop - start, State.SUSCEPTIBLE.value, dtype=np.uint8).tobytes())
+
+        store = cls(directory, memory_budget, workers)
+        store.expose(min(initial_believing_agents, num_agents), rng)
+        return store
+
+    def _advise(self, advice, start, stop):
+        """
+        Gives advice on the pages of every column holding the agents in range(start, stop). Both ends
+        are rounded down to page boundaries, except at the end of a file, so a page shared with the next
+        range is advised together with that range.
+        """
+        if stop <= start:
+            return
+        for mapping, offset in self._mapped_columns:
+            first = (offset + start) // mmap.PAGESIZE * mmap.PAGESIZE
+            last = offset + stop
+            if last < len(mapping):
+                last -= last % mmap.PAGESIZE
+            if last > first:
+                mapping.madvise(advice, first, last - first)
+
+    def prefetch(self, start, stop):
+        """
+        Asks the OS to start reading the pages of the agents in range(start, stop).
+        """
+        if CAN_ADVISE:
+            self._advise(mmap.MADV_WILLNEED, start, stop)
+
+    def release(self, start, stop):
+        """
+        Drops the pages of the agents in range(start, stop) from the resident set. Changed states are
+        kept by the shared mapping and written to the file by the OS.
+        """
+        if CAN_ADVISE:
+            self._advise(mmap.MADV_DONTNEED, start, stop)
+
+    def chunks(self, start=0, stop=None, chunk_size=None):
+        """
+        Yields slices covering range(start, stop), see AgentStore.chunks. The next chunk is prefetched
+        before a chunk is yielded and the chunk is released once the caller asks for the next one.
+        """
+        stop = len(self) if stop is None else stop
+        chunk_size = self.chunk_size if chunk_size is None else min(chunk_size, self.chunk_size)
+        for chunk_start in range(start, stop, chunk_size):
+            chunk_stop = min(chunk_start + chunk_size, stop)
+            self.prefetch(chunk_stop, min(chunk_stop + chunk_size, stop))
+            yield slice(chunk_start, chunk_stop)
+            self.release(chunk_start, chunk_stop)
+
+    def flush(self):
+        """
+        Writes the changed states to the file.
+        """
+        self._mapped_columns[-1][0].flush()
@@ -6,7 +6,10 @@ from enums.SocialPlatform import SocialPlatform
 
 
 class UserAgent:
-    def __init__(self, unique_id, model, age_group, sex_group, education_group, social_platform):
+    __slots__ = ('unique_id', 'model', 'age_group', 'sex_group', 'education_group', 'social_platform', 'state',
+                 'profile')
+
+    def __init__(self, unique_id, model, age_group, sex_group, education_group, social_platform, profile=None):
         """
         Initializes a user agent.
 
@@ -17,6 +20,8 @@ class UserAgent:
             sex_group (SexGroup): Sex of the agent.
             education_group (EducationGroup): Education level of the agent.
             social_platform (SocialPlatform): Social media platform of the agent.
+            profile (CohortProfile): Shared transition probabilities of the agent's cohort;
+                assigned by the model when omitted.
         """
         self.unique_id = unique_id
         self.model = model
@@ -25,6 +30,7 @@ class UserAgent:
         self.education_group = education_group
         self.social_platform = social_platform
         self.state = State.SUSCEPTIBLE  # Initial state of the agent
+        self.profile = profile
 
     def step(self):
         """
@@ -45,11 +51,7 @@ class UserAgent:
         """
         Transition from S (Susceptible) to E (Exposed) with probability alpha adjusted by attributes.
         """
-        base_alpha = self.model.alpha
-        alpha_modifier = self.model.get_alpha_modifier(self)
-        effective_alpha = base_alpha * alpha_modifier * 0.05
-
-        if random.random() < effective_alpha:
+        if random.random() < self.profile.alpha:
             self.state = State.EXPOSED
 
     def _exposed_transition(self):
@@ -57,40 +59,25 @@ class UserAgent:
         Transition from E (Exposed) to I (Infected) with probability beta adjusted by attributes
         or to D (Doubtful) with probability gamma adjusted by attributes.
         """
-        base_beta = self.model.beta
-        base_gamma = self.model.gamma
-        beta_modifier = self.model.get_beta_modifier(self)
-        gamma_modifier = self.model.get_gamma_modifier(self)
-
-        effective_beta = base_beta * beta_modifier * 0.1
-        effective_gamma = base_gamma * gamma_modifier * 0.05
-
+        profile = self.profile
         rand = random.random()
-        if rand < effective_beta:
+        if rand < profile.beta:
             self.state = State.INFECTED
-        elif rand < effective_gamma:
+        elif rand < profile.doubtful_threshold:
             self.state = State.DOUBTFUL
 
     def _infected_to_recovered(self):
         """
         Transition from I (Infected) to R (Recovered) with probability delta adjusted by attributes.
         """
-        base_delta = self.model.delta
-        delta_modifier = self.model.get_delta_modifier(self)
-        effective_delta = base_delta * delta_modifier * 0.02
-
-        if random.random() < effective_delta:
+        if random.random() < self.profile.delta:
             self.state = State.RECOVERED
 
     def _doubtful_to_exposed(self):
         """
         Transition from D (Doubtful) to E (Exposed) with probability theta adjusted by attributes.
         """
-        base_theta = self.model.theta
-        theta_modifier = self.model.get_theta_modifier(self)
-        effective_theta = base_theta * theta_modifier * 0.01
-
-        if random.random() < effective_theta:
+        if random.random() < self.profile.theta:
             self.state = State.EXPOSED
 
     def __repr__(self):
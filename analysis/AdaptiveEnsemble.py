@@ -0,0 +1,235 @@
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+from enums.State import State
+from models.DisinformationModel import DisinformationModel, PARAMETER_NAMES
+
+ENSEMBLE_OUTPUTS = ('peak_infected', 'time_to_peak', 'final_recovered')
+
+# Shares are absolute tolerances on [0, 1]; time to peak is in steps
+DEFAULT_TOLERANCES = {
+    'peak_infected': 0.005,
+    'time_to_peak': 1.0,
+    'final_recovered': 0.005,
+}
+
+# Newton steps refining the 3-degrees-of-freedom t quantile; the expansion is close enough for a few to converge
+DF3_NEWTON_ITERATIONS = 6
+
+
+def simulate_outputs(parameters, num_agents, num_steps, initial_believing_agents, selected_social_platforms, engine,
+                     seed):
+    """
+    Runs one model replicate and reduces it to the ensemble outputs.
+    Defined at module level so that it can be sent to worker processes.
+
+    Returns:
+        np.ndarray: Peak INFECTED share, step of the peak and final RECOVERED share, in the order
+        of ENSEMBLE_OUTPUTS.
+    """
+    model = DisinformationModel(
+        N=num_agents,
+        initial_believing_agents=initial_believing_agents,
+        selected_social_platforms=selected_social_platforms,
+        seed=seed,
+        engine=engine,
+        **parameters
+    )
+    try:
+        return model_outputs(model, num_steps)
+    finally:
+        model.close()
+
+
+def model_outputs(model, num_steps):
+    """
+    Runs a model for num_steps steps and reduces the run to the ensemble outputs.
+
+    Args:
+        model (DisinformationModel): A freshly built model.
+        num_steps (int): Number of simulation steps.
+
+    Returns:
+        np.ndarray: Values of ENSEMBLE_OUTPUTS.
+    """
+    num_agents = model.num_agents
+    # RECOVERED is absorbing, so nothing changes after every agent has recovered
+    result = model.run(num_steps, record_every=max(num_steps, 1), record_peaks=True,
+                       until=lambda step, counts: counts[State.RECOVERED.value] == num_agents)
+    scale = max(num_agents, 1)
+    return np.array([result['peaks'][State.INFECTED.value] / scale, result['peak_steps'][State.INFECTED.value],
+                     result['counts'][-1, State.RECOVERED.value] / scale])
+
+
+def t_quantile(probability, degrees_of_freedom):
+    """
+    Gets a quantile of Student's t distribution. Up to 3 degrees of freedom the quantile is exact, from
+    the closed-form distribution; from 4 on it is approximated with the Cornish-Fisher expansion around
+    the normal quantile, whose error is below 1% there.
+
+    Args:
+        probability (float): Cumulative probability, e.g. 0.975.
+        degrees_of_freedom (int): Degrees of freedom.
+
+    Returns:
+        float: The quantile.
+    """
+    df = degrees_of_freedom
+    if df == 1:
+        return math.tan(math.pi * (probability - 0.5))
+    if df == 2:
+        return (2 * probability - 1) / math.sqrt(2 * probability * (1 - probability))
+    z = NormalDist().inv_cdf(probability)
+    t = (z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+         + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3))
+    if df == 3:
+        # Newton's method on the closed-form distribution function, starting from the expansion
+        for _ in range(DF3_NEWTON_ITERATIONS):
+            u = t / math.sqrt(3)
+            cdf = 0.5 + (u / (1 + u ** 2) + math.atan(u)) / math.pi
+            density = 6 * math.sqrt(3) / (math.pi * (3 + t ** 2) ** 2)
+            t -= (cdf - probability) / density
+    return t
+
+
+class AdaptiveEnsemble:
+    def __init__(self, parameters=None, num_agents=1000, num_steps=100, initial_believing_agents=50,
+                 selected_social_platforms=None, engine='array', seed=0, outputs=ENSEMBLE_OUTPUTS, tolerance=None,
+                 confidence=0.95, batch_size=8, min_replicates=8, max_replicates=256, max_workers=1):
+        """
+        Initializes the AdaptiveEnsemble, which runs replicates of one scenario in batches until the
+        confidence interval of every chosen output is narrow enough or the replicate budget is spent.
+
+        Replicate i is seeded with seed + i, so the outputs of a replicate do not depend on the batch
+        it ran in or on the number of workers, and the stopping rule is checked after every batch.
+
+        Args:
+            parameters (dict): Values of alpha..theta (each defaults to 1.0).
+            num_agents (int): Number of agents of every replicate.
+            num_steps (int): Number of simulation steps of every replicate.
+            initial_believing_agents (int): Number of agents initially believing in disinformation.
+            selected_social_platforms (list of SocialPlatform): Social platforms of the agents.
+            engine (str): Simulation engine of the replicates, see DisinformationModel.
+            seed (int): Seed of the first replicate.
+            outputs (tuple of str): Outputs that must reach their tolerance, a subset of ENSEMBLE_OUTPUTS.
+            tolerance (float or dict): Maximum confidence-interval half-width, either one value for every
+                output or a dict keyed by output name; DEFAULT_TOLERANCES fills in missing outputs.
+            confidence (float): Level of the confidence intervals.
+            batch_size (int): Number of replicates launched together.
+            min_replicates (int): Replicates run before the stopping rule is first checked.
+            max_replicates (int): Replicate budget.
+            max_workers (int): Number of worker processes; 1 runs the replicates in this process.
+        """
+        unknown = set(outputs) - set(ENSEMBLE_OUTPUTS)
+        if unknown:
+            raise ValueError(f"Unknown outputs: {', '.join(sorted(unknown))}.")
+        if not outputs:
+            raise ValueError("At least one output is required.")
+        if min_replicates < 2:
+            raise ValueError("min_replicates must be at least 2.")
+        if max_replicates < min_replicates:
+            raise ValueError("max_replicates cannot be less than min_replicates.")
+
+        self.parameters = {name: 1.0 for name in PARAMETER_NAMES}
+        self.parameters.update(parameters or {})
+        self.num_agents = num_agents
+        self.num_steps = num_steps
+        self.initial_believing_agents = initial_believing_agents
+        self.selected_social_platforms = selected_social_platforms
+        self.engine = engine
+        self.seed = seed
+        self.outputs = tuple(outputs)
+        if isinstance(tolerance, dict):
+            self.tolerances = {**DEFAULT_TOLERANCES, **tolerance}
+        elif tolerance is not None:
+            self.tolerances = {output: float(tolerance) for output in ENSEMBLE_OUTPUTS}
+        else:
+            self.tolerances = dict(DEFAULT_TOLERANCES)
+        self.confidence = confidence
+        self.batch_size = batch_size
+        self.min_replicates = min_replicates
+        self.max_replicates = max_replicates
+        self.max_workers = max_workers
+
+    def _batch_arguments(self, first, count):
+        return [(self.parameters, self.num_agents, self.num_steps, self.initial_believing_agents,
+                 self.selected_social_platforms, self.engine, self.seed + replicate)
+                for replicate in range(first, first + count)]
+
+    def summarize(self, samples):
+        """
+        Computes the mean, standard deviation and confidence interval of every output.
+
+        Args:
+            samples (np.ndarray): Outputs of shape (replicates, len(ENSEMBLE_OUTPUTS)).
+
+        Returns:
+            dict: For every output: 'mean', 'std', 'half_width' and 'ci'.
+        """
+        n = len(samples)
+        mean = samples.mean(axis=0)
+        std = samples.std(axis=0, ddof=1) if n > 1 else np.full(len(ENSEMBLE_OUTPUTS), np.inf)
+        quantile = t_quantile(0.5 + self.confidence / 2, max(n - 1, 1))
+        half_width = quantile * std / np.sqrt(n)
+        return {
+            output: {
+                'mean': float(mean[i]),
+                'std': float(std[i]),
+                'half_width': float(half_width[i]),
+                'ci': (float(mean[i] - half_width[i]), float(mean[i] + half_width[i])),
+            }
+            for i, output in enumerate(ENSEMBLE_OUTPUTS)
+        }
+
+    def is_converged(self, summary):
+        """
+        Checks whether every chosen output has reached its tolerance.
+        """
+        return all(summary[output]['half_width'] <= self.tolerances[output] for output in self.outputs)
+
+    def run(self):
+        """
+        Runs batches of replicates until the stopping rule is met or max_replicates have run.
+
+        Returns:
+            dict: 'replicates', 'converged', 'summary' (see summarize) and 'samples', the outputs of
+            every replicate with shape (replicates, len(ENSEMBLE_OUTPUTS)).
+        """
+        executor = None if self.max_workers == 1 else ProcessPoolExecutor(max_workers=self.max_workers)
+        samples = np.empty((0, len(ENSEMBLE_OUTPUTS)))
+        converged = False
+        try:
+            while len(samples) < self.max_replicates:
+                # The first batch is enlarged to min_replicates so the first check has enough samples
+                count = max(self.batch_size, self.min_replicates - len(samples))
+                count = min(count, self.max_replicates - len(samples))
+                arguments = self._batch_arguments(len(samples), count)
+                if executor is None:
+                    batch = [simulate_outputs(*replicate_arguments) for replicate_arguments in arguments]
+                else:
+                    batch = list(executor.map(simulate_outputs, *zip(*arguments)))
+                samples = np.vstack([samples, batch])
+
+                summary = self.summarize(samples)
+                logging.info(f"Ensemble: {len(samples)} replicates, half-widths "
+                             + ", ".join(f"{output}={summary[output]['half_width']:.4g}" for output in self.outputs))
+                if len(samples) >= self.min_replicates and self.is_converged(summary):
+                    converged = True
+                    break
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        if not converged:
+            logging.warning(f"Ensemble stopped at the budget of {self.max_replicates} replicates before "
+                            f"reaching the tolerances.")
+        return {
+            'replicates': len(samples),
+            'converged': converged,
+            'summary': self.summarize(samples),
+            'samples': samples,
+        }
@@ -0,0 +1,264 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from enums.State import State
+from models.DisinformationModel import DisinformationModel, PARAMETER_NAMES
+from utils.StateCounter import StateCounter
+
+# Nelder-Mead coefficients: reflection, expansion, contraction, shrink
+REFLECTION = 1.0
+EXPANSION = 2.0
+CONTRACTION = 0.5
+SHRINK = 0.5
+
+# Floor of the loss scale of the relative stopping tolerance, so a zero best loss still stops
+LOSS_FLOOR = 1e-12
+
+
+def simulate_shares(parameters, num_agents, num_steps, initial_believing_agents, selected_social_platforms, seed):
+    """
+    Runs one model and returns the share of agents in each state per step.
+    Defined at module level so that it can be sent to worker processes.
+
+    Args:
+        parameters (dict): Values of alpha, beta, gamma, delta and theta.
+        num_agents (int): Number of agents.
+        num_steps (int): Number of simulation steps.
+        initial_believing_agents (int): Number of agents initially believing in disinformation.
+        selected_social_platforms (list of SocialPlatform): Social platforms of the agents.
+        seed (int): Seed of the run.
+
+    Returns:
+        np.ndarray: Array of shape (num_steps + 1, len(State)) with state shares.
+    """
+    model = DisinformationModel(
+        N=num_agents,
+        initial_believing_agents=initial_believing_agents,
+        selected_social_platforms=selected_social_platforms,
+        seed=seed,
+        **parameters
+    )
+    state_counter = StateCounter(model)
+    state_counter.record_history()
+    for _ in range(num_steps):
+        model.step()
+        state_counter.record_history()
+
+    history = state_counter.get_history()
+    return np.column_stack([history[state] for state in State]) / max(num_agents, 1)
+
+
+class Calibrator:
+    def __init__(self, observed, num_agents=1000, initial_believing_agents=50, selected_social_platforms=None,
+                 seeds=(0, 1, 2), parameter_names=PARAMETER_NAMES, fixed_parameters=None, bounds=(0.0, 1.0),
+                 max_workers=None):
+        """
+        Initializes the Calibrator, which fits model parameters to observed state curves.
+
+        Every candidate parameter set is simulated with the same seeds (common random numbers),
+        so differences between candidates are not drowned in simulation noise. Candidates of one
+        iteration are evaluated together in a process pool and every evaluation is cached.
+
+        Args:
+            observed (dict): Keys are states, values are sequences with the observed share of agents
+                in that state at every step, starting with step 0.
+            num_agents (int): Number of agents of the simulated models.
+            initial_believing_agents (int): Number of agents initially believing in disinformation.
+            selected_social_platforms (list of SocialPlatform): Social platforms of the agents.
+            seeds (tuple of int): Common seeds; the loss is computed on the mean curve over these runs.
+            parameter_names (tuple of str): Parameters to fit.
+            fixed_parameters (dict): Values of the parameters that are not fitted (default 1.0).
+            bounds (tuple): Lower and upper bound of every fitted parameter.
+            max_workers (int): Number of worker processes; 1 evaluates in the current process.
+        """
+        if not observed:
+            raise ValueError("At least one observed state curve is required.")
+        unknown = set(parameter_names) - set(PARAMETER_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}.")
+
+        self.observed = {state: np.asarray(curve, dtype=float) for state, curve in observed.items()}
+        lengths = {len(curve) for curve in self.observed.values()}
+        if len(lengths) != 1:
+            raise ValueError("All observed curves must have the same length.")
+        self.num_steps = lengths.pop() - 1
+
+        self.num_agents = num_agents
+        self.initial_believing_agents = initial_believing_agents
+        self.selected_social_platforms = selected_social_platforms
+        self.seeds = tuple(seeds)
+        self.parameter_names = tuple(parameter_names)
+        self.fixed_parameters = {name: 1.0 for name in PARAMETER_NAMES if name not in self.parameter_names}
+        self.fixed_parameters.update(fixed_parameters or {})
+        self.lower, self.upper = bounds
+        self.max_workers = max_workers
+
+        self.cache = {}
+        self.num_simulations = 0
+
+    def _key(self, point):
+        return tuple(np.round(np.clip(point, self.lower, self.upper), 10))
+
+    def _to_parameters(self, key):
+        parameters = dict(self.fixed_parameters)
+        parameters.update(zip(self.parameter_names, key))
+        return parameters
+
+    def _loss(self, runs):
+        mean_shares = np.mean(runs, axis=0)
+        return float(sum(np.sum((mean_shares[:, state.value] - curve) ** 2)
+                         for state, curve in self.observed.items()))
+
+    def evaluate_batch(self, points, executor=None):
+        """
+        Evaluates the loss of many candidate parameter sets at once.
+
+        Args:
+            points (list of np.ndarray): Candidate values of the fitted parameters.
+            executor (Executor): Pool used to run the simulations; None runs them in this process.
+
+        Returns:
+            np.ndarray: Sum of squared differences between mean simulated and observed shares.
+        """
+        keys = [self._key(point) for point in points]
+        pending = list(dict.fromkeys(key for key in keys if key not in self.cache))
+
+        jobs = [(key, seed) for key in pending for seed in self.seeds]
+        args = [(self._to_parameters(key), self.num_agents, self.num_steps, self.initial_believing_agents,
+                 self.selected_social_platforms, seed) for key, seed in jobs]
+        if executor is None:
+            results = [simulate_shares(*job_args) for job_args in args]
+        else:
+            results = list(executor.map(simulate_shares, *zip(*args))) if args else []
+        self.num_simulations += len(results)
+
+        runs = {key: [] for key in pending}
+        for (key, _), shares in zip(jobs, results):
+            runs[key].append(shares)
+        for key in pending:
+            self.cache[key] = self._loss(runs[key])
+
+        return np.array([self.cache[key] for key in keys])
+
+    def fit(self, initial=None, initial_step=0.1, max_iterations=200, tolerance=1e-4, simplex_tolerance=1e-3,
+            hessian_step=0.02):
+        """
+        Fits the parameters with a batched Nelder-Mead search and estimates their uncertainty.
+
+        Each iteration evaluates reflection, expansion and both contractions in a single batch, so
+        the pool is kept busy instead of evaluating one candidate at a time.
+
+        Args:
+            initial (dict): Starting values of the fitted parameters (default: middle of the bounds).
+            initial_step (float): Size of the initial simplex.
+            max_iterations (int): Maximum number of Nelder-Mead iterations.
+            tolerance (float): Largest loss spread over the simplex at which the search stops, relative
+                to the best loss.
+            simplex_tolerance (float): Largest distance of a vertex from the best one at which the
+                search stops; both tolerances must be met.
+            hessian_step (float): Finite-difference step used for the uncertainty estimate.
+
+        Returns:
+            dict: 'parameters', 'standard_errors', 'covariance', 'loss', 'iterations' and 'simulations'.
+        """
+        start = np.array([(initial or {}).get(name, (self.lower + self.upper) / 2) for name in self.parameter_names],
+                         dtype=float)
+        dimension = len(start)
+
+        executor = None if self.max_workers == 1 else ProcessPoolExecutor(max_workers=self.max_workers)
+        try:
+            simplex = [start] + [start + initial_step * np.eye(dimension)[i] for i in range(dimension)]
+            simplex = [np.clip(point, self.lower, self.upper) for point in simplex]
+            losses = self.evaluate_batch(simplex, executor)
+
+            iteration = 0
+            for iteration in range(1, max_iterations + 1):
+                order = np.argsort(losses)
+                simplex = [simplex[i] for i in order]
+                losses = losses[order]
+                diameter = max(np.max(np.abs(point - simplex[0])) for point in simplex[1:])
+                if (losses[-1] - losses[0] <= tolerance * max(abs(losses[0]), LOSS_FLOOR)
+                        and diameter <= simplex_tolerance):
+                    break
+
+                centroid = np.mean(simplex[:-1], axis=0)
+                worst = simplex[-1]
+                candidates = [np.clip(centroid + coefficient * (worst - centroid), self.lower, self.upper)
+                              for coefficient in (-REFLECTION, -EXPANSION, -CONTRACTION, CONTRACTION)]
+                reflected, expanded, outside, inside = self.evaluate_batch(candidates, executor)
+
+                if reflected < losses[0]:
+                    replacement = (candidates[1], expanded) if expanded < reflected else (candidates[0], reflected)
+                elif reflected < losses[-2]:
+                    replacement = (candidates[0], reflected)
+                elif reflected < losses[-1] and outside <= reflected:
+                    replacement = (candidates[2], outside)
+                elif inside < losses[-1]:
+                    replacement = (candidates[3], inside)
+                else:
+                    replacement = None
+
+                if replacement is not None:
+                    simplex[-1], losses[-1] = replacement
+                else:
+                    best = simplex[0]
+                    simplex = [best] + [best + SHRINK * (point - best) for point in simplex[1:]]
+                    losses = np.concatenate([losses[:1], self.evaluate_batch(simplex[1:], executor)])
+
+            best_index = int(np.argmin(losses))
+            best, best_loss = simplex[best_index], float(losses[best_index])
+            covariance = self._estimate_covariance(best, hessian_step, executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        standard_errors = np.sqrt(np.where(np.diag(covariance) > 0, np.diag(covariance), np.nan))
+        logging.info(f"Calibration finished after {iteration} iterations and {self.num_simulations} simulations "
+                     f"(loss={best_loss:.6g}).")
+        return {
+            'parameters': dict(zip(self.parameter_names, best.tolist())),
+            'standard_errors': dict(zip(self.parameter_names, standard_errors.tolist())),
+            'covariance': covariance,
+            'loss': best_loss,
+            'iterations': iteration,
+            'simulations': self.num_simulations,
+        }
+
+    def _estimate_covariance(self, best, step, executor):
+        """
+        Estimates the parameter covariance from a finite-difference Hessian of the loss at the optimum,
+        using the Gauss-Newton approximation cov = 2 * s^2 * H^-1 with s^2 the residual variance.
+
+        Args:
+            best (np.ndarray): Fitted parameter values.
+            step (float): Finite-difference step.
+            executor (Executor): Pool used to run the simulations.
+
+        Returns:
+            np.ndarray: Covariance matrix of the fitted parameters.
+        """
+        dimension = len(best)
+        # Keep every stencil point inside the bounds so no difference is distorted by clipping
+        center = np.clip(best, self.lower + step, self.upper - step)
+        unit = np.eye(dimension) * step
+        offsets = [np.zeros(dimension)]
+        for i in range(dimension):
+            offsets += [unit[i], -unit[i]]
+            for j in range(i + 1, dimension):
+                offsets += [unit[i] + unit[j], unit[i] - unit[j], -unit[i] + unit[j], -unit[i] - unit[j]]
+        values = iter(self.evaluate_batch([center + offset for offset in offsets], executor))
+        best_loss = next(values)
+
+        hessian = np.zeros((dimension, dimension))
+        for i in range(dimension):
+            plus, minus = next(values), next(values)
+            hessian[i, i] = (plus - 2 * best_loss + minus) / step ** 2
+            for j in range(i + 1, dimension):
+                pp, pm, mp, mm = next(values), next(values), next(values), next(values)
+                hessian[i, j] = hessian[j, i] = (pp - pm - mp + mm) / (4 * step ** 2)
+
+        num_observations = sum(len(curve) for curve in self.observed.values())
+        residual_variance = best_loss / max(num_observations - dimension, 1)
+        return 2 * residual_variance * np.linalg.pinv(hessian)
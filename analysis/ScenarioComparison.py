@@ -0,0 +1,153 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analysis.AdaptiveEnsemble import ENSEMBLE_OUTPUTS, model_outputs, t_quantile
+from models.DisinformationModel import DisinformationModel
+from models.Population import Population
+from utils.PopulationCache import synthesize_seeded
+
+
+def simulate_pair(baseline, alternative, seed, antithetic):
+    """
+    Runs both scenarios with common random numbers and reduces every run to the ensemble outputs.
+    Defined at module level so that it can be sent to worker processes.
+
+    Args:
+        baseline (Scenario): The first scenario.
+        alternative (Scenario): The second scenario.
+        seed (int): Seed shared by every run of the replicate.
+        antithetic (bool): Also run both scenarios with the antithetic draws of the seed.
+
+    Returns:
+        np.ndarray: Outputs of shape (draw sets, 2, len(ENSEMBLE_OUTPUTS)); draw sets are the plain
+        draws and, if antithetic, their complements.
+    """
+    populations = {}
+    outputs = []
+    for antithetic_draws in ((False, True) if antithetic else (False,)):
+        runs = []
+        for scenario in (baseline, alternative):
+            platforms = (tuple(scenario.platforms), scenario.population)
+            # Scenarios on the same platforms share the very same agents
+            if platforms not in populations:
+                if scenario.population == 'stratified':
+                    populations[platforms] = Population.stratified(scenario.agents, scenario.platforms or None)
+                else:
+                    populations[platforms] = synthesize_seeded(scenario.agents, scenario.platforms or None, seed)
+            model = DisinformationModel(
+                N=scenario.agents,
+                initial_believing_agents=scenario.initial_believing,
+                selected_social_platforms=scenario.platforms or None,
+                seed=seed,
+                engine='array',
+                population=populations[platforms],
+                schedule=scenario.schedule,
+                antithetic=antithetic_draws,
+                **scenario.parameters
+            )
+            runs.append(model_outputs(model, scenario.steps))
+        outputs.append(runs)
+    return np.array(outputs)
+
+
+class ScenarioComparison:
+    def __init__(self, baseline, alternative, seed=0, antithetic=False, confidence=0.95, max_workers=1):
+        """
+        Initializes the ScenarioComparison, which estimates the difference of the ensemble outputs
+        between two scenarios with variance reduction.
+
+        Both scenarios of a replicate run with common random numbers: the same seed, the same
+        population when their platforms match, the same initially exposed agents and, on the array
+        engine, the same uint32 draw for every agent at every step. The difference is then driven by
+        the scenario change rather than by independent noise. With antithetic pairs every replicate is
+        also run with the complemented draws and the two are averaged.
+
+        Args:
+            baseline (Scenario): The first scenario; its seed and engine are ignored.
+            alternative (Scenario): The second scenario, with the same number of agents.
+            seed (int): Seed of the first replicate; replicate i uses seed + i.
+            antithetic (bool): Run every replicate as an antithetic pair.
+            confidence (float): Level of the confidence intervals.
+            max_workers (int): Number of worker processes; 1 runs the replicates in this process.
+        """
+        if baseline.agents != alternative.agents:
+            raise ValueError("Compared scenarios must have the same number of agents.")
+        self.baseline = baseline
+        self.alternative = alternative
+        self.seed = seed
+        self.antithetic = antithetic
+        self.confidence = confidence
+        self.max_workers = max_workers
+
+    def run_replicates(self, num_replicates):
+        """
+        Runs replicates of both scenarios.
+
+        Args:
+            num_replicates (int): Number of replicates.
+
+        Returns:
+            np.ndarray: Outputs of shape (num_replicates, draw sets, 2, len(ENSEMBLE_OUTPUTS)).
+        """
+        arguments = [(self.baseline, self.alternative, self.seed + replicate, self.antithetic)
+                     for replicate in range(num_replicates)]
+        if self.max_workers == 1:
+            return np.array([simulate_pair(*pair_arguments) for pair_arguments in arguments])
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            return np.array(list(executor.map(simulate_pair, *zip(*arguments))))
+
+    def compare(self, num_replicates=20):
+        """
+        Estimates alternative - baseline for every output.
+
+        The variance reduction is the variance an estimate from the same number of independent runs
+        would have, (var(baseline) + var(alternative)) / runs per replicate, divided by the variance of
+        the paired difference. The marginal variances are estimated from the paired runs themselves,
+        because common and antithetic draws leave the distribution of every single run unchanged.
+
+        Args:
+            num_replicates (int): Number of replicates (each costs 2, or 4 with antithetic pairs, runs).
+
+        Returns:
+            dict: 'replicates', 'runs' and 'outputs', which holds for every output the 'baseline',
+            'alternative' and 'difference' means, the difference's 'half_width' and 'ci', and its
+            'variance_reduction'.
+        """
+        if num_replicates < 2:
+            raise ValueError("At least two replicates are required.")
+        outputs = self.run_replicates(num_replicates)
+        draw_sets = outputs.shape[1]
+
+        # One paired difference per replicate, averaged over its antithetic twin
+        differences = (outputs[:, :, 1] - outputs[:, :, 0]).mean(axis=1)
+        difference_variance = differences.var(axis=0, ddof=1)
+        runs = outputs.reshape(-1, 2, len(ENSEMBLE_OUTPUTS))
+        independent_variance = (runs[:, 0].var(axis=0, ddof=1) + runs[:, 1].var(axis=0, ddof=1)) / draw_sets
+
+        quantile = t_quantile(0.5 + self.confidence / 2, num_replicates - 1)
+        half_width = quantile * np.sqrt(difference_variance / num_replicates)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            reduction = independent_variance / difference_variance
+        mean_difference = differences.mean(axis=0)
+
+        summary = {
+            output: {
+                'baseline': float(runs[:, 0, i].mean()),
+                'alternative': float(runs[:, 1, i].mean()),
+                'difference': float(mean_difference[i]),
+                'half_width': float(half_width[i]),
+                'ci': (float(mean_difference[i] - half_width[i]), float(mean_difference[i] + half_width[i])),
+                'variance_reduction': float(reduction[i]),
+            }
+            for i, output in enumerate(ENSEMBLE_OUTPUTS)
+        }
+        reductions = ", ".join(f"{output}={summary[output]['variance_reduction']:.3g}x" for output in ENSEMBLE_OUTPUTS)
+        logging.info(f"Compared scenarios with {num_replicates} replicates ({outputs[..., 0].size} runs); "
+                     f"variance reduction {reductions}.")
+        return {
+            'replicates': num_replicates,
+            'runs': outputs[..., 0].size,
+            'outputs': summary,
+        }
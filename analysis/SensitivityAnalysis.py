@@ -0,0 +1,312 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from enums.State import State
+from models.BatchedDisinformationModel import BatchedDisinformationModel
+from models.DisinformationModel import PARAMETER_NAMES
+
+OUTPUT_NAMES = ('peak_infected', 'final_recovered')
+
+# (name, lower bound, upper bound). Base parameters are named after PARAMETER_NAMES; modifier factors
+# are named '<parameter>.<dimension>' and scale every value of that _define_*_modifiers table.
+DEFAULT_FACTORS = (
+    [(name, 0.0, 1.0) for name in PARAMETER_NAMES]
+    + [(f"{name}.{dimension}", 0.5, 1.5) for name in PARAMETER_NAMES for dimension in ('age', 'sex', 'education')]
+    + [("alpha.platform", 0.5, 1.5)]
+)
+
+
+def evaluate_block(parameter_sets, modifier_scales, num_agents, num_steps, initial_believing_agents,
+                   selected_social_platforms, seed, stream_keys=None):
+    """
+    Runs a block of scenarios as one batched model and reduces each run to its outputs. Scenarios
+    with the same stream key get the same transition draws, see BatchedDisinformationModel.
+    Defined at module level so that it can be sent to worker processes.
+
+    Returns:
+        np.ndarray: Array of shape (P, len(OUTPUT_NAMES)) with the peak INFECTED share and the final
+        RECOVERED share of every scenario.
+    """
+    model = BatchedDisinformationModel(num_agents, parameter_sets, initial_believing_agents,
+                                       selected_social_platforms, seed=seed, modifier_scales=modifier_scales,
+                                       stream_keys=stream_keys)
+    counts = model.count_states()
+    peak_infected = counts[:, State.INFECTED.value].copy()
+    for _ in range(num_steps):
+        model.step()
+        counts = model.count_states()
+        np.maximum(peak_infected, counts[:, State.INFECTED.value], out=peak_infected)
+    return np.column_stack([peak_infected, counts[:, State.RECOVERED.value]]) / max(model.num_agents, 1)
+
+
+class SensitivityAnalysis:
+    def __init__(self, factors=DEFAULT_FACTORS, num_agents=1000, num_steps=100, initial_believing_agents=50,
+                 selected_social_platforms=None, seed=0, block_size=64, max_workers=1, num_bootstrap=200):
+        """
+        Initializes the SensitivityAnalysis, a Morris and Sobol driver for the model parameters and
+        the demographic modifier tables.
+
+        Samples are evaluated block by block as batched model runs, optionally spread over worker
+        processes. Only two scalar outputs per run are returned and they are folded into running sums,
+        including Poisson-bootstrap replicates, so no trajectory or sample output is kept in memory.
+
+        Args:
+            factors (list of tuple): (name, lower bound, upper bound) of every varied factor.
+            num_agents (int): Number of agents of every run.
+            num_steps (int): Number of simulation steps of every run.
+            initial_believing_agents (int): Number of agents initially believing in disinformation.
+            selected_social_platforms (list of SocialPlatform): Social platforms of the agents.
+            seed (int): Seed of the sampling and of every model run. Every run has the same population
+                and initially exposed agents; the points of one Morris trajectory, and the A, B and AB
+                rows of one Sobol base sample, also share their transition draws (common random numbers).
+            block_size (int): Maximum number of scenarios simulated together in one batched run.
+            max_workers (int): Number of worker processes; 1 evaluates blocks in the current process.
+            num_bootstrap (int): Number of bootstrap replicates for the confidence intervals.
+        """
+        self.factors = list(factors)
+        self.factor_names = [name for name, _, _ in self.factors]
+        known = set(PARAMETER_NAMES) | {name for name, _, _ in DEFAULT_FACTORS}
+        unknown = set(self.factor_names) - known
+        if unknown:
+            raise ValueError(f"Unknown factors: {', '.join(sorted(unknown))}.")
+
+        self.lower = np.array([low for _, low, _ in self.factors])
+        self.upper = np.array([high for _, _, high in self.factors])
+        self.num_agents = num_agents
+        self.num_steps = num_steps
+        self.initial_believing_agents = initial_believing_agents
+        self.selected_social_platforms = selected_social_platforms
+        self.seed = seed
+        self.block_size = block_size
+        self.max_workers = max_workers
+        self.num_bootstrap = num_bootstrap
+        # Sampling and bootstrap use separate streams so results do not depend on how far
+        # the sample generator runs ahead of the aggregation when blocks are evaluated in parallel
+        self.rng = np.random.default_rng(seed)
+        self.bootstrap_rng = np.random.default_rng([seed, 1])
+
+    @property
+    def num_factors(self):
+        return len(self.factors)
+
+    def _block_arguments(self, unit_rows, stream_keys):
+        """
+        Converts rows of the unit hypercube and their stream keys into evaluate_block arguments.
+        """
+        values = self.lower + unit_rows * (self.upper - self.lower)
+        parameter_sets = np.ones((len(values), len(PARAMETER_NAMES)))
+        modifier_scales = [{} for _ in values]
+        for column, name in enumerate(self.factor_names):
+            if name in PARAMETER_NAMES:
+                parameter_sets[:, PARAMETER_NAMES.index(name)] = values[:, column]
+            else:
+                key = tuple(name.split('.'))
+                for row, scales in enumerate(modifier_scales):
+                    scales[key] = values[row, column]
+        return (parameter_sets, modifier_scales, self.num_agents, self.num_steps, self.initial_believing_agents,
+                self.selected_social_platforms, self.seed, stream_keys)
+
+    def _evaluate_stream(self, blocks):
+        """
+        Evaluates blocks of unit-hypercube rows and yields their outputs block by block, in order.
+
+        Args:
+            blocks (iterable of tuple): Blocks of rows, each with the stream key of every row.
+
+        Yields:
+            np.ndarray: Outputs of shape (rows, len(OUTPUT_NAMES)) of each block.
+        """
+        if self.max_workers == 1:
+            for block in blocks:
+                yield evaluate_block(*self._block_arguments(*block))
+            return
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = []
+            for block in blocks:
+                pending.append(executor.submit(evaluate_block, *self._block_arguments(*block)))
+                # Bound the number of blocks in flight so memory does not grow with the sample size
+                if len(pending) >= 2 * (self.max_workers or 1):
+                    yield pending.pop(0).result()
+            for future in pending:
+                yield future.result()
+
+    def _bootstrap_weights(self, count):
+        """
+        Draws Poisson(1) bootstrap weights, the streaming equivalent of resampling with replacement.
+
+        Returns:
+            np.ndarray: Weights of shape (num_bootstrap, count).
+        """
+        return self.bootstrap_rng.poisson(1.0, size=(self.num_bootstrap, count))
+
+    def morris(self, num_trajectories=20, num_levels=4, confidence=0.95):
+        """
+        Computes Morris elementary-effect statistics.
+
+        Args:
+            num_trajectories (int): Number of one-at-a-time trajectories (each costs num_factors + 1 runs).
+            num_levels (int): Number of grid levels per factor.
+            confidence (float): Level of the bootstrap confidence interval of mu_star.
+
+        Returns:
+            dict: For every output, for every factor: 'mu', 'mu_star', 'sigma' and 'mu_star_ci'.
+        """
+        k = self.num_factors
+        delta = num_levels / (2 * (num_levels - 1))
+        trajectories_per_block = max(1, self.block_size // (k + 1))
+        # Blocks generated but not yet aggregated; bounded by the number of blocks in flight
+        row_blocks = []
+
+        def blocks():
+            # Every point of a trajectory uses the trajectory's stream, so each elementary effect compares
+            # two runs with the same draws
+            for first in range(0, num_trajectories, trajectories_per_block):
+                count = min(trajectories_per_block, num_trajectories - first)
+                rows = np.concatenate([self._morris_trajectory(num_levels, delta) for _ in range(count)])
+                row_blocks.append(rows)
+                yield rows, np.repeat(np.arange(first, first + count), k + 1)
+
+        n = 0
+        sums = np.zeros((len(OUTPUT_NAMES), k))
+        abs_sums = np.zeros((len(OUTPUT_NAMES), k))
+        squared_sums = np.zeros((len(OUTPUT_NAMES), k))
+        boot_weights = np.zeros(self.num_bootstrap)
+        boot_abs_sums = np.zeros((self.num_bootstrap, len(OUTPUT_NAMES), k))
+
+        for outputs in self._evaluate_stream(blocks()):
+            rows = row_blocks.pop(0)
+            for start in range(0, len(rows), k + 1):
+                points = rows[start:start + k + 1]
+                values = outputs[start:start + k + 1]
+                steps = np.diff(points, axis=0)
+                factor = np.argmax(np.abs(steps), axis=1)
+                effects = np.zeros((len(OUTPUT_NAMES), k))
+                effects[:, factor] = (np.diff(values, axis=0) / steps[np.arange(k), factor][:, None]).T
+
+                n += 1
+                sums += effects
+                abs_sums += np.abs(effects)
+                squared_sums += effects ** 2
+                weights = self._bootstrap_weights(1)[:, 0]
+                boot_weights += weights
+                boot_abs_sums += weights[:, None, None] * np.abs(effects)
+
+        mu = sums / n
+        mu_star = abs_sums / n
+        sigma = np.sqrt(np.maximum(squared_sums / n - mu ** 2, 0) * n / max(n - 1, 1))
+        boot_mu_star = boot_abs_sums / np.maximum(boot_weights, 1)[:, None, None]
+        low, high = self._percentiles(boot_mu_star, confidence)
+
+        logging.info(f"Morris screening finished with {n} trajectories ({n * (k + 1)} runs).")
+        return {
+            output: {
+                factor: {
+                    'mu': mu[o, i],
+                    'mu_star': mu_star[o, i],
+                    'sigma': sigma[o, i],
+                    'mu_star_ci': (low[o, i], high[o, i]),
+                }
+                for i, factor in enumerate(self.factor_names)
+            }
+            for o, output in enumerate(OUTPUT_NAMES)
+        }
+
+    def _morris_trajectory(self, num_levels, delta):
+        """
+        Generates one Morris trajectory: num_factors + 1 grid points, each moving one factor by +-delta.
+        """
+        k = self.num_factors
+        grid = np.arange(num_levels) / (num_levels - 1)
+        start = self.rng.choice(grid[grid <= 1 - delta + 1e-12], size=k)
+        directions = self.rng.choice([-1.0, 1.0], size=k)
+        # Start from the opposite end of the step so every point stays inside the unit cube
+        point = np.where(directions > 0, start, start + delta)
+        trajectory = [point.copy()]
+        for factor in self.rng.permutation(k):
+            point[factor] += directions[factor] * delta
+            trajectory.append(point.copy())
+        return np.array(trajectory)
+
+    def sobol(self, num_samples=256, confidence=0.95):
+        """
+        Computes first-order and total-order Sobol indices with the Saltelli sampling scheme
+        (Saltelli 2010 estimator for first order, Jansen estimator for total order).
+
+        Args:
+            num_samples (int): Number of base samples (costs num_samples * (num_factors + 2) runs).
+            confidence (float): Level of the bootstrap confidence intervals.
+
+        Returns:
+            dict: For every output, for every factor: 'S1', 'S1_ci', 'ST' and 'ST_ci'.
+        """
+        k = self.num_factors
+        samples_per_block = max(1, self.block_size // (k + 2))
+        sample_blocks = []
+
+        def blocks():
+            # The A, B and AB rows of a base sample use the sample's stream, so the differences of the
+            # estimators compare runs with the same draws
+            for first in range(0, num_samples, samples_per_block):
+                count = min(samples_per_block, num_samples - first)
+                a = self.rng.random((count, k))
+                b = self.rng.random((count, k))
+                ab = np.repeat(a[:, None, :], k, axis=1)
+                ab[:, np.arange(k), np.arange(k)] = b
+                sample_blocks.append(count)
+                keys = np.arange(first, first + count)
+                yield np.concatenate([a, b, ab.reshape(-1, k)]), np.concatenate([keys, keys, np.repeat(keys, k)])
+
+        num_outputs = len(OUTPUT_NAMES)
+        # Running sums for the point estimate (row 0) and every bootstrap replicate (rows 1..B)
+        weight_sums = np.zeros(self.num_bootstrap + 1)
+        mean_sums = np.zeros((self.num_bootstrap + 1, num_outputs))
+        square_sums = np.zeros((self.num_bootstrap + 1, num_outputs))
+        first_sums = np.zeros((self.num_bootstrap + 1, num_outputs, k))
+        total_sums = np.zeros((self.num_bootstrap + 1, num_outputs, k))
+
+        for outputs in self._evaluate_stream(blocks()):
+            count = sample_blocks.pop(0)
+            f_a = outputs[:count]
+            f_b = outputs[count:2 * count]
+            f_ab = outputs[2 * count:].reshape(count, k, num_outputs).transpose(0, 2, 1)
+
+            weights = np.vstack([np.ones(count), self._bootstrap_weights(count)])
+            weight_sums += weights.sum(axis=1)
+            mean_sums += weights @ (f_a + f_b) / 2
+            square_sums += weights @ (f_a ** 2 + f_b ** 2) / 2
+            first_sums += np.einsum('bj,jok->bok', weights, f_b[:, :, None] * (f_ab - f_a[:, :, None]))
+            total_sums += np.einsum('bj,jok->bok', weights, 0.5 * (f_a[:, :, None] - f_ab) ** 2)
+
+        counts = np.maximum(weight_sums, 1)
+        variance = square_sums / counts[:, None] - (mean_sums / counts[:, None]) ** 2
+        variance = np.where(variance > 0, variance, np.nan)[:, :, None]
+        first_order = first_sums / counts[:, None, None] / variance
+        total_order = total_sums / counts[:, None, None] / variance
+
+        s1_low, s1_high = self._percentiles(first_order[1:], confidence)
+        st_low, st_high = self._percentiles(total_order[1:], confidence)
+
+        logging.info(f"Sobol analysis finished with {num_samples} base samples ({num_samples * (k + 2)} runs).")
+        return {
+            output: {
+                factor: {
+                    'S1': first_order[0, o, i],
+                    'S1_ci': (s1_low[o, i], s1_high[o, i]),
+                    'ST': total_order[0, o, i],
+                    'ST_ci': (st_low[o, i], st_high[o, i]),
+                }
+                for i, factor in enumerate(self.factor_names)
+            }
+            for o, output in enumerate(OUTPUT_NAMES)
+        }
+
+    @staticmethod
+    def _percentiles(replicates, confidence):
+        """
+        Gets the percentile bootstrap interval over the first axis of the replicates.
+        """
+        tail = (1 - confidence) / 2 * 100
+        return np.nanpercentile(replicates, tail, axis=0), np.nanpercentile(replicates, 100 - tail, axis=0)
@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class SimulationSpeed(Enum):
+    REAL_TIME = "Real-time"
+    STEPS_PER_SECOND = "Steps per second"
+    AS_FAST_AS_POSSIBLE = "As fast as possible"
@@ -1,16 +1,142 @@
-import tkinter as tk
+import argparse
 import logging
 
-from ui.SimulationApp import SimulationApp
-
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
 def run_model():
+    import tkinter as tk
+    from ui.SimulationApp import SimulationApp
+
     root = tk.Tk()
     SimulationApp(root, num_steps=200, update_frequency=1)
     root.mainloop()
 
 
+def run_headless(args):
+    if args.profile is None:
+        run_scenario(args)
+        return
+
+    from utils.Profiler import Profiler, session_directory
+
+    profiler = Profiler(args.profile or session_directory())
+    profiler.start()
+    try:
+        run_scenario(args, profiler)
+    finally:
+        profiler.stop()
+
+
+def run_scenario(args, profiler=None):
+    from utils.HeadlessRunner import HeadlessRunner, write_history_csv
+    from utils.PopulationCache import DEFAULT_CACHE_DIRECTORY, PopulationCache
+    from utils.Scenario import Scenario
+
+    scenario = Scenario.load(args.scenario) if args.scenario else scenario_from_args(args)
+    population_cache = None
+    if args.population_cache is not None:
+        population_cache = PopulationCache(args.population_cache or DEFAULT_CACHE_DIRECTORY)
+
+    result_cache = result_key = None
+    if args.result_cache is not None:
+        from utils.ResultCache import DEFAULT_CACHE_DIRECTORY as DEFAULT_RESULT_DIRECTORY, ResultCache
+        from utils.StateCounter import StateCounter
+
+        result_cache = ResultCache(args.result_cache or DEFAULT_RESULT_DIRECTORY)
+        result_key = result_cache.key(scenario, args.threads, prebuilt_population=population_cache is not None)
+        cached = result_cache.get(result_key) if result_key is not None else None
+        if cached is not None:
+            logging.info("Loaded the run from the result cache.")
+            write_history_csv(StateCounter.from_arrays(cached), args.output)
+            return
+
+    model = scenario.build_model(population_cache, kernel=args.kernel, threads=args.threads,
+                                 store_directory=args.store, memory_budget=args.memory_budget * 1024 * 1024)
+    if profiler is not None:
+        profiler.snapshot('construction')
+
+    runner = HeadlessRunner(model, scenario.steps)
+    progress_server = None
+    if args.progress_port is not None:
+        from utils.ProgressServer import ProgressServer
+
+        progress_server = ProgressServer(runner.state_counter, port=args.progress_port)
+        runner.progress_server = progress_server
+        progress_server.start()
+
+    try:
+        runner.run()
+        if profiler is not None:
+            profiler.snapshot('run')
+        runner.save_results(args.output)
+        if profiler is not None:
+            profiler.snapshot('export')
+        if result_key is not None:
+            result_cache.put(result_key, runner.state_counter, model.get_state_codes())
+    finally:
+        model.close()
+        if progress_server is not None:
+            progress_server.stop()
+
+
+def scenario_from_args(args):
+    from utils.Scenario import Scenario
+
+    return Scenario(
+        agents=args.agents,
+        initial_believing=args.initial_believing,
+        parameters={name: getattr(args, name) for name in ('alpha', 'beta', 'gamma', 'delta', 'theta')},
+        platforms=args.platform,
+        seed=args.seed,
+        steps=args.steps,
+        engine=args.engine,
+        population=args.population,
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Disinformation spread simulation.")
+    parser.add_argument("--headless", action="store_true", help="Run without the GUI and save results to CSV.")
+    parser.add_argument("--scenario", help="TOML or JSON scenario file; replaces the model options below.")
+    parser.add_argument("--population-cache", nargs="?", const="", default=None, metavar="DIR",
+                        help="Reuse populations of seeded scenarios from DIR (default cache directory if omitted).")
+    parser.add_argument("--result-cache", nargs="?", const="", default=None, metavar="DIR",
+                        help="Reuse the results of completed seeded runs from DIR "
+                             "(default cache directory if omitted).")
+    parser.add_argument("--agents", type=int, default=1000, help="Number of agents.")
+    parser.add_argument("--initial-believing", type=int, default=50, help="Number of initially believing agents.")
+    parser.add_argument("--alpha", type=float, default=1.0)
+    parser.add_argument("--beta", type=float, default=1.0)
+    parser.add_argument("--gamma", type=float, default=1.0)
+    parser.add_argument("--delta", type=float, default=1.0)
+    parser.add_argument("--theta", type=float, default=1.0)
+    parser.add_argument("--platform", nargs="*", help="Social media platform names, e.g. TikTok.")
+    parser.add_argument("--engine", choices=("object", "array"), default="object",
+                        help="'array' keeps agents in compact uint8 columns for very large populations.")
+    parser.add_argument("--population", choices=("sampled", "stratified"), default="sampled",
+                        help="'stratified' gives every demographic cohort its exact quota instead of sampling agents.")
+    parser.add_argument("--kernel", choices=("auto", "numpy", "numba", "numba-parallel"), default="auto",
+                        help="Step kernel of the array engine; the Numba kernels need numba installed.")
+    parser.add_argument("--threads", type=int, default=1, help="Threads of the array engine.")
+    parser.add_argument("--store", metavar="DIR",
+                        help="Keep array engine agents in memory-mapped files in DIR, for populations beyond RAM.")
+    parser.add_argument("--memory-budget", type=int, default=256, metavar="MB",
+                        help="Memory for the agents stepped at a time with --store.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the run.")
+    parser.add_argument("--steps", type=int, default=200, help="Number of simulation steps.")
+    parser.add_argument("--output", default="results_simulation_steps.csv", help="CSV file for headless results.")
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="DIR",
+                        help="Write a CPU profile, sampled stacks and memory snapshots of the run to DIR "
+                             "(a new directory under profiles/ if omitted).")
+    parser.add_argument("--progress-port", type=int, default=None,
+                        help="Serve live progress on http://127.0.0.1:PORT/events (0 picks a free port).")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    run_model()
+    arguments = parse_args()
+    if arguments.headless:
+        run_headless(arguments)
+    else:
+        run_model()
@@ -0,0 +1,128 @@
+import logging
+
+import numpy as np
+
+from enums.State import State
+from models.DisinformationModel import (DisinformationModel, MODIFIER_NOISE_STD, PARAMETER_NAMES,
+                                        TRANSITION_SCALES)
+from models.Population import Population
+from models.TransitionKernel import apply_transitions, transition_thresholds
+from utils.RandomPool import RandomPool
+
+
+class BatchedDisinformationModel:
+    def __init__(self, N, parameter_sets, initial_believing_agents=0, selected_social_platforms=None, seed=None,
+                 population=None, modifier_scales=None, stream_keys=None):
+        """
+        Initializes the Batched Disinformation Model, which advances P parameter sets over one
+        shared population as a single (P x N) state array.
+
+        Transition probabilities are precomputed as uint32 thresholds per (scenario, state, cohort),
+        so a step is one block of uint32 draws and a handful of vectorized operations regardless of P.
+
+        Args:
+            N (int): Number of agents.
+            parameter_sets (list of dict or np.ndarray): P parameter sets, either dicts with alpha..theta
+                or an array of shape (P, 5) in the order of PARAMETER_NAMES.
+            initial_believing_agents (int): Number of agents initially believing in disinformation;
+                the same agents are exposed in every scenario.
+            selected_social_platforms (list of SocialPlatform): List of social platforms to assign to agents.
+            seed (int): Optional seed of the random number generator.
+            population (Population): Optional prebuilt population to share; synthesized when omitted.
+            modifier_scales (list of dict): Optional per-scenario modifier scales keyed by
+                (parameter name, dimension), see DisinformationModel.get_modifier_table.
+            stream_keys (list of int): Optional key of every parameter set's own stream of transition
+                draws, derived from the seed; parameter sets with the same key get the same draws wherever
+                they are in the batch (common random numbers). When omitted, the transition draws of the
+                whole batch come from one stream.
+        """
+        self.random_pool = RandomPool(seed)
+        self.rng = self.random_pool.rng
+        self.selected_social_platforms = selected_social_platforms or None
+        self.population = population if population is not None else Population.synthesize(
+            N, self.selected_social_platforms, self.rng)
+        self.num_agents = self.population.num_agents
+
+        if len(parameter_sets) and isinstance(parameter_sets[0], dict):
+            parameter_sets = [[parameters[name] for name in PARAMETER_NAMES] for parameters in parameter_sets]
+        self.parameters = np.asarray(parameter_sets, dtype=float).reshape(-1, len(PARAMETER_NAMES))
+        self.num_scenarios = len(self.parameters)
+
+        if modifier_scales is None:
+            modifiers = DisinformationModel.build_modifier_table(self.selected_social_platforms)
+            self.modifier_tables = np.broadcast_to(modifiers, (self.num_scenarios,) + modifiers.shape)
+        else:
+            if len(modifier_scales) != self.num_scenarios:
+                raise ValueError("modifier_scales must have one entry per parameter set.")
+            self.modifier_tables = np.stack([
+                DisinformationModel.build_modifier_table(self.selected_social_platforms, scales)
+                for scales in modifier_scales
+            ])
+        self.update_probabilities()
+
+        self.stream_pools = None
+        if stream_keys is not None:
+            if len(stream_keys) != self.num_scenarios:
+                raise ValueError("stream_keys must have one entry per parameter set.")
+            # Keyed children of the seed's sequence; a block per step avoids generating unused draws
+            entropy = np.random.SeedSequence(seed).entropy
+            self.stream_pools = [RandomPool(np.random.SeedSequence(entropy, spawn_key=(int(key),)),
+                                            block_size=self.num_agents)
+                                 for key in stream_keys]
+
+        self.states = np.full((self.num_scenarios, self.num_agents), State.SUSCEPTIBLE.value, dtype=np.uint8)
+        initial_believing_agents = min(initial_believing_agents, self.num_agents)
+        believing = self.rng.choice(self.num_agents, size=initial_believing_agents, replace=False)
+        self.states[:, believing] = State.EXPOSED.value
+
+        logging.info(f"Initialized batched model with {self.num_scenarios} parameter sets x {self.num_agents} agents, "
+                     f"{initial_believing_agents} initially EXPOSED.")
+
+    def update_probabilities(self):
+        """
+        Recomputes the (P x parameter x cohort) tables of mean transition probabilities, the
+        per-scenario factors applied to the modifier noise and the decision thresholds derived from them.
+        """
+        scaled = self.parameters * np.asarray(TRANSITION_SCALES)
+        self.probabilities = scaled[:, :, None] * self.modifier_tables
+        self.noise_scales = scaled * MODIFIER_NOISE_STD
+        self.first_thresholds, self.second_thresholds = transition_thresholds(self.probabilities, self.noise_scales)
+
+    def step(self):
+        """
+        Executes one simulation step for every parameter set.
+        """
+        if self.stream_pools is None:
+            draws = self.random_pool.raw_uint32(self.states.size)
+        else:
+            draws = np.empty(self.states.shape, dtype=np.uint32)
+            for row, pool in zip(draws, self.stream_pools):
+                row[:] = pool.raw_uint32(self.num_agents)
+        apply_transitions(self.states, self.population.cohort_codes, draws,
+                          self.first_thresholds, self.second_thresholds)
+
+    def count_states(self):
+        """
+        Counts the number of agents in each state for every parameter set.
+
+        Returns:
+            np.ndarray: Array of shape (P, len(State)).
+        """
+        return np.stack([np.count_nonzero(self.states == state.value, axis=1) for state in State], axis=1)
+
+    def run(self, num_steps):
+        """
+        Advances every parameter set by num_steps steps.
+
+        Args:
+            num_steps (int): Number of steps.
+
+        Returns:
+            np.ndarray: State counts of shape (num_steps + 1, P, len(State)), starting with the initial state.
+        """
+        history = np.empty((num_steps + 1, self.num_scenarios, len(State)), dtype=np.int64)
+        history[0] = self.count_states()
+        for step in range(1, num_steps + 1):
+            self.step()
+            history[step] = self.count_states()
+        return history
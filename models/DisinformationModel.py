@@ -1,6 +1,12 @@
 import random
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
+
+from agents.AgentStore import STATES, AgentStore
+from agents.CohortProfile import CohortProfile
+from agents.MappedAgentStore import DEFAULT_MEMORY_BUDGET, MappedAgentStore
 from agents.UserAgent import UserAgent
 from enums.SocialPlatform import SocialPlatform
 from enums.State import State
@@ -10,10 +16,31 @@ from enums.distributions.SexDistribution import SexDistribution
 from enums.groups.AgeGroup import AgeGroup
 from enums.groups.EducationGroup import EducationGroup
 from enums.groups.SexGroup import SexGroup
+from models.Population import (AGE_GROUPS, COHORT_SHAPE, EDUCATION_GROUPS, NUM_COHORTS, SEX_GROUPS, SOCIAL_PLATFORMS,
+                               Population)
+from models.TransitionKernel import apply_transitions, apply_transitions_fused, resolve_kernel, transition_probabilities
+from utils.RandomPool import RandomPool, probability_thresholds
+
+PARAMETER_NAMES = ('alpha', 'beta', 'gamma', 'delta', 'theta')
+
+# Factors applied in UserAgent to turn base parameter x modifier into a transition probability,
+# in the order of PARAMETER_NAMES
+TRANSITION_SCALES = (0.05, 0.1, 0.05, 0.02, 0.01)
+
+# Standard deviation of the Gaussian noise added to every modifier draw
+MODIFIER_NOISE_STD = 0.001
+
+# 'object' steps one UserAgent object per agent, 'array' steps the uint8 columns of an AgentStore
+ENGINES = ('object', 'array')
+
+# Number of agents advanced at a time by the array engine, bounding the temporaries of a step
+STEP_CHUNK_SIZE = 1 << 22
 
 
 class DisinformationModel:
-    def __init__(self, N, alpha, beta, gamma, delta, theta, initial_believing_agents=0, selected_social_platforms=None):
+    def __init__(self, N, alpha, beta, gamma, delta, theta, initial_believing_agents=0, selected_social_platforms=None,
+                 seed=None, engine='object', population=None, schedule=None, kernel='auto', threads=1,
+                 antithetic=False, store_directory=None, memory_budget=DEFAULT_MEMORY_BUDGET):
         """
         Initializes the Disinformation Model.
 
@@ -26,8 +53,49 @@ class DisinformationModel:
             theta (float): Base probability of re-exposure.
             initial_believing_agents (int): Number of agents initially believing in disinformation.
             selected_social_platforms (list of SocialPlatform): List of social platforms to assign to agents.
+            seed (int): Optional seed of the random number generator, for reproducible runs.
+            engine (str): 'object' to step UserAgent objects, or 'array' to keep agents in a compact
+                AgentStore (six bytes per agent) and step them with vectorized draws.
+            population (Population): Optional prebuilt demographics of the agents, e.g. loaded from a
+                PopulationCache; sampled from the platform distributions when omitted.
+            schedule (ParameterSchedule): Optional compiled per-step values of alpha..theta.
+            kernel (str): Step kernel of the array engine, one of KERNELS; the Numba kernels fuse
+                the whole step into one loop and fall back to NumPy when Numba is not installed;
+                'numba-parallel' runs as 'numba' when threads > 1.
+            threads (int): Number of threads of the array engine. Agents are split into one contiguous
+                chunk per thread, each with its own random stream, so results are deterministic for a
+                given seed and number of threads.
+            antithetic (bool): Use the complement 1 - u of every transition draw u of the array engine, so
+                that a run and its antithetic twin with the same seed are negatively correlated.
+            store_directory (str): Optional directory of a MappedAgentStore for the array engine, which keeps
+                the agents in memory-mapped files instead of RAM; a seeded run gives the same states.
+            memory_budget (int): Bytes available to the chunks of a mapped store that are stepped at a time.
         """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r}; expected one of: {', '.join(ENGINES)}.")
+        if population is not None and population.num_agents != N:
+            raise ValueError(f"The population has {population.num_agents} agents, expected {N}.")
+        self.engine = engine
+        if threads < 1 or (threads > 1 and engine != 'array'):
+            raise ValueError("threads must be 1, or more than 1 with the array engine.")
+        self.kernel = resolve_kernel(kernel, threads) if engine == 'array' else None
+        self.threads = threads
+        self._executor = None
+        if antithetic and engine != 'array':
+            raise ValueError("Antithetic draws need the array engine.")
+        self.antithetic = antithetic
+        if store_directory is not None and engine != 'array':
+            raise ValueError("A mapped agent store needs the array engine.")
+        self.store_directory = store_directory
+        self.memory_budget = memory_budget
+
+        if seed is not None:
+            random.seed(seed)
+        self.seed = seed
+
         self.num_agents = N
+        self.schedule = schedule
+        self.step_count = 0
         self.alpha = alpha
         self.beta = beta
         self.gamma = gamma
@@ -45,6 +113,58 @@ class DisinformationModel:
         self.delta_modifiers = self._define_delta_modifiers()
         self.theta_modifiers = self._define_theta_modifiers()
 
+        if initial_believing_agents > self.num_agents:
+            initial_believing_agents = self.num_agents
+        self.initial_believing_agents = initial_believing_agents
+
+        self._cohort_modifiers = self.get_modifier_table()
+        self._table_parameters = None
+        self.store = None
+        self.step_cohort_counts = None
+        if self.engine == 'array':
+            self._build_store(initial_believing_agents, population)
+        else:
+            self._build_agents(initial_believing_agents, population)
+        self._update_transition_tables()
+
+        logging.info(f"Initialized model with {self.num_agents} agents, "
+                     f"{initial_believing_agents} initially EXPOSED.")
+
+    def _build_agents(self, initial_believing_agents, population=None):
+        """
+        Creates one UserAgent object per agent and exposes a random subset of them.
+
+        Args:
+            initial_believing_agents (int): Number of agents initially believing in disinformation.
+            population (Population): Optional demographics of the agents; sampled when omitted.
+        """
+        if population is not None:
+            self.agents = [
+                UserAgent(unique_id=i, model=self, age_group=AGE_GROUPS[age], sex_group=SEX_GROUPS[sex],
+                          education_group=EDUCATION_GROUPS[education], social_platform=SOCIAL_PLATFORMS[platform])
+                for i, (age, sex, education, platform) in enumerate(zip(
+                    population.age_codes.tolist(), population.sex_codes.tolist(),
+                    population.education_codes.tolist(), population.platform_codes.tolist()))
+            ]
+        else:
+            population = self._sample_agents()
+
+        # Agents keep their creation order so that static per-agent arrays stay aligned
+        # with self.agents; activation order is shuffled separately in step().
+        self._activation_order = list(self.agents)
+        self._cache_demographics(population)
+
+        believing_agents = random.sample(self.agents, initial_believing_agents)
+        for agent in believing_agents:
+            agent.state = State.EXPOSED
+
+    def _sample_agents(self):
+        """
+        Samples the attributes of every agent from the platform distributions into self.agents.
+
+        Returns:
+            Population: Demographic codes of the sampled agents.
+        """
         self.agents = []
         for i in range(self.num_agents):
             social_platform = random.choice(self.selected_social_platforms)
@@ -61,18 +181,80 @@ class DisinformationModel:
                 social_platform=social_platform,
             )
             self.agents.append(agent)
+        return Population.from_agents(self.agents)
 
-        if initial_believing_agents > self.num_agents:
-            initial_believing_agents = self.num_agents
+    def _build_store(self, initial_believing_agents, population=None):
+        """
+        Samples the agents into a compact AgentStore; self.agents is the store itself, which
+        materializes agent views with enum attributes on access.
 
-        believing_agents = random.sample(self.agents, initial_believing_agents)
-        for agent in believing_agents:
-            agent.state = State.EXPOSED
+        Args:
+            initial_believing_agents (int): Number of agents initially believing in disinformation.
+            population (Population): Optional demographics of the agents; sampled when omitted.
+        """
+        self.random_pool = RandomPool(self.seed, antithetic=self.antithetic)
+        if self.store_directory is not None:
+            self.store = MappedAgentStore.create(self.store_directory, self.num_agents, self.selected_social_platforms,
+                                                initial_believing_agents, self.random_pool.rng, population,
+                                                self.memory_budget, self.threads)
+        elif population is not None:
+            self.store = AgentStore(population)
+            self.store.expose(initial_believing_agents, self.random_pool.rng)
+        else:
+            self.store = AgentStore.synthesize(self.num_agents, self.selected_social_platforms,
+                                               initial_believing_agents, self.random_pool.rng)
+        self.agents = self.store
+        self._cache_demographics(self.store.population)
 
-        logging.info(f"Initialized model with {self.num_agents} agents, "
-                     f"{initial_believing_agents} initially EXPOSED.")
+    def _cache_demographics(self, population):
+        """
+        Caches the static demographic attributes of all agents.
+
+        Age, sex and education never change after construction, so their per-agent codes,
+        the packed cohort code and the demographic totals are computed only once.
+
+        Args:
+            population (Population): Demographic columns of the agents, aligned with self.agents.
+        """
+        self.population = population
+        self.age_codes = self.population.age_codes
+        self.sex_codes = self.population.sex_codes
+        self.education_codes = self.population.education_codes
+        self.num_cohorts = NUM_COHORTS
+        self.cohort_codes = self.population.cohort_codes
+        # Chunks of a mapped store bound the resident pages of the pass over the columns
+        chunks = self.store.chunks() if self.store is not None else None
+        self.demographic_counts = self.population.demographic_counts(chunks)
+
+    def get_state_codes(self):
+        """
+        Gets the current state of every agent as an array of state codes.
+
+        Returns:
+            np.ndarray: uint8 array with State values, aligned with self.agents.
+        """
+        if self.engine == 'array':
+            return self.store.states
+        return np.fromiter((agent.state.value for agent in self.agents), dtype=np.uint8, count=len(self.agents))
 
-    def _define_alpha_modifiers(self):
+    def set_state_codes(self, state_codes):
+        """
+        Sets the state of every agent, e.g. to restore the final states of a cached run.
+
+        Args:
+            state_codes (np.ndarray): State values aligned with self.agents.
+        """
+        if len(state_codes) != self.num_agents:
+            raise ValueError("state_codes must have one entry per agent.")
+        self.step_cohort_counts = None
+        if self.engine == 'array':
+            self.store.states[:] = state_codes
+            return
+        for agent, code in zip(self.agents, np.asarray(state_codes).tolist()):
+            agent.state = STATES[code]
+
+    @staticmethod
+    def _define_alpha_modifiers():
         """
         Define modifiers for alpha based on age, sex, and education.
         """
@@ -124,7 +306,8 @@ class DisinformationModel:
             'platform': platfrom_mod
         }
 
-    def _define_beta_modifiers(self):
+    @staticmethod
+    def _define_beta_modifiers():
         """
         Define modifiers for beta based on age, sex, and education.
         """
@@ -159,7 +342,8 @@ class DisinformationModel:
             'education': edu_mod,
         }
 
-    def _define_gamma_modifiers(self):
+    @staticmethod
+    def _define_gamma_modifiers():
         """
         Define modifiers for gamma based on age, sex, and education.
         """
@@ -194,7 +378,8 @@ class DisinformationModel:
             'education': edu_mod,
         }
 
-    def _define_delta_modifiers(self):
+    @staticmethod
+    def _define_delta_modifiers():
         """
         Define modifiers for delta based on age, sex, and education.
         """
@@ -230,7 +415,8 @@ class DisinformationModel:
             'education': edu_mod,
         }
 
-    def _define_theta_modifiers(self):
+    @staticmethod
+    def _define_theta_modifiers():
         """
         Define modifiers for theta based on age, sex, and education.
         """
@@ -350,17 +536,25 @@ class DisinformationModel:
         Returns:
             float: The modifier for alpha.
         """
-        noise = random.gauss(0, 0.001)
+        noise = random.gauss(0, MODIFIER_NOISE_STD)
 
-        mod = (7.0 * self.alpha_modifiers['platform'].get(self.selected_social_platforms[0], 1.0)
-               + 0.03 * self.alpha_modifiers['sex'].get(agent.sex_group, 1.0)
-               + 0.25 * self.alpha_modifiers['age'].get(agent.age_group, 1.0)
-               + 0.2 * self.alpha_modifiers['education'].get(agent.education_group, 1.0)) * 0.02
+        mod = self._alpha_modifier_value(self.alpha_modifiers, self.selected_social_platforms[0],
+                                        agent.age_group, agent.sex_group, agent.education_group)
 
         mod += noise
 
         return mod
 
+    @staticmethod
+    def _alpha_modifier_value(modifiers, social_platform, age_group, sex_group, education_group):
+        """
+        Computes the noise-free alpha modifier of a cohort.
+        """
+        return (7.0 * modifiers['platform'].get(social_platform, 1.0)
+                + 0.03 * modifiers['sex'].get(sex_group, 1.0)
+                + 0.25 * modifiers['age'].get(age_group, 1.0)
+                + 0.2 * modifiers['education'].get(education_group, 1.0)) * 0.02
+
     def get_beta_modifier(self, agent):
         """
         Gets the beta modifier based on agent's attributes.
@@ -371,16 +565,24 @@ class DisinformationModel:
         Returns:
             float: The modifier for beta.
         """
-        noise = random.gauss(0, 0.001)
+        noise = random.gauss(0, MODIFIER_NOISE_STD)
 
-        mod = (0.05 * self.beta_modifiers['sex'].get(agent.sex_group, 1.0)
-               + 0.16 * self.beta_modifiers['age'].get(agent.age_group, 1.0)
-               + 0.1 * self.beta_modifiers['education'].get(agent.education_group, 1.0)) * 0.13
+        mod = self._beta_modifier_value(self.beta_modifiers, self.selected_social_platforms[0],
+                                        agent.age_group, agent.sex_group, agent.education_group)
 
         mod += noise
 
         return mod
 
+    @staticmethod
+    def _beta_modifier_value(modifiers, social_platform, age_group, sex_group, education_group):
+        """
+        Computes the noise-free beta modifier of a cohort.
+        """
+        return (0.05 * modifiers['sex'].get(sex_group, 1.0)
+                + 0.16 * modifiers['age'].get(age_group, 1.0)
+                + 0.1 * modifiers['education'].get(education_group, 1.0)) * 0.13
+
     def get_gamma_modifier(self, agent):
         """
         Gets the gamma modifier based on agent's attributes.
@@ -391,16 +593,24 @@ class DisinformationModel:
         Returns:
             float: The modifier for gamma.
         """
-        noise = random.gauss(0, 0.001)
+        noise = random.gauss(0, MODIFIER_NOISE_STD)
 
-        mod = (0.9 * self.gamma_modifiers['age'].get(agent.age_group, 1.0)
-               + 0.1 * self.gamma_modifiers['sex'].get(agent.sex_group, 1.0)
-               + 0.7 * self.gamma_modifiers['education'].get(agent.education_group, 1.0)) * 0.1
+        mod = self._gamma_modifier_value(self.gamma_modifiers, self.selected_social_platforms[0],
+                                        agent.age_group, agent.sex_group, agent.education_group)
 
         mod += noise
 
         return mod
 
+    @staticmethod
+    def _gamma_modifier_value(modifiers, social_platform, age_group, sex_group, education_group):
+        """
+        Computes the noise-free gamma modifier of a cohort.
+        """
+        return (0.9 * modifiers['age'].get(age_group, 1.0)
+                + 0.1 * modifiers['sex'].get(sex_group, 1.0)
+                + 0.7 * modifiers['education'].get(education_group, 1.0)) * 0.1
+
     def get_delta_modifier(self, agent):
         """
         Gets the delta modifier based on agent's attributes.
@@ -411,16 +621,24 @@ class DisinformationModel:
         Returns:
             float: The modifier for delta.
         """
-        noise = random.gauss(0, 0.001)
+        noise = random.gauss(0, MODIFIER_NOISE_STD)
 
-        mod = (0.6 * self.delta_modifiers['age'].get(agent.age_group, 1.0)
-               + 0.1 * self.delta_modifiers['sex'].get(agent.sex_group, 1.0)
-               + 0.5 * self.delta_modifiers['education'].get(agent.education_group, 1.0)) * 0.5
+        mod = self._delta_modifier_value(self.delta_modifiers, self.selected_social_platforms[0],
+                                        agent.age_group, agent.sex_group, agent.education_group)
 
         mod += noise
 
         return mod
 
+    @staticmethod
+    def _delta_modifier_value(modifiers, social_platform, age_group, sex_group, education_group):
+        """
+        Computes the noise-free delta modifier of a cohort.
+        """
+        return (0.6 * modifiers['age'].get(age_group, 1.0)
+                + 0.1 * modifiers['sex'].get(sex_group, 1.0)
+                + 0.5 * modifiers['education'].get(education_group, 1.0)) * 0.5
+
     def get_theta_modifier(self, agent):
         """
         Gets the theta modifier based on agent's attributes.
@@ -431,21 +649,328 @@ class DisinformationModel:
         Returns:
             float: The modifier for theta.
         """
-        noise = random.gauss(0, 0.001)
+        noise = random.gauss(0, MODIFIER_NOISE_STD)
 
-        mod = (0.5 * self.theta_modifiers['age'].get(agent.age_group, 1.0)
-               + 0.005 * self.theta_modifiers['sex'].get(agent.sex_group, 1.0)
-               + 0.5 * self.theta_modifiers['education'].get(agent.education_group, 1.0)) * 0.02
+        mod = self._theta_modifier_value(self.theta_modifiers, self.selected_social_platforms[0],
+                                        agent.age_group, agent.sex_group, agent.education_group)
 
         mod += noise
 
         return mod
 
+    @staticmethod
+    def _theta_modifier_value(modifiers, social_platform, age_group, sex_group, education_group):
+        """
+        Computes the noise-free theta modifier of a cohort.
+        """
+        return (0.5 * modifiers['age'].get(age_group, 1.0)
+                + 0.005 * modifiers['sex'].get(sex_group, 1.0)
+                + 0.5 * modifiers['education'].get(education_group, 1.0)) * 0.02
+
+    @classmethod
+    def _modifier_table(cls, modifiers, social_platform, modifier_scales=None):
+        """
+        Evaluates the noise-free modifiers of every parameter for every cohort.
+
+        Args:
+            modifiers (dict): Keys are parameter names, values are modifier dicts as returned by _define_*_modifiers.
+            social_platform (SocialPlatform): Platform used by the platform modifier.
+            modifier_scales (dict): Optional factors keyed by (parameter name, dimension), e.g. ('alpha', 'age'),
+                applied to every value of that modifier table.
+
+        Returns:
+            np.ndarray: Array of shape (len(PARAMETER_NAMES), NUM_COHORTS), indexed by packed cohort code.
+        """
+        modifier_scales = modifier_scales or {}
+        table = np.empty((len(PARAMETER_NAMES),) + COHORT_SHAPE)
+        for k, name in enumerate(PARAMETER_NAMES):
+            scaled = {
+                dimension: {group: value * modifier_scales.get((name, dimension), 1.0)
+                            for group, value in values.items()}
+                for dimension, values in modifiers[name].items()
+            }
+            modifier_value = getattr(cls, f"_{name}_modifier_value")
+            for a, age_group in enumerate(AGE_GROUPS):
+                for s, sex_group in enumerate(SEX_GROUPS):
+                    for e, education_group in enumerate(EDUCATION_GROUPS):
+                        table[k, a, s, e] = modifier_value(scaled, social_platform, age_group, sex_group,
+                                                           education_group)
+        return table.reshape(len(PARAMETER_NAMES), NUM_COHORTS)
+
+    def get_modifier_table(self, modifier_scales=None):
+        """
+        Gets the noise-free modifiers of this model for every parameter and cohort.
+
+        Args:
+            modifier_scales (dict): Optional factors keyed by (parameter name, dimension).
+
+        Returns:
+            np.ndarray: Array of shape (len(PARAMETER_NAMES), NUM_COHORTS).
+        """
+        modifiers = {name: getattr(self, f"{name}_modifiers") for name in PARAMETER_NAMES}
+        return self._modifier_table(modifiers, self.selected_social_platforms[0], modifier_scales)
+
+    @classmethod
+    def build_modifier_table(cls, selected_social_platforms=None, modifier_scales=None):
+        """
+        Gets the noise-free modifiers for every parameter and cohort without building a model.
+
+        Args:
+            selected_social_platforms (list of SocialPlatform): Platforms of the scenario (default: all).
+            modifier_scales (dict): Optional factors keyed by (parameter name, dimension).
+
+        Returns:
+            np.ndarray: Array of shape (len(PARAMETER_NAMES), NUM_COHORTS).
+        """
+        modifiers = {name: getattr(cls, f"_define_{name}_modifiers")() for name in PARAMETER_NAMES}
+        platforms = selected_social_platforms or list(SocialPlatform)
+        return cls._modifier_table(modifiers, platforms[0], modifier_scales)
+
     def step(self):
         """
         Executes one simulation step.
         Activates all agents in a random order.
         """
-        random.shuffle(self.agents)
-        for agent in self.agents:
+        if self.schedule is not None:
+            self.schedule.apply(self, self.step_count)
+        self._update_transition_tables()
+        self.step_count += 1
+        if self.engine == 'array':
+            self._step_array()
+            return
+
+        random.shuffle(self._activation_order)
+        for agent in self._activation_order:
             agent.step()
+
+    def run(self, num_steps, record_every=1, until=None, record_peaks=False):
+        """
+        Advances the model by up to num_steps steps, recording the state counts every record_every
+        steps. The initial and the final counts are always recorded.
+
+        State counts are only computed at recorded steps, unless until or record_peaks need them
+        after every step; multi-threaded array models get them from the step itself.
+
+        Args:
+            num_steps (int): Maximum number of steps.
+            record_every (int): Number of steps between two records.
+            until (callable): Optional stop condition called after every step as until(step, counts),
+                with the model's step count and an array of counts indexed by State value; the run
+                stops after the first step for which it returns True.
+            record_peaks (bool): Also track the exact maximum count of every state over all steps.
+
+        Returns:
+            dict: 'steps', the step count of every record, and 'counts', an int64 array of shape
+            (records, len(State)); with record_peaks also 'peaks' and 'peak_steps', the maximum count
+            of every state and the first step it was reached.
+        """
+        if record_every < 1:
+            raise ValueError("record_every must be at least 1.")
+        count_every_step = until is not None or record_peaks
+        capacity = num_steps // record_every + 2
+        steps = np.empty(capacity, dtype=np.int64)
+        counts = np.empty((capacity, len(State)), dtype=np.int64)
+
+        current = self._count_state_codes()
+        steps[0], counts[0] = self.step_count, current
+        records = 1
+        peaks, peak_steps = current.copy(), np.full(len(State), self.step_count, dtype=np.int64)
+
+        for step in range(1, num_steps + 1):
+            self.step()
+            recorded = step % record_every == 0 or step == num_steps
+            if not (recorded or count_every_step):
+                continue
+            current = self._count_state_codes(after_step=True)
+            if record_peaks:
+                higher = current > peaks
+                peaks[higher] = current[higher]
+                peak_steps[higher] = self.step_count
+            stop = until is not None and until(self.step_count, current)
+            if recorded or stop:
+                steps[records], counts[records] = self.step_count, current
+                records += 1
+            if stop:
+                break
+
+        result = {'steps': steps[:records], 'counts': counts[:records]}
+        if record_peaks:
+            result['peaks'] = peaks
+            result['peak_steps'] = peak_steps
+        return result
+
+    def _count_state_codes(self, after_step=False):
+        """
+        Counts the agents in each state.
+
+        Args:
+            after_step (bool): True right after step(); multi-threaded array models and mapped stores then
+                reuse the counts of their chunks instead of scanning the states again.
+
+        Returns:
+            np.ndarray: int64 counts indexed by State value.
+        """
+        if after_step and self.engine == 'array' and (self.threads > 1 or self.step_cohort_counts is not None):
+            return self.state_counts.astype(np.int64)
+        return np.bincount(self.get_state_codes(), minlength=len(State)).astype(np.int64)
+
+    def _update_transition_tables(self):
+        """
+        Rebuilds the per-cohort transition probabilities when a base parameter has changed: the
+        uint32 thresholds of the array engine, or the cohort profiles shared by UserAgent objects.
+        """
+        parameters = tuple(getattr(self, name) for name in PARAMETER_NAMES)
+        if parameters == self._table_parameters:
+            return
+
+        scaled = np.asarray(parameters, dtype=float) * np.asarray(TRANSITION_SCALES)
+        probabilities = scaled[:, None] * self._cohort_modifiers
+        first, second = transition_probabilities(probabilities, scaled * MODIFIER_NOISE_STD)
+        if self.engine == 'array':
+            self._thresholds = probability_thresholds(first), probability_thresholds(second)
+        elif self._table_parameters is not None:
+            # Agents keep pointing at the same profiles, which are refreshed in place
+            for profile, refreshed in zip(self.cohort_profiles, CohortProfile.build_all(probabilities, first, second)):
+                profile.refresh(refreshed)
+        else:
+            self.cohort_profiles = CohortProfile.build_all(probabilities, first, second)
+            for agent, code in zip(self.agents, self.cohort_codes.tolist()):
+                agent.profile = self.cohort_profiles[code]
+        self._table_parameters = parameters
+
+    def _step_array(self):
+        """
+        Executes one step of the array engine. Agents are independent, so the store is advanced
+        in chunks with one uint32 draw per agent, on a thread pool when threads > 1. Mapped stores
+        are counted by state and cohort while each chunk is in memory, so recording the step does
+        not read the files again.
+        """
+        if self.threads == 1:
+            self.step_cohort_counts = self._step_range(0, self.num_agents, self.random_pool)
+        else:
+            if self._executor is None:
+                self._start_threads()
+            # NumPy and the Numba kernels release the GIL, so the chunks run in parallel
+            chunk_counts = list(self._executor.map(self._step_thread_chunk, range(self.threads)))
+            if self.store_directory is None:
+                self.state_counts = np.sum(chunk_counts, axis=0)
+                return
+            self.step_cohort_counts = np.sum(chunk_counts, axis=0)
+        if self.step_cohort_counts is not None:
+            self.state_counts = self.step_cohort_counts.sum(axis=1)
+
+    def _step_range(self, start, stop, random_pool):
+        """
+        Advances the agents in range(start, stop) by one step, one chunk of the store at a time.
+
+        Args:
+            start (int): First agent.
+            stop (int): End of the range.
+            random_pool (RandomPool): Random stream of the range.
+
+        Returns:
+            np.ndarray: For a mapped store, the number of agents of the range in every state and cohort,
+            of shape (len(State), NUM_COHORTS); None otherwise.
+        """
+        first_thresholds, second_thresholds = self._thresholds
+        states = self.store.states
+        cohort_codes = self.population.cohort_codes
+        counts = np.zeros(len(State) * NUM_COHORTS, dtype=np.int64) if self.store_directory is not None else None
+        # Draws are taken per STEP_CHUNK_SIZE agents whatever the store's chunk size, so that a mapped
+        # store steps through the same values as one in RAM
+        piece_size = min(STEP_CHUNK_SIZE, self.store.chunk_size)
+        for step_start in range(start, stop, STEP_CHUNK_SIZE):
+            step_stop = min(step_start + STEP_CHUNK_SIZE, stop)
+            pieces = random_pool.raw_uint32_pieces(step_stop - step_start, piece_size)
+            for chunk, draws in zip(self.store.chunks(step_start, step_stop, piece_size), pieces):
+                chunk_states = states[chunk]
+                if self.kernel == 'numpy':
+                    apply_transitions(chunk_states, cohort_codes[chunk], draws, first_thresholds, second_thresholds)
+                else:
+                    apply_transitions_fused(chunk_states, cohort_codes[chunk], draws, first_thresholds,
+                                            second_thresholds, parallel=self.kernel == 'numba-parallel')
+                if counts is not None:
+                    packed = np.multiply(chunk_states, NUM_COHORTS, dtype=np.uint16)
+                    packed += cohort_codes[chunk]
+                    counts += np.bincount(packed, minlength=len(counts))
+        return counts.reshape(len(State), NUM_COHORTS) if counts is not None else None
+
+    def _start_threads(self):
+        """
+        Creates the thread pool, the agent range of every thread and one random stream per range,
+        spawned from the model's seed.
+        """
+        bounds = np.linspace(0, self.num_agents, self.threads + 1).astype(int).tolist()
+        self._thread_chunks = list(zip(bounds[:-1], bounds[1:]))
+        streams = np.random.SeedSequence(self.seed).spawn(self.threads)
+        self._thread_pools = [RandomPool(stream, antithetic=self.antithetic) for stream in streams]
+        self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="model-step")
+
+    def _step_thread_chunk(self, index):
+        """
+        Steps the agent range of one thread and counts its states.
+
+        Returns:
+            np.ndarray: Number of agents of the range in each state, or in each state and cohort for a
+            mapped store.
+        """
+        start, stop = self._thread_chunks[index]
+        cohort_counts = self._step_range(start, stop, self._thread_pools[index])
+        if cohort_counts is not None:
+            return cohort_counts
+        return np.bincount(self.store.states[start:stop], minlength=len(State))
+
+    def reset(self, parameters=None, initial_believing_agents=None, seed=None):
+        """
+        Returns the model to step 0 for a new run over the same agents. The population, the agent
+        objects or columns and the modifier table are kept; the states are reset in place, the random
+        streams are reseeded and only the cohort transition tables are rebuilt.
+
+        The new run is equivalent to a new model built with this model's population and the same
+        arguments. A parameter schedule is rebased on the new parameters, since its first step sets
+        every parameter.
+
+        Args:
+            parameters (dict): New values of any of alpha..theta; other parameters are kept.
+            initial_believing_agents (int): Number of agents initially believing in disinformation
+                (default: the current number).
+            seed (int): Seed of the new run; None gives an unseeded run, like the constructor.
+        """
+        unknown = set(parameters or {}) - set(PARAMETER_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}.")
+        for name, value in (parameters or {}).items():
+            setattr(self, name, value)
+        if parameters and self.schedule is not None:
+            self.schedule = self.schedule.rebased({**self.schedule.base_parameters, **parameters})
+        if initial_believing_agents is not None:
+            self.initial_believing_agents = min(initial_believing_agents, self.num_agents)
+
+        # Thread streams are spawned from the seed, so they are recreated on the next step
+        self.close()
+        if seed is not None:
+            random.seed(seed)
+        self.seed = seed
+        self.step_count = 0
+        self.step_cohort_counts = None
+
+        if self.engine == 'array':
+            self.random_pool = RandomPool(self.seed, antithetic=self.antithetic)
+            for chunk in self.store.chunks():
+                self.store.states[chunk] = State.SUSCEPTIBLE.value
+            self.store.expose(self.initial_believing_agents, self.random_pool.rng)
+        else:
+            for agent in self.agents:
+                agent.state = State.SUSCEPTIBLE
+            self._activation_order = list(self.agents)
+            for agent in random.sample(self.agents, self.initial_believing_agents):
+                agent.state = State.EXPOSED
+        self._update_transition_tables()
+
+    def close(self):
+        """
+        Shuts down the thread pool of a multi-threaded model.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,162 @@
+import numpy as np
+
+from models.DisinformationModel import PARAMETER_NAMES
+
+# 'set' holds a value from a step on, 'ramp' moves linearly to a value, 'pulse' overrides the value for a while
+SEGMENT_TYPES = ('set', 'ramp', 'pulse')
+
+# Latest step a segment may refer to; the compiled values take 40 bytes per step up to the last segment
+MAX_SCHEDULE_STEP = 1_000_000
+
+
+class ParameterSchedule:
+    def __init__(self, segments, base_parameters, max_steps=None):
+        """
+        Initializes a ParameterSchedule and compiles it into per-step parameter values.
+
+        Steps count calls of model.step() from 0. Segments of a parameter are applied in order:
+            {'type': 'set', 'step': 20, 'value': 0.3}
+                the value from step 20 on;
+            {'type': 'ramp', 'start': 50, 'end': 80, 'value': 0.1}
+                linear change from the value at step 50 to 0.1 at step 80, held afterwards;
+            {'type': 'pulse', 'start': 100, 'duration': 5, 'value': 1.0}
+                1.0 for steps 100..104, then back to the value of the other segments.
+
+        Args:
+            segments (dict): Keys are parameter names, values are lists of segment dicts.
+            base_parameters (dict): Values of alpha..theta before any segment applies.
+            max_steps (int): Optional number of steps that will be run; later steps are not compiled.
+
+        Raises:
+            ValueError: If a parameter, segment type or value is invalid.
+        """
+        unknown = set(segments) - set(PARAMETER_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}.")
+        self.segments = {name: [self._validate(name, segment) for segment in parameter_segments]
+                         for name, parameter_segments in segments.items()}
+        self.base_parameters = {name: float(base_parameters[name]) for name in PARAMETER_NAMES}
+        self.max_steps = max_steps
+        self.values, self.changes = self._compile(max_steps)
+
+    @staticmethod
+    def _validate(name, segment):
+        if not isinstance(segment, dict):
+            raise ValueError(f"{name}: segments must be tables with a type.")
+        segment_type = segment.get('type')
+        if segment_type not in SEGMENT_TYPES:
+            raise ValueError(f"{name}: segment type must be one of: {', '.join(SEGMENT_TYPES)}.")
+        required = {'set': ('step', 'value'), 'ramp': ('start', 'end', 'value'),
+                    'pulse': ('start', 'duration', 'value')}[segment_type]
+        missing = [key for key in required if key not in segment]
+        if missing:
+            raise ValueError(f"{name}: {segment_type} segment needs {', '.join(missing)}.")
+        value = segment['value']
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or not 0 <= value <= 1:
+            raise ValueError(f"{name}: scheduled values must be between 0 and 1.")
+        for key in required[:-1]:
+            if not isinstance(segment[key], int) or isinstance(segment[key], bool) or segment[key] < 0:
+                raise ValueError(f"{name}: {key} must be a non-negative integer.")
+        if ParameterSchedule._last_step(segment) > MAX_SCHEDULE_STEP:
+            raise ValueError(f"{name}: segments must end by step {MAX_SCHEDULE_STEP}.")
+        if segment_type == 'ramp' and segment['end'] <= segment['start']:
+            raise ValueError(f"{name}: a ramp must end after it starts.")
+        return dict(segment)
+
+    @staticmethod
+    def _last_step(segment):
+        """
+        Gets the first step from which a segment no longer changes the value.
+        """
+        if segment['type'] == 'set':
+            return segment['step']
+        if segment['type'] == 'ramp':
+            return segment['end']
+        return segment['start'] + segment['duration']
+
+    def _compile(self, max_steps=None):
+        """
+        Evaluates every segment once into a (steps, len(PARAMETER_NAMES)) array of values and a
+        boolean array marking the first step and every step whose values differ from the previous
+        one. After the last compiled step the values stay constant; no more than max_steps steps
+        are compiled when it is given.
+        """
+        all_segments = [segment for segments in self.segments.values() for segment in segments]
+        num_steps = max((self._last_step(segment) for segment in all_segments), default=0) + 1
+        if max_steps is not None:
+            num_steps = max(min(num_steps, max_steps), 1)
+
+        values = np.empty((num_steps, len(PARAMETER_NAMES)))
+        for k, name in enumerate(PARAMETER_NAMES):
+            level = np.full(num_steps, self.base_parameters[name])
+            pulses = []
+            for segment in self.segments.get(name, []):
+                if segment['type'] == 'set':
+                    level[segment['step']:] = segment['value']
+                elif segment['type'] == 'ramp':
+                    start, end = segment['start'], segment['end']
+                    if start >= num_steps:
+                        continue
+                    initial = level[start]
+                    ramp_steps = np.arange(min(end, num_steps) - start)
+                    level[start:end] = initial + (segment['value'] - initial) * ramp_steps / (end - start)
+                    level[end:] = segment['value']
+                else:
+                    pulses.append(segment)
+            for segment in pulses:
+                level[segment['start']:segment['start'] + segment['duration']] = segment['value']
+            values[:, k] = level
+
+        # The first step always sets the values, so the model's own initial parameters do not matter
+        changes = np.ones(num_steps, dtype=bool)
+        changes[1:] = np.any(values[1:] != values[:-1], axis=1)
+        return values, changes
+
+    def rebased(self, base_parameters):
+        """
+        Gets the same schedule on new base parameters, e.g. for a model reset with new values.
+
+        Args:
+            base_parameters (dict): Values of alpha..theta before any segment applies.
+
+        Returns:
+            ParameterSchedule: The new schedule.
+        """
+        return ParameterSchedule(self.segments, base_parameters, self.max_steps)
+
+    @property
+    def num_steps(self):
+        """
+        int: Number of compiled steps; the last values hold for every later step.
+        """
+        return len(self.values)
+
+    def values_at(self, step):
+        """
+        Gets the scheduled parameters of a step.
+
+        Args:
+            step (int): Step index, counting calls of model.step() from 0.
+
+        Returns:
+            dict: Values of alpha..theta.
+        """
+        row = self.values[min(step, self.num_steps - 1)]
+        return dict(zip(PARAMETER_NAMES, row.tolist()))
+
+    def apply(self, model, step):
+        """
+        Sets the model's parameters for a step if they differ from the previous step.
+
+        Args:
+            model (DisinformationModel): The model.
+            step (int): Step index, counting calls of model.step() from 0.
+
+        Returns:
+            bool: True if any parameter changed.
+        """
+        if step >= self.num_steps or not self.changes[step]:
+            return False
+        for name, value in zip(PARAMETER_NAMES, self.values[step].tolist()):
+            setattr(model, name, value)
+        return True
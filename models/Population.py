@@ -0,0 +1,270 @@
+import logging
+
+import numpy as np
+
+from enums.SocialPlatform import SocialPlatform
+from enums.distributions.EducationDistribution import EducationDistribution
+from enums.distributions.PlatformAgeDistribution import PlatformAgeDistribution
+from enums.distributions.SexDistribution import SexDistribution
+from enums.groups.AgeGroup import AgeGroup
+from enums.groups.EducationGroup import EducationGroup
+from enums.groups.SexGroup import SexGroup
+
+AGE_GROUPS = list(AgeGroup)
+SEX_GROUPS = list(SexGroup)
+EDUCATION_GROUPS = list(EducationGroup)
+SOCIAL_PLATFORMS = list(SocialPlatform)
+COHORT_SHAPE = (len(AGE_GROUPS), len(SEX_GROUPS), len(EDUCATION_GROUPS))
+NUM_COHORTS = COHORT_SHAPE[0] * COHORT_SHAPE[1] * COHORT_SHAPE[2]
+
+AGE_CODES = {group: idx for idx, group in enumerate(AGE_GROUPS)}
+SEX_CODES = {group: idx for idx, group in enumerate(SEX_GROUPS)}
+EDUCATION_CODES = {group: idx for idx, group in enumerate(EDUCATION_GROUPS)}
+PLATFORM_CODES = {platform: idx for idx, platform in enumerate(SOCIAL_PLATFORMS)}
+
+# Age groups that can only have primary or secondary education
+MINOR_AGE_GROUPS = [AgeGroup.from00to09, AgeGroup.from10to19]
+
+# Number of agents sampled at a time by Population.synthesize
+SYNTHESIS_CHUNK_SIZE = 1 << 20
+
+
+def pack_cohort_codes(age_codes, sex_codes, education_codes):
+    """
+    Packs age, sex and education codes into a single cohort code in range(NUM_COHORTS).
+
+    Returns:
+        np.ndarray: uint8 cohort codes.
+    """
+    n_age, n_sex, n_edu = COHORT_SHAPE
+    # NUM_COHORTS fits in uint8, so the codes are packed without wider temporaries
+    codes = np.multiply(age_codes, n_sex, dtype=np.uint8)
+    codes += sex_codes
+    codes *= n_edu
+    codes += education_codes
+    return codes
+
+
+def _weights(distribution, groups):
+    """
+    Gets the probabilities of a distribution dict in the order of groups.
+    """
+    weights = np.array([distribution.get(group, 0.0) for group in groups], dtype=float)
+    return weights / weights.sum()
+
+
+def largest_remainder_quotas(shares, total):
+    """
+    Splits total into integer quotas proportional to shares: every quota gets the floor of its exact
+    value and the remaining units go to the largest fractional remainders, earlier entries first on ties.
+
+    Args:
+        shares (np.ndarray): Non-negative shares; they are normalized to sum to 1.
+        total (int): Number to split.
+
+    Returns:
+        np.ndarray: int64 quotas summing to total.
+    """
+    exact = np.asarray(shares, dtype=float) / np.sum(shares) * total
+    quotas = np.floor(exact).astype(np.int64)
+    remaining = total - int(quotas.sum())
+    if remaining > 0:
+        quotas[np.argsort(quotas - exact, kind='stable')[:remaining]] += 1
+    return quotas
+
+
+class Population:
+    def __init__(self, age_codes, sex_codes, education_codes, platform_codes, cohort_codes=None):
+        """
+        Initializes a Population, the static demographic attributes of a set of agents
+        stored as uint8 code columns (positions in AGE_GROUPS, SEX_GROUPS, EDUCATION_GROUPS
+        and SOCIAL_PLATFORMS).
+
+        Args:
+            age_codes (np.ndarray): Age group code of every agent.
+            sex_codes (np.ndarray): Sex group code of every agent.
+            education_codes (np.ndarray): Education group code of every agent.
+            platform_codes (np.ndarray): Social platform code of every agent.
+            cohort_codes (np.ndarray): Optional precomputed packed cohort codes; packed from the
+                age, sex and education codes when omitted.
+        """
+        self.age_codes = np.asarray(age_codes, dtype=np.uint8)
+        self.sex_codes = np.asarray(sex_codes, dtype=np.uint8)
+        self.education_codes = np.asarray(education_codes, dtype=np.uint8)
+        self.platform_codes = np.asarray(platform_codes, dtype=np.uint8)
+        if cohort_codes is None:
+            cohort_codes = pack_cohort_codes(self.age_codes, self.sex_codes, self.education_codes)
+        self.cohort_codes = np.asarray(cohort_codes, dtype=np.uint8)
+
+    @property
+    def num_agents(self):
+        """
+        int: Number of agents in the population.
+        """
+        return len(self.age_codes)
+
+    @classmethod
+    def from_agents(cls, agents):
+        """
+        Builds a Population from a sequence of UserAgent objects.
+
+        Args:
+            agents (list of UserAgent): The agents.
+
+        Returns:
+            Population: The agents' demographic codes, in the same order.
+        """
+        n = len(agents)
+        return cls(
+            np.fromiter((AGE_CODES[agent.age_group] for agent in agents), dtype=np.uint8, count=n),
+            np.fromiter((SEX_CODES[agent.sex_group] for agent in agents), dtype=np.uint8, count=n),
+            np.fromiter((EDUCATION_CODES[agent.education_group] for agent in agents), dtype=np.uint8, count=n),
+            np.fromiter((PLATFORM_CODES[agent.social_platform] for agent in agents), dtype=np.uint8, count=n),
+        )
+
+    @classmethod
+    def synthesize(cls, num_agents, selected_social_platforms=None, rng=None, chunk_size=SYNTHESIS_CHUNK_SIZE):
+        """
+        Samples a population from the platform, age, sex and education distributions
+        with vectorized draws, one batch per platform and chunk of agents. Only the uint8
+        columns are allocated for the whole population, so temporaries stay bounded.
+
+        Args:
+            num_agents (int): Number of agents.
+            selected_social_platforms (list of SocialPlatform): Platforms to assign to agents (default: all).
+            rng (np.random.Generator): Random number generator.
+            chunk_size (int): Number of agents sampled at a time.
+
+        Returns:
+            Population: The sampled population.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        platforms = selected_social_platforms or SOCIAL_PLATFORMS
+
+        platform_choices = np.array([PLATFORM_CODES[platform] for platform in platforms], dtype=np.uint8)
+        minor_codes = [AGE_CODES[group] for group in MINOR_AGE_GROUPS]
+        weights = {platform: (cls._age_weights(platform), cls._sex_weights(platform),
+                              cls._education_weights(platform, False), cls._education_weights(platform, True))
+                   for platform in dict.fromkeys(platforms)}
+
+        platform_codes = np.empty(num_agents, dtype=np.uint8)
+        age_codes = np.zeros(num_agents, dtype=np.uint8)
+        sex_codes = np.zeros(num_agents, dtype=np.uint8)
+        education_codes = np.zeros(num_agents, dtype=np.uint8)
+
+        for start in range(0, num_agents, chunk_size):
+            stop = min(start + chunk_size, num_agents)
+            chunk_platforms = platform_choices[rng.integers(len(platform_choices), size=stop - start)]
+            platform_codes[start:stop] = chunk_platforms
+            chunk_ages = age_codes[start:stop]
+            chunk_sexes = sex_codes[start:stop]
+            chunk_education = education_codes[start:stop]
+
+            for platform, (age_weights, sex_weights, adult_weights, minor_weights) in weights.items():
+                members = np.flatnonzero(chunk_platforms == PLATFORM_CODES[platform])
+                if len(members) == 0:
+                    continue
+                chunk_ages[members] = rng.choice(len(AGE_GROUPS), size=len(members), p=age_weights)
+                chunk_sexes[members] = rng.choice(len(SEX_GROUPS), size=len(members), p=sex_weights)
+                is_minor = np.isin(chunk_ages[members], minor_codes)
+                for minor, education_weights in ((False, adult_weights), (True, minor_weights)):
+                    group_members = members[is_minor == minor]
+                    chunk_education[group_members] = rng.choice(len(EDUCATION_GROUPS), size=len(group_members),
+                                                                p=education_weights)
+
+        return cls(age_codes, sex_codes, education_codes, platform_codes)
+
+    @classmethod
+    def stratified(cls, num_agents, selected_social_platforms=None, rng=None):
+        """
+        Builds a population whose cohort sizes are exact integer quotas of the platform, age, sex and
+        education distributions instead of random samples, so the realized shares carry no sampling
+        noise. Quotas are rounded with the largest-remainder method and every column is filled with
+        one bulk repeat of the cohort codes.
+
+        Args:
+            num_agents (int): Number of agents.
+            selected_social_platforms (list of SocialPlatform): Platforms to assign to agents (default: all).
+            rng (np.random.Generator): Optional generator used to shuffle the agents; without it the
+                agents are ordered by cohort and the population is fully deterministic.
+
+        Returns:
+            Population: The population.
+        """
+        platforms = selected_social_platforms or SOCIAL_PLATFORMS
+        minor = np.isin(np.arange(len(AGE_GROUPS)), [AGE_CODES[group] for group in MINOR_AGE_GROUPS])
+
+        # Joint probability of every (platform, age, sex, education) cell; platforms are equally likely
+        shares = np.zeros((len(SOCIAL_PLATFORMS),) + COHORT_SHAPE)
+        for platform in platforms:
+            education = np.where(minor[:, None], cls._education_weights(platform, True),
+                                 cls._education_weights(platform, False))
+            shares[PLATFORM_CODES[platform]] += (cls._age_weights(platform)[:, None, None]
+                                                 * cls._sex_weights(platform)[None, :, None]
+                                                 * education[:, None, :]) / len(platforms)
+
+        quotas = largest_remainder_quotas(shares.ravel(), num_agents)
+        platform_index, age_index, sex_index, education_index = np.unravel_index(np.arange(quotas.size),
+                                                                                 shares.shape)
+        columns = [np.repeat(index.astype(np.uint8), quotas)
+                   for index in (age_index, sex_index, education_index, platform_index)]
+        if rng is not None:
+            order = rng.permutation(num_agents)
+            columns = [column[order] for column in columns]
+        return cls(*columns)
+
+    @staticmethod
+    def _age_weights(platform):
+        distribution = PlatformAgeDistribution.get(platform)
+        if not distribution:
+            logging.warning(f"No age distribution defined for {platform.name}. Using uniform distribution.")
+            return np.full(len(AGE_GROUPS), 1 / len(AGE_GROUPS))
+        return _weights(distribution, AGE_GROUPS)
+
+    @staticmethod
+    def _sex_weights(platform):
+        distribution = SexDistribution.get(platform)
+        if not distribution:
+            logging.warning(f"No sex distribution defined for {platform.name}. Using uniform distribution.")
+            return np.full(len(SEX_GROUPS), 1 / len(SEX_GROUPS))
+        return _weights(distribution, SEX_GROUPS)
+
+    @staticmethod
+    def _education_weights(platform, minor):
+        """
+        Gets the education probabilities of a platform; minors only get primary or secondary education.
+        """
+        distribution = EducationDistribution.get(platform)
+        if not distribution:
+            logging.warning(f"No education distribution defined for {platform.name}. Using uniform distribution.")
+            return np.full(len(EDUCATION_GROUPS), 1 / len(EDUCATION_GROUPS))
+        if minor:
+            adjusted = {group: distribution.get(group, 0) for group in (EducationGroup.PRIMARY,
+                                                                         EducationGroup.SECONDARY)}
+            if sum(adjusted.values()) > 0:
+                return _weights(adjusted, EDUCATION_GROUPS)
+        return _weights(distribution, EDUCATION_GROUPS)
+
+    def demographic_counts(self, chunks=None):
+        """
+        Counts the agents in every age, sex, education and platform group.
+
+        Args:
+            chunks (iterable of slice): Optional slices of agents counted one at a time, e.g. from
+                MappedAgentStore.chunks, which bounds the resident pages of memory-mapped columns.
+
+        Returns:
+            dict: Keys 'age', 'sex', 'education' and 'platform', values are dicts of group counts.
+        """
+        columns = {
+            'age': (self.age_codes, AGE_GROUPS),
+            'sex': (self.sex_codes, SEX_GROUPS),
+            'education': (self.education_codes, EDUCATION_GROUPS),
+            'platform': (self.platform_codes, SOCIAL_PLATFORMS),
+        }
+        totals = {dimension: np.zeros(len(groups), dtype=np.int64) for dimension, (_, groups) in columns.items()}
+        for chunk in chunks if chunks is not None else [slice(None)]:
+            for dimension, (codes, groups) in columns.items():
+                totals[dimension] += np.bincount(codes[chunk], minlength=len(groups))
+        return {dimension: dict(zip(groups, totals[dimension].tolist()))
+                for dimension, (_, groups) in columns.items()}
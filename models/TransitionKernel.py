@@ -0,0 +1,199 @@
+import importlib.util
+import logging
+import math
+
+import numpy as np
+
+from enums.State import State
+from utils.RandomPool import probability_thresholds
+
+# Numba is optional and only imported once a fused kernel is used, as importing it is slow
+NUMBA_AVAILABLE = importlib.util.find_spec('numba') is not None
+numba = None
+_fused_kernels = {}
+
+# 'auto' picks the serial Numba kernel when Numba is installed and NumPy otherwise
+KERNELS = ('auto', 'numpy', 'numba', 'numba-parallel')
+
+# Positions of the parameters in PARAMETER_NAMES
+ALPHA, BETA, GAMMA, DELTA, THETA = range(5)
+
+# Every state makes at most two decisions from a single draw: the first outcome when the draw is below
+# the first threshold, the second when it is below the second one. Only EXPOSED has a second outcome.
+FIRST_TARGETS = np.array([State.EXPOSED.value, State.INFECTED.value, State.RECOVERED.value,
+                          State.EXPOSED.value, State.RECOVERED.value], dtype=np.uint8)
+SECOND_TARGETS = np.array([State.SUSCEPTIBLE.value, State.DOUBTFUL.value, State.INFECTED.value,
+                           State.DOUBTFUL.value, State.RECOVERED.value], dtype=np.uint8)
+
+_erf = np.frompyfunc(math.erf, 1, 1)
+
+
+def _expected_positive_part(mean, std):
+    """
+    Computes E[max(0, X)] for X ~ Normal(mean, std) element-wise.
+    """
+    mean, std = np.broadcast_arrays(np.asarray(mean, dtype=float), np.asarray(std, dtype=float))
+    result = np.array(np.maximum(mean, 0.0))
+    noisy = std > 0
+    z = mean[noisy] / std[noisy]
+    cdf = 0.5 * (1.0 + _erf(z / math.sqrt(2.0)).astype(float))
+    pdf = np.exp(-0.5 * z ** 2) / math.sqrt(2.0 * math.pi)
+    result[noisy] = mean[noisy] * cdf + std[noisy] * pdf
+    return result
+
+
+def transition_probabilities(probabilities, noise_scales):
+    """
+    Builds the decision probabilities of every state and cohort.
+
+    The modifier noise only enters a transition through the probability it is compared with, so it
+    can be integrated out: a uniform draw below p + s * Z has probability E[p + s * Z] = p. For EXPOSED
+    the draw is compared with both the beta and the gamma probability, each with its own noise, which
+    makes DOUBTFUL follow with probability E[max(0, p_gamma - p_beta + noise)]. This removes every
+    normal draw from the step while keeping the distribution of transitions unchanged.
+
+    Args:
+        probabilities (np.ndarray): Mean transition probabilities of shape (..., len(PARAMETER_NAMES), C).
+        noise_scales (np.ndarray): Standard deviation of the probability noise, shape (..., len(PARAMETER_NAMES)).
+
+    Returns:
+        tuple: Cumulative probabilities of the first and of the first or second outcome,
+            float arrays of shape (..., len(State), C).
+    """
+    probabilities = np.asarray(probabilities, dtype=float)
+    noise_scales = np.asarray(noise_scales, dtype=float)[..., None]
+    first = np.zeros(probabilities.shape[:-2] + (len(State), probabilities.shape[-1]))
+    first[..., State.SUSCEPTIBLE.value, :] = probabilities[..., ALPHA, :]
+    first[..., State.EXPOSED.value, :] = probabilities[..., BETA, :]
+    first[..., State.INFECTED.value, :] = probabilities[..., DELTA, :]
+    first[..., State.DOUBTFUL.value, :] = probabilities[..., THETA, :]
+
+    second = first.copy()
+    second[..., State.EXPOSED.value, :] += _expected_positive_part(
+        probabilities[..., GAMMA, :] - probabilities[..., BETA, :],
+        np.hypot(noise_scales[..., GAMMA, :], noise_scales[..., BETA, :]))
+    return first, second
+
+
+def transition_thresholds(probabilities, noise_scales):
+    """
+    Builds the uint32 decision thresholds of every state and cohort, see transition_probabilities.
+
+    Args:
+        probabilities (np.ndarray): Mean transition probabilities of shape (..., len(PARAMETER_NAMES), C).
+        noise_scales (np.ndarray): Standard deviation of the probability noise, shape (..., len(PARAMETER_NAMES)).
+
+    Returns:
+        tuple: First and second thresholds, uint32 arrays of shape (..., len(State), C).
+    """
+    first, second = transition_probabilities(probabilities, noise_scales)
+    return probability_thresholds(first), probability_thresholds(second)
+
+
+def apply_transitions(states, cohort_codes, draws, first_thresholds, second_thresholds):
+    """
+    Advances states in place by one step.
+
+    Args:
+        states (np.ndarray): uint8 states of shape (N,) or (P, N).
+        cohort_codes (np.ndarray): Cohort code of every agent, shape (N,).
+        draws (np.ndarray): Uniform uint32 draws of the same shape as states.
+        first_thresholds (np.ndarray): First thresholds of shape (len(State), C) or (P, len(State), C).
+        second_thresholds (np.ndarray): Second thresholds of the same shape.
+    """
+    num_cohorts = first_thresholds.shape[-1]
+    rows = states.reshape(-1, states.shape[-1])
+    keys = rows.astype(np.uint16) * num_cohorts + cohort_codes
+    first = np.take_along_axis(first_thresholds.reshape(len(rows), -1), keys, axis=1)
+    second = np.take_along_axis(second_thresholds.reshape(len(rows), -1), keys, axis=1)
+
+    draws = draws.reshape(rows.shape)
+    rows[...] = np.where(draws < first, FIRST_TARGETS[rows],
+                         np.where(draws < second, SECOND_TARGETS[rows], rows))
+
+
+def resolve_kernel(kernel, threads=1):
+    """
+    Resolves a kernel name to the kernel that will actually run.
+
+    Args:
+        kernel (str): One of KERNELS.
+        threads (int): Number of threads running the kernel at the same time. The parallel kernel is
+            only used by a single thread: nested in a thread pool, Numba's default TBB threading layer
+            hangs at interpreter exit.
+
+    Returns:
+        str: 'numpy', 'numba' or 'numba-parallel'.
+    """
+    if kernel not in KERNELS:
+        raise ValueError(f"Unknown kernel {kernel!r}; expected one of: {', '.join(KERNELS)}.")
+    if kernel == 'auto':
+        return 'numba' if NUMBA_AVAILABLE else 'numpy'
+    if kernel != 'numpy' and not NUMBA_AVAILABLE:
+        logging.warning(f"Numba is not installed; the {kernel} kernel falls back to NumPy.")
+        return 'numpy'
+    if kernel == 'numba-parallel' and threads > 1:
+        logging.warning(f"The numba-parallel kernel cannot run on {threads} threads; using the serial numba kernel.")
+        return 'numba'
+    return kernel
+
+
+def _fused_loop(states, cohort_codes, draws, first_thresholds, second_thresholds, first_targets, second_targets):
+    """
+    Threshold lookup, decision and state write of every agent in a single pass.
+    """
+    for i in range(states.shape[0]):
+        state = states[i]
+        cohort = cohort_codes[i]
+        draw = draws[i]
+        if draw < first_thresholds[state, cohort]:
+            states[i] = first_targets[state]
+        elif draw < second_thresholds[state, cohort]:
+            states[i] = second_targets[state]
+
+
+def _fused_parallel_loop(states, cohort_codes, draws, first_thresholds, second_thresholds, first_targets,
+                         second_targets):
+    """
+    The loop of _fused_loop split over the Numba thread pool; a separate function so that the
+    serial and parallel builds get separate on-disk cache entries.
+    """
+    for i in numba.prange(states.shape[0]):
+        state = states[i]
+        cohort = cohort_codes[i]
+        draw = draws[i]
+        if draw < first_thresholds[state, cohort]:
+            states[i] = first_targets[state]
+        elif draw < second_thresholds[state, cohort]:
+            states[i] = second_targets[state]
+
+
+def _fused_kernel(parallel):
+    """
+    Gets the compiled serial or parallel kernel, importing Numba on first use.
+    """
+    global numba
+    if parallel not in _fused_kernels:
+        import numba
+
+        # cache=True stores the compiled kernels in __pycache__, so only the first run pays the JIT
+        loop = _fused_parallel_loop if parallel else _fused_loop
+        _fused_kernels[parallel] = numba.njit(cache=True, nogil=True, parallel=parallel)(loop)
+    return _fused_kernels[parallel]
+
+
+def apply_transitions_fused(states, cohort_codes, draws, first_thresholds, second_thresholds, parallel=False):
+    """
+    Advances states in place by one step with the Numba kernel. Given the same draws, the result
+    is identical to apply_transitions.
+
+    Args:
+        states (np.ndarray): uint8 states of shape (N,).
+        cohort_codes (np.ndarray): Cohort code of every agent, shape (N,).
+        draws (np.ndarray): Uniform uint32 draws of shape (N,).
+        first_thresholds (np.ndarray): First thresholds of shape (len(State), C).
+        second_thresholds (np.ndarray): Second thresholds of the same shape.
+        parallel (bool): Split the loop over the Numba thread pool.
+    """
+    _fused_kernel(parallel)(states, cohort_codes, draws, first_thresholds, second_thresholds,
+                            FIRST_TARGETS, SECOND_TARGETS)
@@ -0,0 +1,161 @@
+import math
+
+import numpy as np
+import tkinter as tk
+from tkinter import ttk
+
+from enums.State import State
+
+# Longest side of the image; larger populations show every k-th agent so that one pixel is one agent
+MAX_SIDE = 1024
+
+# Demographic columns of Population the agents can be grouped by
+GROUPINGS = {
+    'none': None,
+    'age': 'age_codes',
+    'education': 'education_codes',
+    'platform': 'platform_codes',
+}
+
+# RGB colour of every State value, matching the Plotter's line colours, then the background
+PALETTE = np.array([
+    (220, 220, 220),  # SUSCEPTIBLE
+    (31, 119, 180),  # EXPOSED
+    (255, 127, 14),  # INFECTED
+    (44, 160, 44),  # DOUBTFUL
+    (214, 39, 40),  # RECOVERED
+    (255, 255, 255),  # background and group separators
+], dtype=np.uint8)
+BACKGROUND = len(State)
+
+# The palette as single 3-byte items, so one take writes whole pixels
+PALETTE_PIXELS = PALETTE.view('V3').ravel()
+
+
+class AgentHeatmap:
+    def __init__(self, root, model, grouping='none', max_side=MAX_SIDE, on_close=None):
+        """
+        Initializes the AgentHeatmap, a window showing the current state of every agent as one pixel.
+
+        A frame is rendered by looking the uint8 state codes up in PALETTE into one RGB buffer, which
+        is handed to a single Tk PhotoImage as PPM data; no per-agent widgets or artists are created.
+        The pixel of every agent is computed once per model and grouping, since demographics never change.
+
+        Args:
+            root (tk.Tk): The main Tkinter window.
+            model (DisinformationModel): The model to show.
+            grouping (str): Key of GROUPINGS; grouped agents are drawn in bands separated by a blank row.
+            max_side (int): Longest side of the image in pixels.
+            on_close (callable): Optional function called when the window is closed.
+        """
+        self.max_side = max_side
+        self.on_close = on_close
+        self.window = tk.Toplevel(root)
+        self.window.title("Agent States")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        controls = ttk.Frame(self.window)
+        controls.pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
+        ttk.Label(controls, text="Group by:").pack(side=tk.LEFT, padx=5)
+        self.grouping_var = tk.StringVar(value=grouping)
+        grouping_combobox = ttk.Combobox(controls, textvariable=self.grouping_var, state="readonly",
+                                         values=list(GROUPINGS), width=12)
+        grouping_combobox.pack(side=tk.LEFT, padx=5)
+        grouping_combobox.bind("<<ComboboxSelected>>", self.on_grouping_change)
+        self.info_label = ttk.Label(controls, text="")
+        self.info_label.pack(side=tk.LEFT, padx=5)
+
+        self.photo = tk.PhotoImage(master=self.window)
+        ttk.Label(self.window, image=self.photo).pack(side=tk.TOP, padx=5, pady=5)
+
+        self.set_model(model)
+
+    def set_model(self, model):
+        """
+        Shows another model, e.g. after the simulation was restarted.
+
+        Args:
+            model (DisinformationModel): The model to show.
+        """
+        self.model = model
+        self._build_layout()
+        self.refresh()
+
+    def on_grouping_change(self, event=None):
+        self._build_layout()
+        self.refresh()
+
+    def _build_layout(self):
+        """
+        Maps every pixel to the agent it shows. Agents are sampled with a fixed stride when there are
+        more of them than pixels, sorted by group if grouped, and each group starts on a new row.
+        """
+        num_agents = self.model.num_agents
+        stride = max(1, math.ceil(num_agents / self.max_side ** 2))
+        agents = np.arange(0, num_agents, stride)
+
+        column = GROUPINGS[self.grouping_var.get()]
+        if column is None:
+            bands = [agents]
+        else:
+            codes = getattr(self.model.population, column)[agents]
+            agents = agents[np.argsort(codes, kind='stable')]
+            bands = np.split(agents, np.cumsum(np.bincount(codes))[:-1])
+            bands = [band for band in bands if len(band)]
+
+        width = max(1, min(self.max_side, math.ceil(math.sqrt(len(agents)))))
+        band_rows = [math.ceil(len(band) / width) for band in bands]
+        height = max(1, sum(band_rows) + len(bands) - 1)
+
+        pixel_agents = np.full(height * width, -1, dtype=np.int64)
+        row = 0
+        for band, rows in zip(bands, band_rows):
+            pixel_agents[row * width:row * width + len(band)] = band
+            row += rows + 1
+
+        # Blank pixels read agent 0 and are then overwritten, which is cheaper than a masked gather
+        self.padding = np.flatnonzero(pixel_agents < 0)
+        pixel_agents[self.padding] = 0
+        self.pixel_agents = pixel_agents
+        self.pixel_codes = np.empty(height * width, dtype=np.uint8)
+
+        # PPM header followed by the RGB pixels, reused by every frame
+        header = f"P6 {width} {height} 255\n".encode()
+        self.buffer = np.empty(len(header) + 3 * height * width, dtype=np.uint8)
+        self.buffer[:len(header)] = np.frombuffer(header, dtype=np.uint8)
+        self.pixels = self.buffer[len(header):].view('V3')
+        self.info_label.config(text=f"{len(agents)} of {num_agents} agents"
+                                    + (f" (1 in {stride})" if stride > 1 else ""))
+
+    def render(self, state_codes):
+        """
+        Converts state codes into the PPM image of the current layout.
+
+        Args:
+            state_codes (np.ndarray): uint8 State value of every agent.
+
+        Returns:
+            bytes: Binary PPM data.
+        """
+        np.take(state_codes, self.pixel_agents, out=self.pixel_codes)
+        self.pixel_codes[self.padding] = BACKGROUND
+        np.take(PALETTE_PIXELS, self.pixel_codes, out=self.pixels)
+        return self.buffer.tobytes()
+
+    def refresh(self, state_codes=None):
+        """
+        Redraws the image.
+
+        Args:
+            state_codes (np.ndarray): Optional uint8 State value of every agent, e.g. counted by the
+                simulation thread; read from the model when omitted, which scans every agent of the
+                object engine.
+        """
+        if state_codes is None:
+            state_codes = self.model.get_state_codes()
+        self.photo.configure(data=self.render(state_codes), format='PPM')
+
+    def close(self):
+        self.window.destroy()
+        if self.on_close is not None:
+            self.on_close()
@@ -1,18 +1,33 @@
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import math
+
+import numpy as np
 from enums.State import State
 import tkinter as tk
 
+INITIAL_X_LIMIT = 50
+INITIAL_Y_LIMIT = 10
+LIMIT_GROWTH_FACTOR = 2
+INITIAL_BUFFER_SIZE = 1024
+
 
 class Plotter:
-    def __init__(self, root):
+    def __init__(self, root, incremental=True, max_points=2000):
         """
         Initializes the Plotter.
 
         Args:
             root (tk.Tk): The main Tkinter window.
+            incremental (bool): Use blitting and only redraw the lines and the legend on updates.
+            max_points (int): Maximum number of points drawn per line in incremental mode;
+                longer histories are decimated so frame cost does not grow with history length.
         """
+        # matplotlib is only loaded once something is plotted
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
         self.root = root
+        self.incremental = incremental
+        self.max_points = max_points
         self.fig, self.ax = plt.subplots(figsize=(8, 6))
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.root)
         self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=1)
@@ -27,9 +42,175 @@ class Plotter:
                 self.lines[state] = line
         self.legend = self.ax.legend(loc='lower center', bbox_to_anchor=(0.5, -0.25),
                                      ncol=len(State), fontsize='small')
+        self.legend_texts = dict(zip(self.lines, self.legend.get_texts()))
+        self.cursor = self.ax.axvline(0, color='gray', linestyle='--', linewidth=1, visible=False)
 
         self.fig.tight_layout(rect=[0, 0.05, 1, 1])
 
+        self.background = None
+        self._reset_buffers()
+        if self.incremental:
+            for line in self.lines.values():
+                line.set_animated(True)
+            self.legend.set_animated(True)
+            self.cursor.set_animated(True)
+            self.ax.set_xlim(0, self.x_limit)
+            self.ax.set_ylim(0, self.y_limit)
+            self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def _reset_buffers(self):
+        """
+        Clears the incremental data buffers and axes limits.
+        """
+        self.num_points = 0
+        self.max_count = 0
+        self.steps = np.arange(INITIAL_BUFFER_SIZE)
+        self.buffers = {state: np.zeros(INITIAL_BUFFER_SIZE, dtype=np.int64) for state in self.lines}
+        self.x_limit = INITIAL_X_LIMIT
+        self.y_limit = INITIAL_Y_LIMIT
+
+    def _append_history(self, history):
+        """
+        Copies only the points added to the history since the last update into the buffers.
+
+        Args:
+            history (dict): A dictionary containing the history of states.
+        """
+        length = min(len(history[state]) for state in self.lines)
+        if length < self.num_points:
+            # A new, shorter history was passed in without reset_plot()
+            self.num_points = 0
+            self.max_count = 0
+        if length == self.num_points:
+            return
+
+        capacity = len(self.steps)
+        if length > capacity:
+            while capacity < length:
+                capacity *= 2
+            self.steps = np.arange(capacity)
+            for state, buffer in self.buffers.items():
+                grown = np.zeros(capacity, dtype=buffer.dtype)
+                grown[:self.num_points] = buffer[:self.num_points]
+                self.buffers[state] = grown
+
+        for state, buffer in self.buffers.items():
+            new_points = np.asarray(history[state][self.num_points:length])
+            buffer[self.num_points:length] = new_points
+            self.max_count = max(self.max_count, int(new_points.max()))
+        self.num_points = length
+
+    def _decimate(self, state, step):
+        """
+        Gets at most max_points points of a line up to a step, always keeping the last point.
+
+        Args:
+            state (State): The state of the line.
+            step (int): Number of points to show.
+
+        Returns:
+            tuple: x and y arrays.
+        """
+        data = self.buffers[state][:step]
+        if step <= self.max_points:
+            return self.steps[:step], data
+        stride = math.ceil(step / self.max_points)
+        x = np.append(self.steps[:step:stride], step - 1)
+        y = np.append(data[::stride], data[-1])
+        return x, y
+
+    def _expand_limits(self, step):
+        """
+        Grows the axes limits geometrically so that they change only O(log n) times per run.
+
+        Args:
+            step (int): Number of points shown.
+
+        Returns:
+            bool: True if the limits changed and a full redraw is needed.
+        """
+        changed = False
+        while step - 1 > self.x_limit:
+            self.x_limit *= LIMIT_GROWTH_FACTOR
+            changed = True
+        while self.max_count > self.y_limit:
+            self.y_limit *= LIMIT_GROWTH_FACTOR
+            changed = True
+        if changed:
+            self.ax.set_xlim(0, self.x_limit)
+            self.ax.set_ylim(0, self.y_limit)
+        return changed
+
+    def _show_step(self, step):
+        """
+        Shows the buffered history up to a step, blitting only the lines and the legend.
+
+        Args:
+            step (int): Number of points to show.
+        """
+        self.cursor.set_visible(False)
+        for state, line in self.lines.items():
+            line.set_data(*self._decimate(state, step))
+            latest_count = self.buffers[state][step - 1] if step > 0 else 0
+            self.legend_texts[state].set_text(f"{state.name}: {latest_count}")
+
+        if self._expand_limits(step) or self.background is None:
+            self.canvas.draw()
+        else:
+            self.blit()
+
+    def on_draw(self, event):
+        """
+        Caches the static background after every full redraw and draws the animated artists on top of it.
+
+        Args:
+            event (DrawEvent): The matplotlib draw event.
+        """
+        if event is not None and event.canvas != self.canvas:
+            return
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        """
+        Draws the lines and the legend onto the canvas renderer.
+        """
+        for line in self.lines.values():
+            self.ax.draw_artist(line)
+        self.ax.draw_artist(self.cursor)
+        self.ax.draw_artist(self.legend)
+
+    def blit(self):
+        """
+        Restores the cached background, redraws the animated artists and blits the figure.
+        """
+        self.canvas.restore_region(self.background)
+        self._draw_animated()
+        self.canvas.blit(self.fig.bbox)
+
+    def show_cursor(self, history, step):
+        """
+        Marks a step with a vertical cursor and shows its counts in the legend, leaving the lines
+        untouched. Used for scrubbing, so it never triggers a full redraw of the plotted history.
+
+        Args:
+            history (dict): A dictionary containing the history of states.
+            step (int): Number of recorded points up to and including the marked step.
+        """
+        if not self.incremental:
+            self.update_plot_to_step(history, step)
+            return
+
+        self._append_history(history)
+        if self.background is None or self.num_points == 0:
+            return
+        step = max(1, min(step, self.num_points))
+        self.cursor.set_xdata([step - 1, step - 1])
+        self.cursor.set_visible(True)
+        for state in self.lines:
+            self.legend_texts[state].set_text(f"{state.name}: {self.buffers[state][step - 1]}")
+        self.blit()
+
     def update_plot(self, history):
         """
         Updates the plot with new data.
@@ -37,9 +218,14 @@ class Plotter:
         Args:
             history (dict): A dictionary containing the history of states.
         """
+        if self.incremental:
+            self._append_history(history)
+            self._show_step(self.num_points)
+            return
+
         for state, line in self.lines.items():
             line.set_data(range(len(history[state])), history[state])
-            latest_count = history[state][-1] if history[state] else 0
+            latest_count = history[state][-1] if len(history[state]) else 0
             line.set_label(f"{state.name}: {latest_count}")
         self.ax.relim()
         self.ax.autoscale_view()
@@ -56,6 +242,11 @@ class Plotter:
             history (dict): A dictionary containing the history of states.
             step (int): The step to which the plot should be updated.
         """
+        if self.incremental:
+            self._append_history(history)
+            self._show_step(min(step, self.num_points))
+            return
+
         max_step = min([len(history[state]) for state in State])
         if step > max_step:
             step = max_step
@@ -74,6 +265,16 @@ class Plotter:
         """
         Resets the plot by clearing all lines.
         """
+        if self.incremental:
+            self._reset_buffers()
+            self.ax.set_xlim(0, self.x_limit)
+            self.ax.set_ylim(0, self.y_limit)
+            for state, line in self.lines.items():
+                line.set_data([], [])
+                self.legend_texts[state].set_text(f"{state.name}: 0")
+            self.canvas.draw()
+            return
+
         for state, line in self.lines.items():
             line.set_data([], [])
             line.set_label(f"{state.name}: 0")
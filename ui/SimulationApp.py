@@ -1,21 +1,32 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from threading import Thread, Event
+import os
+import queue
 import time
-import pandas as pd
 import logging
+from contextlib import nullcontext
 
+from enums.SimulationSpeed import SimulationSpeed
 from enums.groups.EducationGroup import EducationGroup
 from enums.groups.SexGroup import SexGroup
+from ui.AgentHeatmap import AgentHeatmap
 from ui.Plotter import Plotter
-from utils.StateCounter import StateCounter
+from utils.StateCounter import BREAKDOWN_GROUPS, StateCounter
 from enums.State import State
-from models.DisinformationModel import DisinformationModel
+from models.DisinformationModel import DisinformationModel, PARAMETER_NAMES
+from models.Population import Population
 from enums.SocialPlatform import SocialPlatform
+from utils.PopulationCache import synthesize_seeded
+from utils.Profiler import Profiler, session_directory
+from utils.ResultCache import ResultCache
+from utils.Scenario import Scenario
+
+SLIDER_DEBOUNCE_MS = 30
 
 
 class SimulationApp:
-    def __init__(self, root, num_steps=100, update_frequency=10):
+    def __init__(self, root, num_steps=100, update_frequency=10, max_fps=30):
         """
         Initializes the SimulationApp.
 
@@ -23,14 +34,42 @@ class SimulationApp:
             root (tk.Tk): The main Tkinter window.
             num_steps (int): Number of simulation steps to run.
             update_frequency (int): Frequency of plot updates (every N steps).
+            max_fps (int): Maximum number of GUI refreshes per second.
         """
         self.root = root
         self.num_steps = num_steps
         self.update_frequency = update_frequency
+        self.frame_interval_ms = max(1, 1000 // max_fps)
         self.current_step = 0
         self.is_running = False
         self.stop_event = Event()
         self.updating_slider = False
+        self.pending_slider_value = None
+
+        # The simulation thread never touches Tk; it posts (run_id, step, counts) snapshots here
+        # and the main thread drains them with root.after at most max_fps times per second.
+        self.snapshot_queue = queue.Queue()
+        self.run_id = 0
+        self.last_plotted_step = 0
+        self.polling = False
+        self.speed = SimulationSpeed.REAL_TIME
+        self.steps_per_second = 20
+
+        # Demographics do not depend on alpha..theta, so the population is only sampled again
+        # when the number of agents or the platform changes
+        self.population = None
+        self.population_key = None
+
+        # Completed seeded runs are stored here and shown instantly when they are started again
+        self.result_cache = ResultCache()
+        self.result_key = None
+
+        self.model = None
+        self.thread = None
+        self.agent_heatmap = None
+
+        # Set while the Profile box is checked; runs, plots and exports are then profiled
+        self.profiler = None
 
         self.root.title("Disinformation Spread Simulation")
 
@@ -58,6 +97,33 @@ class SimulationApp:
         self.save_button = ttk.Button(control_frame, text="Save Results", command=self.save_results, state=tk.DISABLED)
         self.save_button.grid(row=0, column=3, padx=5)
 
+        # Speed Control
+        ttk.Label(control_frame, text="Speed:").grid(row=0, column=4, padx=5)
+        self.speed_var = tk.StringVar(value=self.speed.value)
+        self.speed_combobox = ttk.Combobox(control_frame, textvariable=self.speed_var, state="readonly",
+                                           values=[speed.value for speed in SimulationSpeed], width=18)
+        self.speed_combobox.grid(row=0, column=5, padx=5)
+        self.speed_combobox.bind("<<ComboboxSelected>>", self.on_speed_change)
+
+        self.steps_per_second_var = tk.IntVar(value=self.steps_per_second)
+        self.steps_per_second_spinbox = ttk.Spinbox(control_frame, from_=1, to=10000, width=6,
+                                                    textvariable=self.steps_per_second_var,
+                                                    command=self.on_speed_change)
+        self.steps_per_second_spinbox.grid(row=0, column=6, padx=5)
+        self.steps_per_second_spinbox.bind("<Return>", self.on_speed_change)
+        self.steps_per_second_spinbox.bind("<FocusOut>", self.on_speed_change)
+        ttk.Label(control_frame, text="steps/s").grid(row=0, column=7, padx=(0, 5))
+
+        # Agent Map Button
+        self.heatmap_button = ttk.Button(control_frame, text="Agent Map", command=self.toggle_agent_heatmap)
+        self.heatmap_button.grid(row=0, column=8, padx=5)
+
+        # Profile Toggle
+        self.profile_var = tk.BooleanVar(value=False)
+        self.profile_checkbutton = ttk.Checkbutton(control_frame, text="Profile", variable=self.profile_var,
+                                                   command=self.toggle_profiling)
+        self.profile_checkbutton.grid(row=0, column=9, padx=5)
+
         # Slider Frame
         slider_frame = ttk.Frame(self.root)
         slider_frame.pack(side=tk.BOTTOM, pady=10, fill=tk.X)
@@ -80,6 +146,12 @@ class SimulationApp:
         self.num_agents_entry = ttk.Entry(settings_frame, textvariable=self.num_agents_var)
         self.num_agents_entry.grid(row=0, column=1, padx=5, pady=2)
 
+        # Seed
+        ttk.Label(settings_frame, text="Seed (optional):").grid(row=0, column=2, sticky=tk.W, padx=5, pady=2)
+        self.seed_var = tk.StringVar(value="")
+        self.seed_entry = ttk.Entry(settings_frame, textvariable=self.seed_var)
+        self.seed_entry.grid(row=0, column=3, padx=5, pady=2)
+
         # Number of Initial Believing Agents
         ttk.Label(settings_frame, text="Initial Believing Agents:").grid(row=1, column=0, sticky=tk.W, padx=5, pady=2)
         self.initial_believing_var = tk.IntVar(value=50)
@@ -165,187 +237,436 @@ class SimulationApp:
         Starts the simulation in a separate thread.
         """
         if not self.is_running:
-            try:
-                N = self.num_agents_var.get()
-                initial_believing = self.initial_believing_var.get()
-                alpha = self.alpha_var.get()
-                beta = self.beta_var.get()
-                gamma = self.gamma_var.get()
-                delta = self.delta_var.get()
-                theta = self.theta_var.get()
-
-                if initial_believing > N:
-                    raise ValueError("Initial believing agents cannot exceed total number of agents.")
-                if not (0 <= alpha <= 1):
-                    raise ValueError("Alpha must be between 0 and 1.")
-                if not (0 <= beta <= 1):
-                    raise ValueError("Beta must be between 0 and 1.")
-                if not (0 <= gamma <= 1):
-                    raise ValueError("Gamma must be between 0 and 1.")
-                if not (0 <= delta <= 1):
-                    raise ValueError("Delta must be between 0 and 1.")
-                if not (0 <= theta <= 1):
-                    raise ValueError("Theta must be between 0 and 1.")
-
-                selected_platform_name = self.selected_platform_var.get()
-                if not selected_platform_name:
-                    raise ValueError("Please select one social media platform.")
-
-                selected_platform = SocialPlatform[selected_platform_name]
-
-                self.model = DisinformationModel(
-                    N=N,
-                    alpha=alpha,
-                    beta=beta,
-                    gamma=gamma,
-                    delta=delta,
-                    theta=theta,
-                    initial_believing_agents=initial_believing,
-                    selected_social_platforms=[selected_platform]
-                )
-
-                self.state_counter = StateCounter(self.model)
-                self.plotter.reset_plot()
-                self.current_step = 0
-                self.step_slider.set(0)
-                self.step_label.config(text="0")
-
-                counts = self.state_counter.count_states()
-                self.state_counter.record_history()
-                self.update_state_labels(counts)
-
-                self.plotter.update_plot(self.state_counter.get_history())
-
-                platforms_text = selected_platform_name
-                self.selected_platforms_label.config(text=f"Selected Platform: {platforms_text}")
-                logging.info(f"Selected Social Media Platform: {platforms_text}")
-
-                self.is_running = True
-                self.stop_event.clear()
-                self.save_button.config(state=tk.NORMAL)  #
-                self.thread = Thread(target=self.run_simulation)
-                self.thread.start()
-                self.start_button.config(state=tk.DISABLED)
-                self.stop_button.config(state=tk.NORMAL)
-                self.restart_button.config(state=tk.NORMAL)
-                logging.info("Simulation started.")
-            except Exception as e:
-                logging.error(f"Error starting simulation: {e}")
-                messagebox.showerror("Error", str(e))
+            self.begin_run("start")
 
-    def stop_simulation(self):
-        """
-        Stops the simulation.
+    def begin_run(self, action):
         """
-        if self.is_running:
-            self.stop_event.set()
-            self.is_running = False
-            self.start_button.config(state=tk.NORMAL)
-            self.stop_button.config(state=tk.DISABLED)
-            self.restart_button.config(state=tk.NORMAL)
-            logging.info("Simulation stopped.")
+        Reads the settings, prepares the model and runs it in a separate thread, or shows its cached result.
 
-    def restart_simulation(self):
-        """
-        Restarts the simulation by resetting the model and state counter.
+        Args:
+            action (str): 'start' or 'restart', used in the log and error messages.
         """
-        self.stop_simulation()
         try:
-            N = self.num_agents_var.get()
-            initial_believing = self.initial_believing_var.get()
-            alpha = self.alpha_var.get()
-            beta = self.beta_var.get()
-            gamma = self.gamma_var.get()
-            delta = self.delta_var.get()
-            theta = self.theta_var.get()
-
-            if initial_believing > N:
-                raise ValueError("Initial believing agents cannot exceed total number of agents.")
-            if not (0 <= alpha <= 1):
-                raise ValueError("Alpha must be between 0 and 1.")
-            if not (0 <= beta <= 1):
-                raise ValueError("Beta must be between 0 and 1.")
-            if not (0 <= gamma <= 1):
-                raise ValueError("Gamma must be between 0 and 1.")
-            if not (0 <= delta <= 1):
-                raise ValueError("Delta must be between 0 and 1.")
-            if not (0 <= theta <= 1):
-                raise ValueError("Theta must be between 0 and 1.")
-
-            selected_platform_name = self.selected_platform_var.get()
-            if not selected_platform_name:
-                raise ValueError("Please select one social media platform.")
-
-            selected_platform = SocialPlatform[selected_platform_name]
-
-            self.model = DisinformationModel(
-                N=N,
-                alpha=alpha,
-                beta=beta,
-                gamma=gamma,
-                delta=delta,
-                theta=theta,
-                initial_believing_agents=initial_believing,
-                selected_social_platforms=[selected_platform]
-            )
+            settings = self.read_settings()
+            self.prepare_model(**settings)
+            if self.profiler is not None:
+                self.profiler.snapshot('construction')
 
             self.state_counter = StateCounter(self.model)
+            if self.agent_heatmap is not None:
+                self.agent_heatmap.set_model(self.model)
             self.plotter.reset_plot()
             self.current_step = 0
             self.step_slider.set(0)
             self.step_label.config(text="0")
 
-            counts = self.state_counter.count_states()
-            self.state_counter.record_history()
+            counts = self.state_counter.record_history()
             self.update_state_labels(counts)
+            self.update_demographic_labels()
 
             self.plotter.update_plot(self.state_counter.get_history())
 
-            platforms_text = selected_platform_name
+            platforms_text = settings['selected_platform'].name
             self.selected_platforms_label.config(text=f"Selected Platform: {platforms_text}")
             logging.info(f"Selected Social Media Platform: {platforms_text}")
 
-            self.is_running = True
-            self.stop_event.clear()
-            self.thread = Thread(target=self.run_simulation)
-            self.thread.start()
+            self.save_button.config(state=tk.NORMAL)
+            if self.load_cached_run():
+                return
+            self.launch_simulation_thread()
             self.start_button.config(state=tk.DISABLED)
             self.stop_button.config(state=tk.NORMAL)
             self.restart_button.config(state=tk.NORMAL)
-            logging.info("Simulation restarted.")
+            logging.info(f"Simulation {action}ed.")
         except Exception as e:
-            logging.error(f"Error restarting simulation: {e}")
+            logging.error(f"Error {action}ing simulation: {e}")
             messagebox.showerror("Error", str(e))
 
-    def run_simulation(self):
+    def read_settings(self):
         """
-        Runs the simulation steps and updates the plot.
+        Reads and validates the simulation parameters entered in the settings.
+
+        Returns:
+            dict: N, initial_believing, parameters (values of alpha..theta), selected_platform and seed.
+
+        Raises:
+            ValueError: If a value is invalid.
         """
-        for _ in range(self.num_steps):
-            if self.stop_event.is_set():
-                break
-            self.model.step()
-            self.current_step += 1
+        N = self.num_agents_var.get()
+        initial_believing = self.initial_believing_var.get()
+        parameters = {name: getattr(self, f"{name}_var").get() for name in PARAMETER_NAMES}
+
+        if initial_believing > N:
+            raise ValueError("Initial believing agents cannot exceed total number of agents.")
+        for name, value in parameters.items():
+            if not (0 <= value <= 1):
+                raise ValueError(f"{name.capitalize()} must be between 0 and 1.")
+
+        selected_platform_name = self.selected_platform_var.get()
+        if not selected_platform_name:
+            raise ValueError("Please select one social media platform.")
+
+        return {
+            'N': N,
+            'initial_believing': initial_believing,
+            'parameters': parameters,
+            'selected_platform': SocialPlatform[selected_platform_name],
+            'seed': self.get_seed(),
+        }
+
+    def prepare_model(self, N, initial_believing, parameters, selected_platform, seed):
+        """
+        Prepares the model of a run. When the current model already holds the run's population it is
+        reset in place, keeping its agents and rebuilding only the transition tables; otherwise a new
+        model is built.
+
+        Args:
+            N (int): Number of agents.
+            initial_believing (int): Number of agents initially believing in disinformation.
+            parameters (dict): Values of alpha..theta.
+            selected_platform (SocialPlatform): Platform of the agents.
+            seed (int): Optional seed of the run.
+        """
+        population = self.get_population(N, [selected_platform], seed)
+        if self.model is not None and self.model.population is population:
+            # The previous run's thread must have finished its last step before the states are reset
+            if self.thread is not None:
+                self.thread.join()
+            self.model.reset(parameters, initial_believing, seed)
+        else:
+            self.model = DisinformationModel(
+                N=N,
+                initial_believing_agents=initial_believing,
+                selected_social_platforms=[selected_platform],
+                seed=seed,
+                population=population,
+                **parameters
+            )
+        self.result_key = self.get_result_key(N, initial_believing, parameters, selected_platform, seed)
 
-            counts = self.state_counter.count_states()
-            self.state_counter.record_history()
+    def get_seed(self):
+        """
+        Gets the seed entered in the settings.
 
-            self.update_state_labels(counts)
+        Returns:
+            int: The seed, or None when the field is blank.
+        """
+        text = self.seed_var.get().strip()
+        if not text:
+            return None
+        try:
+            return int(text)
+        except ValueError:
+            raise ValueError("Seed must be an integer.") from None
+
+    def get_population(self, N, selected_social_platforms, seed=None):
+        """
+        Gets the population of a run, reusing the previous one when N, the platforms and the seed are unchanged.
+        Seeded populations are sampled from the seed's population stream, like headless runs with a
+        population cache, so both share cached results.
+
+        Args:
+            N (int): Number of agents.
+            selected_social_platforms (list of SocialPlatform): Platforms of the agents.
+            seed (int): Optional seed of the population.
 
-            if self.current_step % self.update_frequency == 0:
-                self.update_plot()
-                self.update_slider()
+        Returns:
+            Population: Demographics of the agents.
+        """
+        key = (N, tuple(selected_social_platforms), seed)
+        if key != self.population_key:
+            if seed is None:
+                self.population = Population.synthesize(N, selected_social_platforms)
+            else:
+                self.population = synthesize_seeded(N, selected_social_platforms, seed)
+            self.population_key = key
+        return self.population
+
+    def get_result_key(self, N, initial_believing, parameters, selected_platform, seed):
+        """
+        Gets the result cache key of a run.
 
-            if counts.get(State.RECOVERED, 0) == self.model.num_agents:
-                logging.info("All agents have recovered. Ending simulation.")
+        Args:
+            N (int): Number of agents.
+            initial_believing (int): Number of agents initially believing in disinformation.
+            parameters (dict): Values of alpha..theta.
+            selected_platform (SocialPlatform): Platform of the agents.
+            seed (int): Seed of the run.
+
+        Returns:
+            str: The key, or None for unseeded runs, which are never cached.
+        """
+        if seed is None:
+            return None
+        scenario = Scenario(agents=N, initial_believing=initial_believing,
+                            parameters=parameters, platforms=[selected_platform], seed=seed, steps=self.num_steps)
+        return self.result_cache.key(scenario, prebuilt_population=True)
+
+    def load_cached_run(self):
+        """
+        Shows the cached result of the current run instead of simulating it, if there is one.
+
+        Returns:
+            bool: True if the run was loaded from the result cache.
+        """
+        cached = self.result_cache.get(self.result_key) if self.result_key is not None else None
+        if cached is None:
+            return False
+
+        # Snapshots still queued by a stopped run must not be drawn over the cached history
+        self.run_id += 1
+        self.model.set_state_codes(cached['final_states'])
+        self.state_counter = StateCounter.from_arrays(cached, self.model)
+        self.current_step = self.state_counter.num_records - 1
+        self.last_plotted_step = self.current_step
+        self.update_state_labels(self.state_counter.get_counts_at(self.current_step))
+        self.plotter.update_plot(self.state_counter.get_history())
+        self.update_slider()
+        self.refresh_agent_heatmap()
+
+        self.start_button.config(state=tk.NORMAL)
+        self.stop_button.config(state=tk.DISABLED)
+        self.restart_button.config(state=tk.NORMAL)
+        self.save_button.config(state=tk.NORMAL)
+        logging.info("Loaded the run from the result cache.")
+        return True
+
+    def stop_simulation(self):
+        """
+        Stops the simulation.
+        """
+        if self.is_running:
+            self.stop_event.set()
+            self.is_running = False
+            self.start_button.config(state=tk.NORMAL)
+            self.stop_button.config(state=tk.DISABLED)
+            self.restart_button.config(state=tk.NORMAL)
+            logging.info("Simulation stopped.")
+
+    def restart_simulation(self):
+        """
+        Restarts the simulation, reusing the current model's agents when the population is unchanged.
+        """
+        self.stop_simulation()
+        self.begin_run("restart")
+
+    def launch_simulation_thread(self):
+        """
+        Starts a new simulation thread for the current model and begins polling its snapshots.
+        """
+        self.on_speed_change()
+        self.run_id += 1
+        self.last_plotted_step = self.current_step
+        self.stop_event = Event()
+        self.is_running = True
+        self.thread = Thread(target=self.run_simulation,
+                             args=(self.run_id, self.stop_event, self.model, self.state_counter, self.result_key,
+                                   self.profiler),
+                             daemon=True)
+        self.thread.start()
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.frame_interval_ms, self.poll_snapshots)
+
+    def on_speed_change(self, event=None):
+        """
+        Copies the speed settings from the Tk variables into plain attributes read by the simulation thread.
+        """
+        self.speed = SimulationSpeed(self.speed_var.get())
+        try:
+            self.steps_per_second = max(1, int(self.steps_per_second_var.get()))
+        except (tk.TclError, ValueError):
+            self.steps_per_second_var.set(self.steps_per_second)
+
+    def get_step_interval(self):
+        """
+        Gets the target wall-clock time between two simulation steps for the selected speed.
+
+        Returns:
+            float: Interval in seconds; 0 means no throttling.
+        """
+        if self.speed == SimulationSpeed.REAL_TIME:
+            return self.frame_interval_ms / 1000
+        if self.speed == SimulationSpeed.STEPS_PER_SECOND:
+            return 1.0 / self.steps_per_second
+        return 0.0
+
+    def run_simulation(self, run_id, stop_event, model, state_counter, result_key=None, profiler=None):
+        """
+        Runs the simulation steps on the worker thread and posts state snapshots to the queue.
+        Never touches Tk widgets.
+
+        Args:
+            run_id (int): Identifier of the run, used to discard snapshots of stale runs.
+            stop_event (Event): Event signalling that this run should stop.
+            model (DisinformationModel): The model advanced by this run.
+            state_counter (StateCounter): The state counter recording this run.
+            result_key (str): Result cache key of the run; runs that are not stopped are stored under it.
+            profiler (Profiler): Optional profiler that also profiles this thread.
+        """
+        step = 0
+        next_deadline = time.perf_counter()
+        with profiler.profile_thread() if profiler is not None else nullcontext():
+            for _ in range(self.num_steps):
+                if stop_event.is_set():
+                    break
+                model.step()
+                step += 1
+
+                counts = state_counter.record_history()
+                self.snapshot_queue.put((run_id, step, counts, self.snapshot_state_codes(model, state_counter)))
+
+                if counts.get(State.RECOVERED, 0) == model.num_agents:
+                    logging.info("All agents have recovered. Ending simulation.")
+                    break
+
+                interval = self.get_step_interval()
+                if interval > 0:
+                    # Pace against a deadline so slow steps are not followed by a burst of catch-up steps
+                    next_deadline = max(next_deadline + interval, time.perf_counter())
+                    stop_event.wait(next_deadline - time.perf_counter())
+
+            if result_key is not None and not stop_event.is_set():
+                try:
+                    self.result_cache.put(result_key, state_counter, model.get_state_codes())
+                except OSError as e:
+                    logging.warning(f"Could not cache the result: {e}")
+        self.snapshot_queue.put((run_id, None, None, None))
+
+    def snapshot_state_codes(self, model, state_counter):
+        """
+        Gets the state codes a snapshot carries to the agent map, if it is open. They are the codes the
+        state counter has just counted on the worker thread, so the map never scans the agents on the
+        main thread; the array engine's live state column is copied, as the next step changes it.
+
+        Args:
+            model (DisinformationModel): The model advanced by the run.
+            state_counter (StateCounter): The state counter recording the run.
+
+        Returns:
+            np.ndarray: uint8 State value of every agent, or None when the map is closed.
+        """
+        state_codes = state_counter.latest_state_codes
+        if self.agent_heatmap is None or state_codes is None:
+            return None
+        return state_codes.copy() if model.engine == 'array' else state_codes
+
+    def poll_snapshots(self):
+        """
+        Drains the snapshot queue on the main thread and renders only the most recent step.
+        Intermediate steps are coalesced; they remain available in the state counter history.
+        """
+        latest = None
+        finished = False
+        while True:
+            try:
+                run_id, step, counts, state_codes = self.snapshot_queue.get_nowait()
+            except queue.Empty:
                 break
+            if run_id != self.run_id:
+                continue
+            if step is None:
+                finished = True
+            else:
+                latest = (step, counts, state_codes)
+
+        if latest is not None:
+            self.current_step = latest[0]
+            self.render_snapshot(*latest)
+
+        if finished:
+            self.on_simulation_finished()
+
+        if self.is_running or self.thread.is_alive() or not self.snapshot_queue.empty():
+            self.root.after(self.frame_interval_ms, self.poll_snapshots)
+        else:
+            self.polling = False
+
+    def render_snapshot(self, step, counts, state_codes=None):
+        """
+        Updates labels, plot, slider and agent map for a snapshot.
 
-            time.sleep(0.05)
+        Args:
+            step (int): Simulation step of the snapshot.
+            counts (dict): Counts of agents in each state at that step.
+            state_codes (np.ndarray): Optional state codes of every agent at that step, for the agent map.
+        """
+        self.update_state_labels(counts)
+        if state_codes is not None:
+            self.refresh_agent_heatmap(state_codes)
+        if step - self.last_plotted_step >= self.update_frequency:
+            self.render_plot(step)
 
+    def render_plot(self, step):
+        """
+        Redraws the plot and moves the slider to a step.
+
+        Args:
+            step (int): Simulation step to show.
+        """
+        self.last_plotted_step = step
+        self.plotter.update_plot_to_step(self.state_counter.get_history(), step + 1)
+        self.update_slider(step)
+
+    def on_simulation_finished(self):
+        """
+        Shows the final step and restores the control buttons once the simulation thread has finished.
+        """
+        if self.last_plotted_step < self.current_step:
+            self.render_plot(self.current_step)
         self.is_running = False
         self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
         self.save_button.config(state=tk.NORMAL)
+        if self.profiler is not None:
+            self.profiler.snapshot('run')
+            if not self.profile_var.get():
+                self.finish_profiling()
+
+    def toggle_profiling(self):
+        """
+        Starts a profiling session when the Profile box is checked and writes it when it is unchecked.
+        A session that is unchecked during a run is written when the run's thread has finished.
+        """
+        if self.profile_var.get():
+            if self.profiler is None:
+                self.profiler = Profiler(session_directory())
+                self.profiler.start()
+        elif self.profiler is not None and not (self.thread is not None and self.thread.is_alive()):
+            self.finish_profiling()
+
+    def finish_profiling(self):
+        """
+        Stops the profiling session and writes its files.
+        """
+        directory = self.profiler.stop()
+        self.profiler = None
+        messagebox.showinfo("Profile", f"Profile written to:\n{os.path.abspath(directory)}")
+
+    def toggle_agent_heatmap(self):
+        """
+        Opens the agent map of the current model, or closes it if it is open.
+        """
+        if self.agent_heatmap is not None:
+            self.agent_heatmap.close()
+        elif self.model is None:
+            messagebox.showinfo("Agent Map", "Start a simulation to see its agents.")
+        else:
+            self.agent_heatmap = AgentHeatmap(self.root, self.model, on_close=self.on_agent_heatmap_closed)
+
+    def on_agent_heatmap_closed(self):
+        self.agent_heatmap = None
+
+    def refresh_agent_heatmap(self, state_codes=None):
+        """
+        Redraws the agent map, if it is open. Called at most once per GUI frame, so the map costs one
+        image upload per frame however many steps were simulated.
+
+        Args:
+            state_codes (np.ndarray): State codes to show, e.g. from a snapshot; read from the model when omitted.
+        """
+        if self.agent_heatmap is not None:
+            self.agent_heatmap.refresh(state_codes)
 
     def update_plot(self):
         """
@@ -364,20 +685,26 @@ class SimulationApp:
         history = self.state_counter.get_history()
         self.plotter.update_plot_to_step(history, step)
 
-    def update_slider(self):
+    def update_slider(self, step=None):
         """
         Updates the slider position based on the current step.
+
+        Args:
+            step (int): The step to show; defaults to the current step.
         """
-        current_max = self.current_step if self.current_step < self.num_steps else self.num_steps
+        if step is None:
+            step = self.current_step
+        current_max = step if step < self.num_steps else self.num_steps
         self.updating_slider = True
         self.step_slider.configure(to=current_max)
-        self.step_slider.set(self.current_step)
-        self.step_label.config(text=str(self.current_step))
+        self.step_slider.set(step)
+        self.step_label.config(text=str(step))
         self.updating_slider = False
 
     def on_slider_move(self, val):
         """
-        Handles the slider movement to update the plot to a specific step.
+        Handles the slider movement. Events are coalesced so that at most one update
+        is applied every SLIDER_DEBOUNCE_MS while the slider is dragged.
 
         Args:
             val (str): The current value of the slider.
@@ -385,10 +712,18 @@ class SimulationApp:
         if self.updating_slider:
             return
 
+        if self.pending_slider_value is None:
+            self.root.after(SLIDER_DEBOUNCE_MS, self.apply_slider_move)
+        self.pending_slider_value = val
+
+    def apply_slider_move(self):
+        """
+        Moves the plot cursor and the labels to the most recent slider position.
+        """
+        val, self.pending_slider_value = self.pending_slider_value, None
         try:
             step = int(float(val))
-            history = self.state_counter.get_history()
-            max_step = min([len(history[state]) for state in State])
+            max_step = self.state_counter.num_records
 
             if step > max_step:
                 step = max_step
@@ -397,8 +732,11 @@ class SimulationApp:
                 self.updating_slider = False
 
             self.step_label.config(text=str(step))
-            self.update_plot_to_step(step)
-            counts = {state: history[state][step - 1] if step > 0 else 0 for state in State}
+            self.plotter.show_cursor(self.state_counter.get_history(), step)
+            if step > 0:
+                counts = self.state_counter.get_counts_at(step - 1)
+            else:
+                counts = {state: 0 for state in State}
             self.update_state_labels(counts)
         except Exception as e:
             logging.error(f"Error in on_slider_move: {e}")
@@ -419,12 +757,13 @@ class SimulationApp:
             percent = (count / total * 100) if total > 0 else 0
             self.percent_labels[state].config(text=f"{state.name} (%): {percent:.2f}%")
 
-        sex_counts = {sex: 0 for sex in SexGroup}
-        education_counts = {edu: 0 for edu in EducationGroup}
-
-        for agent in self.model.agents:
-            sex_counts[agent.sex_group] += 1
-            education_counts[agent.education_group] += 1
+    def update_demographic_labels(self):
+        """
+        Updates the sex and education labels from the model's cached demographic totals.
+        Demographics never change during a run, so this only needs to be called once per model.
+        """
+        sex_counts = self.model.demographic_counts['sex']
+        education_counts = self.model.demographic_counts['education']
 
         for sex, label in self.sex_labels.items():
             label.config(text=f"{sex.name}: {sex_counts.get(sex, 0)}")
@@ -434,11 +773,13 @@ class SimulationApp:
 
     def save_results(self):
         """
-        Saves the simulation results to two CSV files:
+        Saves the simulation results to three CSV files:
         1. simulation_steps.csv - zawiera wyniki symulacji krok po kroku.
         2. agent_details.csv - zawiera szczegółowe dane każdego agenta.
+        3. state_breakdown.csv - zawiera liczby agentów w każdym stanie według grup demograficznych.
         """
         from tkinter import filedialog
+        import pandas as pd
 
         history = self.state_counter.get_history()
         agents = self.model.agents
@@ -452,6 +793,8 @@ class SimulationApp:
         agent_data = [agent.to_dict() for agent in agents]
         df_agents = pd.DataFrame(agent_data)
 
+        df_breakdown = self.build_breakdown_frame()
+
         directory = filedialog.askdirectory(title="Select Directory to Save Results")
         if not directory:
             return
@@ -463,6 +806,7 @@ class SimulationApp:
 
         filepath_steps = f"{directory}/{base_filename}_simulation_steps.csv"
         filepath_agents = f"{directory}/{base_filename}_agent_details.csv"
+        filepath_breakdown = f"{directory}/{base_filename}_state_breakdown.csv"
 
         try:
             df_steps.to_csv(filepath_steps, index=False)
@@ -471,7 +815,37 @@ class SimulationApp:
             df_agents.to_csv(filepath_agents, index=False)
             logging.info(f"Agent details saved to {filepath_agents}")
 
-            messagebox.showinfo("Success", f"Results saved to:\n{filepath_steps}\n{filepath_agents}")
+            df_breakdown.to_csv(filepath_breakdown, index=False)
+            logging.info(f"State breakdown saved to {filepath_breakdown}")
+            if self.profiler is not None:
+                self.profiler.snapshot('export')
+
+            messagebox.showinfo("Success",
+                                f"Results saved to:\n{filepath_steps}\n{filepath_agents}\n{filepath_breakdown}")
         except Exception as e:
             logging.error(f"Error saving results: {e}")
             messagebox.showerror("Error", f"Failed to save results: {e}")
+
+    def build_breakdown_frame(self):
+        """
+        Builds a table of state counts per demographic group for every recorded step.
+
+        Returns:
+            pd.DataFrame: Columns Step, Dimension, Group and one column per state.
+        """
+        import pandas as pd
+
+        frames = []
+        for dimension, groups in BREAKDOWN_GROUPS.items():
+            by_state = {state: self.state_counter.get_breakdown(state, dimension) for state in State}
+            for group in groups:
+                series = {state.name: by_state[state][group] for state in State}
+                df_group = pd.DataFrame({
+                    "Step": range(1, len(series[State.SUSCEPTIBLE.name]) + 1),
+                    "Dimension": dimension,
+                    "Group": group.name,
+                    **series,
+                })
+                frames.append(df_group)
+
+        return pd.concat(frames, ignore_index=True)
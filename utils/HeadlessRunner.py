@@ -0,0 +1,82 @@
+import csv
+import logging
+import time
+
+from enums.State import State
+from utils.StateCounter import StateCounter
+
+
+class HeadlessRunner:
+    def __init__(self, model, num_steps, progress_server=None):
+        """
+        Initializes the HeadlessRunner, which runs a model without the GUI.
+
+        Args:
+            model (DisinformationModel): The model to run.
+            num_steps (int): Maximum number of simulation steps.
+            progress_server (ProgressServer): Optional server that receives the counts of every step.
+        """
+        self.model = model
+        self.num_steps = num_steps
+        self.state_counter = StateCounter(model)
+        self.progress_server = progress_server
+        self.current_step = 0
+
+    def run(self):
+        """
+        Runs the simulation until num_steps steps are done or all agents have recovered.
+
+        Returns:
+            StateCounter: The state counter holding the recorded history.
+        """
+        start_time = time.perf_counter()
+        counts = self.state_counter.record_history()
+        self._publish(counts)
+
+        for _ in range(self.num_steps):
+            self.model.step()
+            self.current_step += 1
+
+            counts = self.state_counter.record_history()
+            self._publish(counts)
+
+            if counts.get(State.RECOVERED, 0) == self.model.num_agents:
+                logging.info("All agents have recovered. Ending simulation.")
+                break
+
+        elapsed = time.perf_counter() - start_time
+        logging.info(f"Finished {self.current_step} steps in {elapsed:.2f} s "
+                     f"({self.current_step / elapsed if elapsed > 0 else 0:.1f} steps/s).")
+        if self.progress_server is not None:
+            self.progress_server.publish_finished()
+        return self.state_counter
+
+    def _publish(self, counts):
+        if self.progress_server is not None:
+            self.progress_server.publish(self.current_step, counts)
+
+    def save_results(self, filepath):
+        """
+        Saves the recorded history in the same layout as the GUI's simulation_steps.csv.
+
+        Args:
+            filepath (str): Path of the CSV file.
+        """
+        write_history_csv(self.state_counter, filepath)
+
+
+def write_history_csv(state_counter, filepath):
+    """
+    Writes a recorded history in the same layout as the GUI's simulation_steps.csv.
+
+    Args:
+        state_counter (StateCounter): The state counter holding the history.
+        filepath (str): Path of the CSV file.
+    """
+    history = state_counter.get_history()
+    with open(filepath, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Step"] + [state.name for state in State])
+        for idx in range(state_counter.num_records):
+            writer.writerow([idx + 1] + [int(history[state][idx]) for state in State])
+    logging.info(f"Simulation steps saved to {filepath}")
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+from enums.SocialPlatform import SocialPlatform
+from enums.distributions.EducationDistribution import EducationDistribution
+from enums.distributions.PlatformAgeDistribution import PlatformAgeDistribution
+from enums.distributions.SexDistribution import SexDistribution
+from models.Population import Population
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "disinformation_model", "populations")
+
+# Bump when the synthesis algorithm changes so that stale populations are not reused
+CACHE_VERSION = 1
+
+# Rows of a cached population file, one uint8 column per row
+COLUMNS = ('age_codes', 'sex_codes', 'education_codes', 'platform_codes', 'cohort_codes')
+
+# Populations are sampled from their own stream of the seed, independent of the model's draws
+POPULATION_STREAM = 1
+
+
+def _distribution_table(distribution):
+    return {platform.name: {group.name: value for group, value in groups.items()}
+            for platform, groups in distribution.items()}
+
+
+def distribution_tables():
+    """
+    Gets the age, sex and education distributions as plain JSON-serializable dicts, for cache keys.
+
+    Returns:
+        dict: Keys 'age', 'sex' and 'education'; values map platform names to group probabilities.
+    """
+    return {
+        'age': _distribution_table(PlatformAgeDistribution),
+        'sex': _distribution_table(SexDistribution),
+        'education': _distribution_table(EducationDistribution),
+    }
+
+
+def synthesize_seeded(num_agents, selected_social_platforms, seed):
+    """
+    Samples the population of a seed the way the cache does, from the seed's population stream.
+
+    Args:
+        num_agents (int): Number of agents.
+        selected_social_platforms (list of SocialPlatform): Platforms of the agents (default: all).
+        seed (int): Seed of the population.
+
+    Returns:
+        Population: The sampled population.
+    """
+    return Population.synthesize(num_agents, selected_social_platforms,
+                                 np.random.default_rng([POPULATION_STREAM, seed]))
+
+
+class PopulationCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIRECTORY):
+        """
+        Initializes the PopulationCache, which stores synthesized populations on disk as a single
+        uint8 .npy array per population and loads them back memory-mapped.
+
+        Args:
+            directory (str): Directory of the cached populations.
+        """
+        self.directory = directory
+
+    @staticmethod
+    def key(num_agents, selected_social_platforms, seed):
+        """
+        Computes the cache key of a population.
+
+        Args:
+            num_agents (int): Number of agents.
+            selected_social_platforms (list of SocialPlatform): Platforms of the agents (default: all).
+            seed (int): Seed the population is sampled with.
+
+        Returns:
+            str: SHA-256 hex digest of the arguments and the distribution tables.
+        """
+        platforms = selected_social_platforms or list(SocialPlatform)
+        description = {
+            'version': CACHE_VERSION,
+            'num_agents': int(num_agents),
+            'platforms': [platform.name for platform in platforms],
+            'seed': seed,
+            **distribution_tables(),
+        }
+        encoded = json.dumps(description, sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def get(self, num_agents, selected_social_platforms, seed):
+        """
+        Loads a population from the cache, synthesizing and storing it first when it is missing.
+
+        Args:
+            num_agents (int): Number of agents.
+            selected_social_platforms (list of SocialPlatform): Platforms of the agents (default: all).
+            seed (int): Seed the population is sampled with.
+
+        Returns:
+            Population: A population whose columns are read-only memory-mapped views of the cache file.
+        """
+        path = self.path(self.key(num_agents, selected_social_platforms, seed))
+        if not os.path.exists(path):
+            self.store(path, synthesize_seeded(num_agents, selected_social_platforms, seed))
+            logging.info(f"Cached a population of {num_agents} agents in {path}.")
+        return self.load(path)
+
+    def store(self, path, population):
+        """
+        Writes a population to path; the file is written under a temporary name and then renamed,
+        so concurrent readers never see a partial file.
+
+        Args:
+            path (str): Destination .npy file.
+            population (Population): The population.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as file:
+            np.save(file, np.stack([getattr(population, column) for column in COLUMNS]))
+        os.replace(temporary, path)
+
+    @staticmethod
+    def load(path):
+        """
+        Loads a population file memory-mapped, so only the pages that are used are read.
+
+        Args:
+            path (str): The .npy file.
+
+        Returns:
+            Population: The population.
+        """
+        columns = np.load(path, mmap_mode='r')
+        if columns.shape[0] != len(COLUMNS) or columns.dtype != np.uint8:
+            raise ValueError(f"{path} is not a cached population.")
+        return Population(*columns)
@@ -0,0 +1,251 @@
+import cProfile
+import collections
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+DEFAULT_PROFILE_DIRECTORY = "profiles"
+
+# Seconds between two stack samples of the collapsed-stack profile
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+# Number of functions and subsystems listed in the summary
+DEFAULT_TOP = 15
+
+# Root of the repository; allocations in its files are grouped by top-level package
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CPU_PROFILE_FILE = "cpu.pstats"
+COLLAPSED_STACKS_FILE = "stacks.collapsed"
+SUMMARY_FILE = "summary.txt"
+
+
+def session_directory(base=DEFAULT_PROFILE_DIRECTORY):
+    """
+    Gets a new directory for one profiling session, named after the current time.
+
+    Args:
+        base (str): Directory holding the sessions.
+
+    Returns:
+        str: Path of the session directory; it is created when the profile is written.
+    """
+    return os.path.join(base, time.strftime("%Y%m%d-%H%M%S"))
+
+
+def subsystem(filename):
+    """
+    Gets the subsystem an allocation site belongs to: the top-level package of a repository file
+    (models, agents, utils, ui, ...), the distribution of an installed package (numpy, matplotlib,
+    ...) or 'stdlib'.
+
+    Args:
+        filename (str): File name of a traceback frame.
+
+    Returns:
+        str: Name of the subsystem.
+    """
+    if filename.startswith('<'):
+        return 'stdlib'
+    path = os.path.abspath(filename)
+    if path.startswith(PROJECT_ROOT + os.sep):
+        return os.path.relpath(path, PROJECT_ROOT).split(os.sep)[0]
+    parts = path.split(os.sep)
+    for marker in ('site-packages', 'dist-packages'):
+        if marker in parts and parts.index(marker) + 1 < len(parts):
+            return parts[parts.index(marker) + 1].split('.')[0]
+    return 'stdlib'
+
+
+def _frame_label(code):
+    filename = code.co_filename
+    if os.path.abspath(filename).startswith(PROJECT_ROOT + os.sep):
+        filename = os.path.relpath(filename, PROJECT_ROOT)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class Profiler:
+    def __init__(self, directory, sample_interval=DEFAULT_SAMPLE_INTERVAL, top=DEFAULT_TOP):
+        """
+        Initializes the Profiler, which records a function-level CPU profile, sampled call stacks and
+        allocation snapshots of a run and writes them to a directory:
+
+        - cpu.pstats: cProfile statistics of every profiled thread, for pstats or snakeviz.
+        - stacks.collapsed: sampled stacks of all threads in the collapsed format of flamegraph.pl
+          and speedscope, one 'thread;outer;...;inner count' line per distinct stack.
+        - NN-label.tracemalloc: the snapshots taken with snapshot(), for tracemalloc.Snapshot.load.
+        - summary.txt: the top functions by cumulative time and the traced memory of every snapshot
+          grouped by subsystem.
+
+        Nothing is traced before start(), so a model that is run without a profiler pays nothing.
+
+        Args:
+            directory (str): Output directory; created when the profile is written.
+            sample_interval (float): Seconds between two stack samples.
+            top (int): Number of functions and subsystems listed in the summary.
+        """
+        self.directory = directory
+        self.sample_interval = sample_interval
+        self.top = top
+        self.profiles = []
+        # Enabled profile of every profiled thread, by thread identifier
+        self._active_profiles = {}
+        self.snapshots = []
+        self.stacks = collections.Counter()
+        self.peak_memory = 0
+        self._main_profile = None
+        self._sampler = None
+        self._stop_sampling = threading.Event()
+
+    def start(self):
+        """
+        Starts tracing allocations, sampling stacks and profiling the calling thread.
+        """
+        tracemalloc.start()
+        self._stop_sampling.clear()
+        self._sampler = threading.Thread(target=self._sample_stacks, name="profile-sampler", daemon=True)
+        self._sampler.start()
+        self._main_profile = cProfile.Profile()
+        self.profiles.append(self._main_profile)
+        self._active_profiles[threading.get_ident()] = self._main_profile
+        self._main_profile.enable()
+        logging.info(f"Profiling into {self.directory}.")
+
+    @contextmanager
+    def profile_thread(self):
+        """
+        Profiles the calling thread, e.g. a simulation worker, while the block runs; cProfile only
+        sees the thread that enabled it. The block must end before stop() is called.
+        """
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ profiles through sys.monitoring, where the started profile already sees every thread
+            yield
+            return
+        self.profiles.append(profile)
+        self._active_profiles[threading.get_ident()] = profile
+        try:
+            yield
+        finally:
+            profile.disable()
+            del self._active_profiles[threading.get_ident()]
+
+    def snapshot(self, label):
+        """
+        Takes an allocation snapshot at the end of a phase of the run, e.g. 'construction' or 'export'.
+
+        Args:
+            label (str): Name of the phase.
+        """
+        # The calling thread's profile is paused so that the snapshot does not profile itself; the other
+        # profiles only see their own threads. Filtering the traces is left to the summary, after stop().
+        profile = self._active_profiles.get(threading.get_ident())
+        if profile is not None:
+            profile.disable()
+        try:
+            self.snapshots.append((label, tracemalloc.take_snapshot()))
+            self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+        finally:
+            if profile is not None:
+                profile.enable()
+
+    def stop(self):
+        """
+        Stops profiling and writes the profile files.
+
+        Returns:
+            str: The output directory.
+        """
+        self._main_profile.disable()
+        self._active_profiles.pop(threading.get_ident(), None)
+        self._stop_sampling.set()
+        self._sampler.join()
+        self.snapshot('stop')
+        tracemalloc.stop()
+
+        os.makedirs(self.directory, exist_ok=True)
+        stats = pstats.Stats(*self.profiles)
+        stats.dump_stats(os.path.join(self.directory, CPU_PROFILE_FILE))
+        with open(os.path.join(self.directory, COLLAPSED_STACKS_FILE), 'w') as file:
+            for stack, count in sorted(self.stacks.items()):
+                file.write(f"{stack} {count}\n")
+        for index, (label, snapshot) in enumerate(self.snapshots):
+            snapshot.dump(os.path.join(self.directory, f"{index:02d}-{label}.tracemalloc"))
+        with open(os.path.join(self.directory, SUMMARY_FILE), 'w') as file:
+            file.write(self.summary(stats))
+
+        logging.info(f"Profile written to {self.directory}.")
+        return self.directory
+
+    def _sample_stacks(self):
+        """
+        Records the stack of every other thread every sample_interval seconds until stop().
+        """
+        own_ident = threading.get_ident()
+        while not self._stop_sampling.wait(self.sample_interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(labels))] += 1
+
+    def memory_by_subsystem(self, snapshot):
+        """
+        Groups the traced memory of a snapshot by the subsystem of the allocating line, leaving out the
+        allocations of the profiler itself.
+
+        Args:
+            snapshot (tracemalloc.Snapshot): The snapshot.
+
+        Returns:
+            list: (subsystem, bytes, blocks) tuples, largest first.
+        """
+        sizes = collections.Counter()
+        blocks = collections.Counter()
+        for statistic in snapshot.statistics('filename'):
+            filename = statistic.traceback[0].filename
+            if filename in (__file__, tracemalloc.__file__):
+                continue
+            name = subsystem(filename)
+            sizes[name] += statistic.size
+            blocks[name] += statistic.count
+        return [(name, size, blocks[name]) for name, size in sizes.most_common()]
+
+    def summary(self, stats):
+        """
+        Formats the top functions by cumulative time and the top subsystems of every snapshot.
+
+        Args:
+            stats (pstats.Stats): The merged CPU profile.
+
+        Returns:
+            str: The summary text.
+        """
+        output = io.StringIO()
+        output.write(f"Top {self.top} functions by cumulative time\n")
+        stats.stream = output
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+
+        output.write(f"Peak traced memory: {self.peak_memory / 2 ** 20:.1f} MiB\n")
+        previous = {}
+        for index, (label, snapshot) in enumerate(self.snapshots):
+            usage = self.memory_by_subsystem(snapshot)
+            output.write(f"\nSnapshot {index:02d}-{label}: {sum(size for _, size, _ in usage) / 2 ** 20:.1f} MiB\n")
+            for name, size, count in usage[:self.top]:
+                change = (size - previous.get(name, 0)) / 2 ** 20
+                output.write(f"  {name:<16} {size / 2 ** 20:10.2f} MiB {change:+10.2f} MiB {count:10d} blocks\n")
+            previous = {name: size for name, size, _ in usage}
+        return output.getvalue()
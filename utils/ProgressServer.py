@@ -0,0 +1,196 @@
+import io
+import json
+import logging
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Condition, Thread
+
+import numpy as np
+
+from enums.State import State
+
+LOCALHOST = "127.0.0.1"
+KEEPALIVE_SECONDS = 15.0
+
+
+class ProgressServer:
+    def __init__(self, state_counter, port=0, min_interval=0.25):
+        """
+        Initializes the ProgressServer, an optional local HTTP endpoint for monitoring runs.
+
+        Endpoints:
+            /events        Server-sent events with the latest step, state counts and throughput.
+            /history       The StateCounter history as compact JSON.
+            /history.npy   The StateCounter history as a NumPy .npy array of shape (records, len(State)).
+
+        The simulation only ever calls publish(), which overwrites a single slot and never blocks
+        on clients. Every client thread sends the newest snapshot at most once per min_interval,
+        so intermediate steps are coalesced and a slow client can never slow the simulation.
+
+        Args:
+            state_counter (StateCounter): The state counter of the monitored run.
+            port (int): Port to listen on; 0 picks a free port.
+            min_interval (float): Minimum number of seconds between two events sent to a client.
+        """
+        self.state_counter = state_counter
+        self.port = port
+        self.min_interval = min_interval
+        self.server = None
+        self.thread = None
+
+        self._condition = Condition()
+        self._version = 0
+        self._latest = None
+        self._finished = False
+        self._start_time = time.perf_counter()
+
+    @property
+    def url(self):
+        """
+        str: Base URL of the running server.
+        """
+        return f"http://{LOCALHOST}:{self.port}"
+
+    def start(self):
+        """
+        Starts serving on localhost in a daemon thread.
+        """
+        self.server = ThreadingHTTPServer((LOCALHOST, self.port), self._make_handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        logging.info(f"Progress server listening on {self.url}/events")
+
+    def stop(self):
+        """
+        Marks the run as finished, notifies connected clients and shuts the server down.
+        """
+        self.publish_finished()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def publish(self, step, counts):
+        """
+        Publishes the counts of a step. Called by the simulation loop; O(1) and non-blocking.
+
+        Args:
+            step (int): The simulation step.
+            counts (dict): Counts of agents in each state.
+        """
+        with self._condition:
+            self._latest = (step, counts, time.perf_counter())
+            self._version += 1
+            self._condition.notify_all()
+
+    def publish_finished(self):
+        """
+        Signals connected clients that the run has finished.
+        """
+        with self._condition:
+            self._finished = True
+            self._version += 1
+            self._condition.notify_all()
+
+    def _wait_for_update(self, seen_version, timeout):
+        """
+        Blocks a client thread until a snapshot newer than seen_version is published.
+
+        Returns:
+            tuple: (version, latest snapshot, finished flag).
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._version != seen_version, timeout=timeout)
+            return self._version, self._latest, self._finished
+
+    def _event_payload(self, snapshot, previous):
+        """
+        Builds the JSON payload of a progress event.
+
+        Args:
+            snapshot (tuple): (step, counts, timestamp) of the newest step.
+            previous (tuple): The snapshot sent previously to the same client, or None.
+
+        Returns:
+            str: Compact JSON.
+        """
+        step, counts, timestamp = snapshot
+        if previous is not None and timestamp > previous[2]:
+            steps_per_second = (step - previous[0]) / (timestamp - previous[2])
+        else:
+            elapsed = timestamp - self._start_time
+            steps_per_second = step / elapsed if elapsed > 0 else 0.0
+        return json.dumps({
+            "step": step,
+            "counts": {state.name: counts.get(state, 0) for state in State},
+            "steps_per_second": round(steps_per_second, 2),
+        }, separators=(",", ":"))
+
+    def _history_json(self):
+        history = self.state_counter.get_history()
+        return json.dumps({
+            "records": self.state_counter.num_records,
+            "history": {state.name: history[state].tolist() for state in State},
+        }, separators=(",", ":")).encode("utf-8")
+
+    def _history_npy(self):
+        history = self.state_counter.get_history()
+        buffer = io.BytesIO()
+        np.save(buffer, np.column_stack([history[state] for state in State]))
+        return buffer.getvalue()
+
+    def _make_handler(self):
+        progress = self
+
+        class ProgressRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/events":
+                    self._stream_events()
+                elif self.path == "/history":
+                    self._send_body(progress._history_json(), "application/json")
+                elif self.path == "/history.npy":
+                    self._send_body(progress._history_npy(), "application/octet-stream")
+                else:
+                    self.send_error(404, "Available endpoints: /events, /history, /history.npy")
+
+            def _send_body(self, body, content_type):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream_events(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+
+                seen_version = None
+                previous = None
+                try:
+                    while True:
+                        version, snapshot, finished = progress._wait_for_update(seen_version, KEEPALIVE_SECONDS)
+                        if version == seen_version:
+                            self.wfile.write(b": keepalive\n\n")
+                        else:
+                            seen_version = version
+                            if snapshot is not None and snapshot is not previous:
+                                payload = progress._event_payload(snapshot, previous)
+                                self.wfile.write(f"event: progress\ndata: {payload}\n\n".encode("utf-8"))
+                                previous = snapshot
+                            if finished:
+                                self.wfile.write(b"event: done\ndata: {}\n\n")
+                                self.wfile.flush()
+                                return
+                        self.wfile.flush()
+                        time.sleep(progress.min_interval)
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+
+            def log_message(self, format, *args):
+                logging.debug(f"Progress server: {format % args}")
+
+        return ProgressRequestHandler
@@ -0,0 +1,147 @@
+import numpy as np
+
+DEFAULT_BLOCK_SIZE = 1 << 16
+
+# Bernoulli(p) is decided as raw < threshold with raw uniform on [0, 2**32)
+THRESHOLD_SCALE = float(1 << 32)
+MAX_THRESHOLD = np.iinfo(np.uint32).max
+
+
+def probability_thresholds(probabilities):
+    """
+    Converts probabilities into uint32 thresholds so that a uniform uint32 draw r decides
+    Bernoulli(p) as r < threshold. The error is below 2**-32 per decision.
+
+    Args:
+        probabilities (float or np.ndarray): Probabilities; values outside [0, 1] are clipped.
+
+    Returns:
+        np.ndarray: uint32 thresholds.
+    """
+    scaled = np.clip(np.asarray(probabilities, dtype=float), 0.0, 1.0) * THRESHOLD_SCALE
+    return np.minimum(np.floor(scaled), MAX_THRESHOLD).astype(np.uint32)
+
+
+class RandomPool:
+    def __init__(self, seed=None, block_size=DEFAULT_BLOCK_SIZE, antithetic=False):
+        """
+        Initializes the RandomPool, which generates random numbers in large blocks and hands them
+        out by slicing, so the per-call overhead of the generator is paid once per block.
+
+        Args:
+            seed (int or np.random.SeedSequence): Optional seed of the underlying generator.
+            block_size (int): Number of values generated per block.
+            antithetic (bool): If True, raw_uint32 returns the complement 2**32 - 1 - r of every value r
+                of the same seed's non-antithetic pool, i.e. the antithetic draw 1 - u.
+        """
+        self.rng = np.random.default_rng(seed)
+        self.block_size = block_size
+        self.antithetic = antithetic
+        self._blocks = {}
+        self._positions = {}
+
+    def _take(self, kind, count, generate):
+        """
+        Hands out count values of a kind from its current block, generating a new block when needed.
+        """
+        if count > self.block_size:
+            return generate(count)
+
+        block = self._blocks.get(kind)
+        position = self._positions.get(kind, 0)
+        if block is None or position + count > len(block):
+            block = generate(self.block_size)
+            self._blocks[kind] = block
+            position = 0
+        self._positions[kind] = position + count
+        return block[position:position + count]
+
+    def raw_uint32(self, count):
+        """
+        Gets uniform uint32 values; every 64-bit generator output yields two of them.
+
+        Args:
+            count (int): Number of values.
+
+        Returns:
+            np.ndarray: uint32 array of length count.
+        """
+        def generate(size):
+            values = self.rng.bit_generator.random_raw((size + 1) // 2).view(np.uint32)[:size]
+            return np.invert(values, out=values) if self.antithetic else values
+
+        return self._take('uint32', count, generate)
+
+    def raw_uint32_pieces(self, count, piece_size):
+        """
+        Yields the values of raw_uint32(count) in consecutive pieces, so that a long range of draws can
+        be consumed without holding all of it; the concatenated pieces equal the single call.
+
+        Args:
+            count (int): Number of values.
+            piece_size (int): Even maximum number of values per piece.
+
+        Yields:
+            np.ndarray: uint32 arrays of at most piece_size values.
+        """
+        if count <= max(piece_size, self.block_size):
+            values = self.raw_uint32(count)
+            for start in range(0, count, piece_size):
+                yield values[start:start + piece_size]
+            return
+
+        # Pieces of even size consume whole 64-bit outputs, like a single generate(count) call
+        for start in range(0, count, piece_size):
+            size = min(piece_size, count - start)
+            values = self.rng.bit_generator.random_raw((size + 1) // 2).view(np.uint32)[:size]
+            yield np.invert(values, out=values) if self.antithetic else values
+
+    def uniforms(self, count):
+        """
+        Gets uniform floats in [0, 1).
+
+        Args:
+            count (int): Number of values.
+
+        Returns:
+            np.ndarray: float64 array of length count.
+        """
+        return self._take('uniform', count, self.rng.random)
+
+    def normals(self, count):
+        """
+        Gets standard normal floats.
+
+        Args:
+            count (int): Number of values.
+
+        Returns:
+            np.ndarray: float64 array of length count.
+        """
+        return self._take('normal', count, self.rng.standard_normal)
+
+    def bernoulli(self, thresholds):
+        """
+        Draws Bernoulli decisions by comparing uniform uint32 values with precomputed thresholds.
+
+        Args:
+            thresholds (np.ndarray): uint32 thresholds from probability_thresholds.
+
+        Returns:
+            np.ndarray: Boolean array of the same shape as thresholds.
+        """
+        thresholds = np.asarray(thresholds, dtype=np.uint32)
+        return self.raw_uint32(thresholds.size).reshape(thresholds.shape) < thresholds
+
+    def poisson(self, mu, size=None):
+        """
+        Draws Poisson-distributed samples.
+
+        Args:
+            mu (float or np.ndarray): Expected value(s).
+            size (int or tuple): Output shape.
+
+        Returns:
+            np.ndarray: Integer samples.
+        """
+        return self.rng.poisson(mu, size)
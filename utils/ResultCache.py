@@ -0,0 +1,143 @@
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+from models.DisinformationModel import DisinformationModel
+from utils.PopulationCache import distribution_tables
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "disinformation_model", "results")
+
+# Bump when a change to the model or its engines changes the results of a seeded run
+RESULT_CACHE_VERSION = 1
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 1000
+
+
+class ResultCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Initializes the ResultCache, which stores the recorded history and final agent states of
+        completed seeded runs as one compressed .npz file per run. Reading an entry marks it as
+        recently used; the least recently used entries are evicted when the cache grows beyond
+        max_bytes or max_entries.
+
+        Args:
+            directory (str): Directory of the cached results.
+            max_bytes (int): Maximum total size of the cached files.
+            max_entries (int): Maximum number of cached runs.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+    @staticmethod
+    def key(scenario, threads=1, prebuilt_population=False):
+        """
+        Computes the cache key of a run.
+
+        Only seeded runs are reproducible, so unseeded scenarios have no key. The step kernel is not
+        part of the key because every kernel produces the same states.
+
+        Args:
+            scenario (Scenario): The scenario of the run.
+            threads (int): Number of threads of the array engine; each thread has its own random stream.
+            prebuilt_population (bool): True if a sampled population comes from the seed's population
+                stream (see PopulationCache) rather than being sampled by the model.
+
+        Returns:
+            str: SHA-256 hex digest of the run's inputs and the model tables, or None if unseeded.
+        """
+        if scenario.seed is None:
+            return None
+        description = {
+            'version': RESULT_CACHE_VERSION,
+            'scenario': scenario.to_dict(),
+            'threads': int(threads),
+            'prebuilt_population': bool(prebuilt_population) and scenario.population == 'sampled',
+            'modifiers': DisinformationModel.build_modifier_table(scenario.platforms or None).tolist(),
+            **distribution_tables(),
+        }
+        encoded = json.dumps(description, sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        """
+        Loads a cached run.
+
+        Args:
+            key (str): Cache key, see key().
+
+        Returns:
+            dict: The arrays of StateCounter.to_arrays plus 'final_states', or None on a miss.
+        """
+        path = self.path(key)
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable cached result {path}: {e}")
+            return None
+        os.utime(path)
+        return arrays
+
+    def put(self, key, state_counter, final_states):
+        """
+        Stores a completed run and evicts the least recently used runs beyond the limits. The file
+        is written under a temporary name and then renamed, so readers never see a partial file.
+
+        Args:
+            key (str): Cache key, see key().
+            state_counter (StateCounter): The state counter holding the recorded history.
+            final_states (np.ndarray): State codes of every agent at the end of the run.
+        """
+        path = self.path(key)
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as file:
+            np.savez_compressed(file, final_states=np.asarray(final_states, dtype=np.uint8),
+                                **state_counter.to_arrays())
+        os.replace(temporary, path)
+        self.evict(keep=path)
+
+    def evict(self, keep=None):
+        """
+        Removes the least recently used runs until the cache fits max_bytes and max_entries.
+
+        Args:
+            keep (str): Optional path that is never removed, e.g. the run that was just stored.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npz'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                status = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        count = len(entries)
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes and count <= self.max_entries:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            count -= 1
+            logging.info(f"Evicted cached result {path}.")
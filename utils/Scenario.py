@@ -0,0 +1,226 @@
+import json
+import os
+import tomllib
+
+from agents.MappedAgentStore import DEFAULT_MEMORY_BUDGET
+from enums.SocialPlatform import SocialPlatform
+from models.DisinformationModel import DisinformationModel, ENGINES, PARAMETER_NAMES
+from models.ParameterSchedule import ParameterSchedule
+from models.Population import Population
+
+SCENARIO_KEYS = ('agents', 'initial_believing', 'parameters', 'platforms', 'seed', 'steps', 'engine', 'schedules',
+                 'population')
+
+# 'sampled' draws every agent's demographics, 'stratified' allocates exact cohort quotas
+POPULATION_BUILDERS = ('sampled', 'stratified')
+
+
+class Scenario:
+    def __init__(self, agents=1000, initial_believing=50, parameters=None, platforms=None, seed=None, steps=200,
+                 engine='object', schedules=None, population='sampled'):
+        """
+        Initializes a Scenario, a validated description of one simulation run.
+
+        Args:
+            agents (int): Number of agents.
+            initial_believing (int): Number of agents initially believing in disinformation.
+            parameters (dict): Values of alpha, beta, gamma, delta and theta (each defaults to 1.0).
+            platforms (list of str or SocialPlatform): Social platforms of the agents (default: all).
+            seed (int): Optional seed; seeded scenarios can reuse a cached population.
+            steps (int): Number of simulation steps.
+            engine (str): Simulation engine, see DisinformationModel.
+            schedules (dict): Optional per-step parameter segments, see ParameterSchedule.
+            population (str): How the population is built, one of POPULATION_BUILDERS.
+
+        Raises:
+            ValueError: If any value is invalid.
+        """
+        self.agents = agents
+        self.initial_believing = initial_believing
+        self.parameters = {name: 1.0 for name in PARAMETER_NAMES}
+        self.parameters.update(parameters or {})
+        self.platforms = [platform if isinstance(platform, SocialPlatform) else self._platform(platform)
+                          for platform in platforms or []]
+        self.seed = seed
+        self.steps = steps
+        self.engine = engine
+        self.schedules = schedules or {}
+        self.population = population
+        self.validate()
+        self.schedule = (ParameterSchedule(self.schedules, self.parameters, max_steps=self.steps)
+                         if self.schedules else None)
+
+    @staticmethod
+    def _platform(name):
+        try:
+            return SocialPlatform[name]
+        except KeyError:
+            raise ValueError(f"Unknown social platform: {name}.") from None
+
+    def validate(self):
+        """
+        Checks every value of the scenario.
+
+        Raises:
+            ValueError: If any value is invalid.
+        """
+        for name, value in (('agents', self.agents), ('initial_believing', self.initial_believing),
+                            ('steps', self.steps)):
+            if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                raise ValueError(f"{name} must be a non-negative integer.")
+        if self.initial_believing > self.agents:
+            raise ValueError("Initial believing agents cannot exceed total number of agents.")
+
+        unknown = set(self.parameters) - set(PARAMETER_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}.")
+        for name, value in self.parameters.items():
+            if not isinstance(value, (int, float)) or isinstance(value, bool) or not 0 <= value <= 1:
+                raise ValueError(f"{name.capitalize()} must be between 0 and 1.")
+
+        if self.seed is not None and (not isinstance(self.seed, int) or isinstance(self.seed, bool)):
+            raise ValueError("seed must be an integer.")
+        if self.engine not in ENGINES:
+            raise ValueError(f"engine must be one of: {', '.join(ENGINES)}.")
+        if self.population not in POPULATION_BUILDERS:
+            raise ValueError(f"population must be one of: {', '.join(POPULATION_BUILDERS)}.")
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Builds a Scenario from a dict with the keys of SCENARIO_KEYS.
+
+        Args:
+            data (dict): Scenario values; platform names are SocialPlatform member names.
+
+        Returns:
+            Scenario: The validated scenario.
+        """
+        unknown = set(data) - set(SCENARIO_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown scenario keys: {', '.join(sorted(unknown))}.")
+        return cls(**data)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a scenario from a TOML or JSON file, e.g.
+
+            agents = 100000
+            platforms = ["TikTok"]
+            seed = 7
+
+            [parameters]
+            alpha = 0.8
+
+            [[schedules.alpha]]
+            type = "ramp"
+            start = 50
+            end = 80
+            value = 0.2
+
+        Args:
+            path (str): Path of a .toml or .json file.
+
+        Returns:
+            Scenario: The validated scenario.
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.toml':
+            with open(path, 'rb') as file:
+                data = tomllib.load(file)
+        elif extension == '.json':
+            with open(path, encoding='utf-8') as file:
+                data = json.load(file)
+        else:
+            raise ValueError(f"Unsupported scenario file type: {extension or path}; use .toml or .json.")
+        return cls.from_dict(data)
+
+    def to_dict(self):
+        """
+        Returns a dictionary representation of the Scenario, in the file format.
+        """
+        return {
+            'agents': self.agents,
+            'initial_believing': self.initial_believing,
+            'parameters': dict(self.parameters),
+            'platforms': [platform.name for platform in self.platforms],
+            'seed': self.seed,
+            'steps': self.steps,
+            'engine': self.engine,
+            'schedules': {name: [dict(segment) for segment in segments] for name, segments in self.schedules.items()},
+            'population': self.population,
+        }
+
+    def build_model(self, population_cache=None, kernel='auto', threads=1, store_directory=None,
+                    memory_budget=DEFAULT_MEMORY_BUDGET):
+        """
+        Builds the model of the scenario.
+
+        Args:
+            population_cache (PopulationCache): Optional cache; seeded scenarios with a sampled
+                population load it from the cache instead of sampling it again.
+            kernel (str): Step kernel of the array engine, see DisinformationModel.
+            threads (int): Number of threads of the array engine.
+            store_directory (str): Optional directory of a memory-mapped agent store, see DisinformationModel.
+            memory_budget (int): Bytes available to the chunks of a mapped store.
+
+        Returns:
+            DisinformationModel: The model.
+        """
+        population = None
+        if self.population == 'stratified':
+            population = Population.stratified(self.agents, self.platforms or None)
+        elif population_cache is not None and self.seed is not None:
+            population = population_cache.get(self.agents, self.platforms or None, self.seed)
+        return DisinformationModel(
+            N=self.agents,
+            initial_believing_agents=self.initial_believing,
+            selected_social_platforms=self.platforms or None,
+            seed=self.seed,
+            engine=self.engine,
+            population=population,
+            schedule=self.schedule,
+            kernel=kernel,
+            threads=threads,
+            store_directory=store_directory,
+            memory_budget=memory_budget,
+            **self.parameters
+        )
+
+    def run(self, population_cache=None, result_cache=None, kernel='auto', threads=1, store_directory=None,
+            memory_budget=DEFAULT_MEMORY_BUDGET):
+        """
+        Runs the scenario without the GUI, or loads its history from a result cache.
+
+        Args:
+            population_cache (PopulationCache): Optional cache of populations, see build_model.
+            result_cache (ResultCache): Optional cache of completed runs; seeded runs are loaded from
+                it when present and stored in it otherwise.
+            kernel (str): Step kernel of the array engine, see DisinformationModel.
+            threads (int): Number of threads of the array engine.
+            store_directory (str): Optional directory of a memory-mapped agent store, see DisinformationModel.
+            memory_budget (int): Bytes available to the chunks of a mapped store.
+
+        Returns:
+            StateCounter: The recorded history; its model is None when it was loaded from the cache.
+        """
+        from utils.HeadlessRunner import HeadlessRunner
+        from utils.StateCounter import StateCounter
+
+        key = None
+        if result_cache is not None:
+            key = result_cache.key(self, threads, prebuilt_population=population_cache is not None)
+            cached = result_cache.get(key) if key is not None else None
+            if cached is not None:
+                return StateCounter.from_arrays(cached)
+
+        model = self.build_model(population_cache, kernel=kernel, threads=threads, store_directory=store_directory,
+                                 memory_budget=memory_budget)
+        try:
+            state_counter = HeadlessRunner(model, self.steps).run()
+            if key is not None:
+                result_cache.put(key, state_counter, model.get_state_codes())
+        finally:
+            model.close()
+        return state_counter
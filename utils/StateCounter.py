@@ -1,4 +1,25 @@
+import numpy as np
+
 from enums.State import State
+from models.DisinformationModel import AGE_GROUPS, COHORT_SHAPE, EDUCATION_GROUPS, SEX_GROUPS
+
+BREAKDOWN_GROUPS = {
+    'age': AGE_GROUPS,
+    'sex': SEX_GROUPS,
+    'education': EDUCATION_GROUPS,
+}
+
+# Axes of the cohort cross-tab that are summed out to get each breakdown
+BREAKDOWN_SUM_AXES = {
+    'age': (2, 3),
+    'sex': (1, 3),
+    'education': (1, 2),
+}
+
+INITIAL_CAPACITY = 1024
+
+# Number of agents packed and counted at a time, bounding the temporaries of large populations
+COUNT_CHUNK_SIZE = 1 << 22
 
 
 class StateCounter:
@@ -10,7 +31,108 @@ class StateCounter:
             model (DisinformationModel): Reference to the model.
         """
         self.model = model
-        self.history = {state: [] for state in State}
+        self.num_records = 0
+        self.latest_cohort_counts = None
+        self.latest_state_codes = None
+
+        # History is kept in preallocated arrays that double in size when full, so it can be
+        # handed out as zero-copy views. Views taken before a resize stay valid.
+        self._state_history = np.zeros((INITIAL_CAPACITY, len(State)), dtype=np.int64)
+        self._breakdown_history = {
+            dimension: np.zeros((INITIAL_CAPACITY, len(State), len(groups)), dtype=np.int64)
+            for dimension, groups in BREAKDOWN_GROUPS.items()
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, model=None):
+        """
+        Builds a StateCounter holding a previously recorded history, see to_arrays.
+
+        Args:
+            arrays (dict): Arrays as returned by to_arrays; other keys are ignored.
+            model (DisinformationModel): Optional model the history belongs to.
+
+        Returns:
+            StateCounter: The state counter.
+        """
+        counter = cls(model)
+        states = np.asarray(arrays['states'], dtype=np.int64)
+        counter.num_records = len(states)
+        capacity = max(counter.num_records, INITIAL_CAPACITY)
+
+        def restore(array):
+            restored = np.zeros((capacity,) + array.shape[1:], dtype=np.int64)
+            restored[:len(array)] = array
+            return restored
+
+        counter._state_history = restore(states)
+        counter._breakdown_history = {dimension: restore(np.asarray(arrays[dimension]))
+                                      for dimension in BREAKDOWN_GROUPS}
+        return counter
+
+    def to_arrays(self):
+        """
+        Gets copies of the recorded history as plain arrays.
+
+        Returns:
+            dict: 'states' of shape (records, len(State)) and, for every breakdown dimension,
+                an array of shape (records, len(State), groups).
+        """
+        arrays = {'states': self._state_history[:self.num_records].copy()}
+        for dimension, history in self._breakdown_history.items():
+            arrays[dimension] = history[:self.num_records].copy()
+        return arrays
+
+    @property
+    def history(self):
+        """
+        dict: Keys are states, values are read-only array views of the recorded counts.
+        """
+        return self.get_history()
+
+    def _ensure_capacity(self):
+        """
+        Doubles the history arrays when the next record would not fit.
+        """
+        capacity = len(self._state_history)
+        if self.num_records < capacity:
+            return
+
+        def grow(array):
+            grown = np.zeros((capacity * 2,) + array.shape[1:], dtype=array.dtype)
+            grown[:capacity] = array
+            return grown
+
+        self._state_history = grow(self._state_history)
+        self._breakdown_history = {dimension: grow(array) for dimension, array in self._breakdown_history.items()}
+
+    def count_cohorts(self):
+        """
+        Counts the agents in every state x age x sex x education cell.
+
+        The state code and the static cohort code are packed into a single integer per agent,
+        so the whole cross-tab is produced by one bincount. Models with a mapped store count their
+        chunks while stepping; those counts are reused instead of reading the files again.
+
+        Returns:
+            np.ndarray: Array of shape (len(State), age groups, sex groups, education groups).
+        """
+        if self.model.step_cohort_counts is not None:
+            return self.model.step_cohort_counts.reshape((len(State),) + COHORT_SHAPE)
+
+        num_cohorts = self.model.num_cohorts
+        states = self.model.get_state_codes()
+        self.latest_state_codes = states
+        cohort_codes = self.model.cohort_codes
+        counts = np.zeros(len(State) * num_cohorts, dtype=np.int64)
+        if self.model.store is not None:
+            chunks = self.model.store.chunks(chunk_size=COUNT_CHUNK_SIZE)
+        else:
+            chunks = (slice(start, start + COUNT_CHUNK_SIZE) for start in range(0, len(states), COUNT_CHUNK_SIZE))
+        for chunk in chunks:
+            packed = states[chunk].astype(np.intp) * num_cohorts + cohort_codes[chunk]
+            counts += np.bincount(packed, minlength=len(State) * num_cohorts)
+        return counts.reshape((len(State),) + COHORT_SHAPE)
 
     def count_states(self):
         """
@@ -19,23 +141,70 @@ class StateCounter:
         Returns:
             dict: Keys are states, values are the number of agents in each state.
         """
-        states = [agent.state for agent in self.model.agents]
-        counts = {state: states.count(state) for state in State}
-        return counts
+        states = self.model.get_state_codes()
+        counts = np.bincount(states, minlength=len(State))
+        return {state: int(counts[state.value]) for state in State}
 
     def record_history(self):
         """
-        Records the current state counts to history.
+        Records the current state counts and demographic breakdowns to history.
+
+        Returns:
+            dict: Keys are states, values are the number of agents in each state.
         """
-        counts = self.count_states()
-        for state, count in counts.items():
-            self.history[state].append(count)
+        cohort_counts = self.count_cohorts()
+        self.latest_cohort_counts = cohort_counts
+
+        self._ensure_capacity()
+        row = self.num_records
+        state_totals = cohort_counts.sum(axis=(1, 2, 3))
+        self._state_history[row] = state_totals
+        for dimension, axes in BREAKDOWN_SUM_AXES.items():
+            self._breakdown_history[dimension][row] = cohort_counts.sum(axis=axes)
+        self.num_records = row + 1
+
+        return {state: int(state_totals[state.value]) for state in State}
 
     def get_history(self):
         """
         Retrieves the history of state counts.
 
         Returns:
-            dict: History of state counts.
+            dict: History of state counts as zero-copy, read-only array views.
+        """
+        recorded = self._state_history[:self.num_records]
+        recorded.flags.writeable = False
+        return {state: recorded[:, state.value] for state in State}
+
+    def get_counts_at(self, index):
+        """
+        Retrieves the state counts of one recorded step.
+
+        Args:
+            index (int): Index of the record; 0 is the initial state.
+
+        Returns:
+            dict: Keys are states, values are the number of agents in each state.
+        """
+        row = self._state_history[index]
+        return {state: int(row[state.value]) for state in State}
+
+    def get_breakdown(self, state, dimension):
+        """
+        Retrieves the history of one state broken down by a demographic dimension,
+        e.g. INFECTED by age group over time.
+
+        Args:
+            state (State): The state to break down.
+            dimension (str): One of 'age', 'sex' or 'education'.
+
+        Returns:
+            dict: Keys are groups of the dimension, values are arrays of counts per recorded step.
         """
-        return self.history
+        if dimension not in BREAKDOWN_GROUPS:
+            raise ValueError(f"Unknown breakdown dimension '{dimension}'. "
+                             f"Expected one of: {', '.join(BREAKDOWN_GROUPS)}.")
+
+        groups = BREAKDOWN_GROUPS[dimension]
+        series = self._breakdown_history[dimension][:self.num_records, state.value, :]
+        return {group: series[:, idx] for idx, group in enumerate(groups)}